@@ -1,8 +1,11 @@
 from fastapi import FastAPI
 from starlette.middleware.gzip import GZipMiddleware
 
-from src.controllers import company_controller, health_controller
-from src.core.context import get_database
+from src.controllers import company_controller, health_controller, job_controller, rule_set_controller
+from src.core.context import open_database_pool, close_database_pool, database_session, \
+    open_async_database_pool, close_async_database_pool, open_process_pool, close_process_pool, start_job_service, \
+    stop_job_service, open_company_cache, close_company_cache
+from src.core.database.migrations import MigrationRunner
 from src.core.exceptions.api_exception_handler import ExceptionHandler
 
 # FastAPI setup
@@ -13,15 +16,33 @@ app.add_middleware(GZipMiddleware)
 # Controllers setup
 app.include_router(health_controller.router)
 app.include_router(company_controller.router)
+app.include_router(company_controller.router_v2)
+app.include_router(job_controller.router)
+app.include_router(rule_set_controller.router)
 
 
 # Database setup
 async def create_db():
-    db = get_database()
-    db.create_db()
+    with database_session() as db:
+        MigrationRunner(db).migrate()
 
 
 # Startup command to init services
 @app.on_event("startup")
 async def startup():
+    open_database_pool()
     await create_db()
+    await open_async_database_pool()
+    open_process_pool()
+    open_company_cache()
+    start_job_service()
+
+
+# Shutdown command to release resources
+@app.on_event("shutdown")
+async def shutdown():
+    stop_job_service()
+    close_company_cache()
+    close_process_pool()
+    await close_async_database_pool()
+    close_database_pool()
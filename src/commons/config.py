@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 APP_DEFAULT_LOG_LEVEL = os.getenv("APP_DEFAULT_LOG_LEVEL", "DEBUG")
 
@@ -10,3 +11,50 @@ DB_PORT = int(os.getenv("DB_PORT", 5432))
 DB_NAME = os.getenv("DB_NAME", "datadb")
 DB_USER = os.getenv("DB_USER", "user")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_CHECK_ON_BORROW = os.getenv("DB_POOL_CHECK_ON_BORROW", "true").lower() == "true"
+
+DB_FETCH_CHUNK_SIZE = int(os.getenv("DB_FETCH_CHUNK_SIZE", "5000"))
+DB_WRITE_CHUNK_SIZE = int(os.getenv("DB_WRITE_CHUNK_SIZE", "5000"))
+DB_CURSOR_BATCH_SIZE = int(os.getenv("DB_CURSOR_BATCH_SIZE", "1000"))
+DB_MIGRATION_LOCK_POLL_INTERVAL = float(os.getenv("DB_MIGRATION_LOCK_POLL_INTERVAL", "0.5"))
+# Hash partitions of company.company_data in new databases (0: plain table), see src/core/database/partitioning.py
+DB_PARTITIONS = int(os.getenv("DB_PARTITIONS", "0"))
+DB_PARTITION_COPY_BATCH_SIZE = int(os.getenv("DB_PARTITION_COPY_BATCH_SIZE", "10000"))
+
+# In-process cache of company rows, see src/repositories/company_cache.py (0 entries: disabled)
+COMPANY_CACHE_MAX_ENTRIES = int(os.getenv("COMPANY_CACHE_MAX_ENTRIES", "10000"))
+COMPANY_CACHE_MAX_BYTES = int(os.getenv("COMPANY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+COMPANY_CACHE_TTL = float(os.getenv("COMPANY_CACHE_TTL", "300"))
+COMPANY_CACHE_LISTEN_RETRY_INTERVAL = float(os.getenv("COMPANY_CACHE_LISTEN_RETRY_INTERVAL", "5"))
+
+COMPANIES_PAGE_SIZE = int(os.getenv("COMPANIES_PAGE_SIZE", "1000"))
+COMPANIES_MAX_PAGE_SIZE = int(os.getenv("COMPANIES_MAX_PAGE_SIZE", "10000"))
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "10000"))
+# JSON file of extra keyword sets evaluated on import, see src/services/keyword_classifier.py
+KEYWORD_SETS_FILE = os.getenv("KEYWORD_SETS_FILE", "")
+# Comma-separated values stored as null in typed columns (case-insensitive), besides empty values
+IMPORT_NULL_MARKERS = os.getenv("IMPORT_NULL_MARKERS", "n/a,na,null,none,-")
+CSV_READ_CHUNK_SIZE = int(os.getenv("CSV_READ_CHUNK_SIZE", str(1024 * 1024)))
+JSON_MAX_ELEMENT_SIZE = int(os.getenv("JSON_MAX_ELEMENT_SIZE", str(16 * 1024 * 1024)))
+
+RULES_VECTORIZE_MIN_BATCH = int(os.getenv("RULES_VECTORIZE_MIN_BATCH", "1000"))
+RULES_VECTORIZE_MIN_RULES = int(os.getenv("RULES_VECTORIZE_MIN_RULES", "100"))
+
+# Registered rule sets kept validated and compiled by each worker, see src/services/rule_set_service.py
+RULE_SET_PLAN_CACHE_SIZE = int(os.getenv("RULE_SET_PLAN_CACHE_SIZE", "64"))
+
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(os.cpu_count() or 1)))
+PROCESS_POOL_MIN_BATCH = int(os.getenv("PROCESS_POOL_MIN_BATCH", "20000"))
+PROCESS_POOL_CHUNK_SIZE = int(os.getenv("PROCESS_POOL_CHUNK_SIZE", "10000"))
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_PROCESS_BATCH_SIZE = int(os.getenv("JOB_PROCESS_BATCH_SIZE", "10000"))
+# Seconds a running job stays claimed without progress before another worker may resume it; must exceed a batch
+JOB_LEASE_TIMEOUT = float(os.getenv("JOB_LEASE_TIMEOUT", "600"))
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "company-jobs"))
@@ -1,22 +1,355 @@
+import codecs
 import csv
-from io import StringIO
-from typing import Any
+import json
+import os
+import uuid
+from io import TextIOBase
+from typing import Any, Iterable, Iterator, AsyncIterator, AsyncIterable
 
+import anyio
 from fastapi import UploadFile
+from starlette.concurrency import iterate_in_threadpool
 
+from src.commons.config import IMPORT_BATCH_SIZE, CSV_READ_CHUNK_SIZE, JSON_MAX_ELEMENT_SIZE
+from src.models.company_record import CompanyRecord
 
-async def parse_csv_to_dict(file: UploadFile) -> list[dict[str, Any]]:
+
+async def parse_csv_to_dict(file: UploadFile) -> list[CompanyRecord]:
     """
-    Asynchronously parses a CSV file into a list of dictionaries.
+    Asynchronously parses a CSV file into a list of dictionary-like records.
+    Prefer `iter_csv_batches` for large files, which keeps memory bounded.
 
     Args:
         file (UploadFile): The uploaded CSV file.
 
     Returns:
-        list[dict[str, Any]]: A list where each item is a dictionary representing a row in the CSV.
+        list[CompanyRecord]: A list where each item is a record representing a row in the CSV.
+    """
+    rows = []
+    async for batch in iter_csv_batches(file, IMPORT_BATCH_SIZE):
+        rows.extend(batch)
+    return rows
+
+
+async def iter_csv_batches(file: UploadFile, batch_size: int,
+                           chunk_size: int = CSV_READ_CHUNK_SIZE) -> AsyncIterator[list[CompanyRecord]]:
+    """
+    Asynchronously parses a CSV file in fixed-size batches of rows, reading and decoding
+    the upload in chunks so memory stays bounded regardless of the file size.
+
+    UTF-8 sequences split across chunks are decoded incrementally, and the decoded lines feed a single
+    csv.reader, which keeps quoted fields spanning several lines together. Parsing runs in the thread
+    pool, awaiting each read of the upload on the event loop, so it does not block other requests.
+    Rows are built as CompanyRecord rather than dictionaries, which keeps the known columns in slots.
+
+    Args:
+        file (UploadFile): The uploaded CSV file.
+        batch_size (int): Maximum number of rows per yielded batch.
+        chunk_size (int): Number of bytes read from the upload at a time.
+
+    Yields:
+        list[CompanyRecord]: Up to `batch_size` rows, each keyed by the CSV header like a `csv.DictReader` row.
+    """
+    batches = __iter_record_batches(__iter_lines(__iter_decoded_chunks(file, chunk_size)), batch_size)
+    async for batch in iterate_in_threadpool(batches):
+        yield batch
+
+
+def __iter_decoded_chunks(file: UploadFile, chunk_size: int) -> Iterator[str]:
+    """
+    Reads and decodes the upload from a worker thread, running each read on the event loop.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while data := anyio.from_thread.run(file.read, chunk_size):
+        yield decoder.decode(data)
+    yield decoder.decode(b"", final=True)
+
+
+def __iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Splits text chunks into newline-terminated lines; the last line may lack its newline.
+    """
+    pending = []
+    for chunk in chunks:
+        *lines, tail = chunk.split("\n")
+        if lines:
+            lines[0] = "".join(pending) + lines[0]
+            pending = []
+            for line in lines:
+                yield line + "\n"
+        if tail:
+            pending.append(tail)
+    if pending:
+        yield "".join(pending)
+
+
+def __iter_record_batches(lines: Iterable[str], batch_size: int) -> Iterator[list[CompanyRecord]]:
+    """
+    Parses CSV lines into batches of up to `batch_size` records keyed by the header, skipping blank lines.
     """
-    content = await file.read()
-    text = content.decode('utf-8')
-    f = StringIO(text)
-    reader = csv.DictReader(f)
-    return [row for row in reader]
+    reader = csv.reader(lines)
+    fieldnames = next(reader, None)
+    batch = []
+    for values in reader:
+        if not values:
+            continue
+        batch.append(CompanyRecord.from_row(fieldnames, values))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class MalformedPayloadError(ValueError):
+    """
+    Raised when a streamed request body cannot be parsed in the declared format.
+    """
+
+
+async def iter_ndjson_batches(chunks: AsyncIterable[bytes], batch_size: int) -> AsyncIterator[list[Any]]:
+    """
+    Parses a newline-delimited JSON body (one JSON document per line) incrementally,
+    yielding fixed-size batches while the body is still arriving.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The raw body, for example `request.stream()`.
+        batch_size (int): Maximum number of documents per yielded batch.
+
+    Yields:
+        list: Up to `batch_size` parsed documents.
+
+    Raises:
+        MalformedPayloadError: If a line is not valid JSON.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    batch = []
+    line_number = 0
+    async for text in __decode_chunks(chunks, decoder):
+        lines = (pending + text).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                batch.append(__parse_ndjson_line(line, line_number))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+
+    if pending.strip():
+        batch.append(__parse_ndjson_line(pending, line_number + 1))
+    if batch:
+        yield batch
+
+
+async def iter_json_array_batches(chunks: AsyncIterable[bytes], batch_size: int) -> AsyncIterator[list[Any]]:
+    """
+    Parses a JSON array body incrementally, yielding its elements in fixed-size batches
+    while the body is still arriving, so the whole array never has to be held in memory.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The raw body, for example `request.stream()`.
+        batch_size (int): Maximum number of elements per yielded batch.
+
+    Yields:
+        list: Up to `batch_size` array elements.
+
+    Raises:
+        MalformedPayloadError: If the body is not a well-formed JSON array.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parser = JsonArrayParser()
+    batch = []
+    async for text in __decode_chunks(chunks, decoder):
+        for item in parser.feed(text):
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    parser.close()
+    if batch:
+        yield batch
+
+
+async def __decode_chunks(chunks: AsyncIterable[bytes], decoder) -> AsyncIterator[str]:
+    """
+    Incrementally decodes byte chunks, so multi-byte characters split across chunks are preserved.
+    """
+    try:
+        async for data in chunks:
+            if data:
+                yield decoder.decode(data)
+        yield decoder.decode(b"", final=True)
+    except UnicodeDecodeError as error:
+        raise MalformedPayloadError(f"Body is not valid UTF-8: {error}") from error
+
+
+def __parse_ndjson_line(line: str, line_number: int) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as error:
+        raise MalformedPayloadError(f"Invalid JSON on line {line_number}: {error}") from error
+
+
+class JsonArrayParser:
+    """
+    Push parser extracting the elements of a top-level JSON array from text fed in pieces.
+    Each element is decoded as soon as it is complete; only the current, incomplete
+    element is buffered.
+    """
+    __WHITESPACE = " \t\n\r"
+
+    def __init__(self, max_element_size: int = JSON_MAX_ELEMENT_SIZE):
+        """
+        Args:
+            max_element_size (int): Largest number of characters buffered for a single element
+                                    before the payload is considered malformed.
+        """
+        self.__decoder = json.JSONDecoder()
+        self.__max_element_size = max_element_size
+        self.__buffer = ""
+        self.__state = "start"
+
+    def feed(self, text: str) -> list[Any]:
+        """
+        Adds text to the parser.
+
+        Returns:
+            list: The elements completed by this piece of text.
+
+        Raises:
+            MalformedPayloadError: If the text cannot belong to a JSON array.
+        """
+        buffer = self.__buffer + text
+        position = 0
+        items = []
+        while True:
+            while position < len(buffer) and buffer[position] in self.__WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+
+            char = buffer[position]
+            if self.__state == "start":
+                self.__expect(char, "[")
+                self.__state = "first_value"
+                position += 1
+            elif self.__state in ("first_value", "separator") and char == "]":
+                self.__state = "end"
+                position += 1
+            elif self.__state == "separator":
+                self.__expect(char, ",")
+                self.__state = "value"
+                position += 1
+            elif self.__state == "end":
+                raise MalformedPayloadError("Unexpected data after the end of the JSON array")
+            else:
+                try:
+                    item, end = self.__decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    end = None
+                # A value ending exactly at the buffer end may be a truncated number; wait for more text
+                if end is None or end == len(buffer):
+                    if len(buffer) - position > self.__max_element_size:
+                        raise MalformedPayloadError("JSON array element is malformed or too large")
+                    break
+                items.append(item)
+                self.__state = "separator"
+                position = end
+
+        self.__buffer = buffer[position:]
+        return items
+
+    def close(self):
+        """
+        Signals the end of the text.
+
+        Raises:
+            MalformedPayloadError: If the array was not closed.
+        """
+        if self.__state != "end":
+            raise MalformedPayloadError("Body is not a complete JSON array")
+
+    @staticmethod
+    def __expect(char: str, expected: str):
+        if char != expected:
+            raise MalformedPayloadError(f"Expected '{expected}' in JSON array but found '{char}'")
+
+
+class IteratorReader(TextIOBase):
+    """
+    Read-only text file over an iterable of string chunks, consumed lazily.
+    Lets APIs that expect a file object (like psycopg2 `copy_expert`) stream
+    generated data without materializing it.
+    """
+
+    def __init__(self, chunks: Iterable[str]):
+        self.__chunks = iter(chunks)
+        self.__buffer = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        """
+        Reads up to `size` characters, or everything left if size is negative.
+        """
+        while size < 0 or len(self.__buffer) < size:
+            chunk = next(self.__chunks, None)
+            if chunk is None:
+                break
+            self.__buffer += chunk
+
+        if size < 0:
+            data, self.__buffer = self.__buffer, ""
+        else:
+            data, self.__buffer = self.__buffer[:size], self.__buffer[size:]
+        return data
+
+
+async def spool_to_file(chunks: AsyncIterable[bytes], directory: str, suffix: str = "") -> str:
+    """
+    Writes a streamed body to a new file, chunk by chunk, so it can be processed later.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The body, as raw byte chunks.
+        directory (str): Directory of the new file, created if needed.
+        suffix (str): File name suffix, such as an extension.
+
+    Returns:
+        str: Path of the written file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4()}{suffix}")
+    with open(path, "wb") as file:
+        async for chunk in chunks:
+            file.write(chunk)
+    return path
+
+
+class AsyncFileReader:
+    """
+    Minimal asynchronous reader over a local binary file, offering the `read(size)` coroutine
+    `iter_csv_batches` expects from an UploadFile and async iteration over chunks for the JSON
+    parsers. Reads block, so it is meant for worker threads re-parsing a spooled upload.
+    """
+
+    def __init__(self, path: str, chunk_size: int = CSV_READ_CHUNK_SIZE):
+        self.__path = path
+        self.__chunk_size = chunk_size
+        self.__file = None
+
+    def __enter__(self) -> "AsyncFileReader":
+        self.__file = open(self.__path, "rb")
+        return self
+
+    def __exit__(self, *exc_info):
+        self.__file.close()
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.__file.read(size)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while chunk := self.__file.read(self.__chunk_size):
+            yield chunk
@@ -0,0 +1,77 @@
+import hashlib
+import json
+from typing import Any
+
+
+def canonical_json(value: Any) -> str:
+    """
+    Serializes a value to JSON in a canonical form: sorted keys and no insignificant
+    whitespace, so equal values always produce the same string.
+
+    Keys that are not strings are sorted by their JSON form, as the None key `csv.DictReader`
+    gives the values of a row beyond its header, which json.dumps stores as "null".
+
+    Args:
+        value (Any): JSON-serializable value. Other types are serialized with str().
+
+    Returns:
+        str: The canonical JSON representation.
+    """
+    try:
+        return _dumps(value)
+    except TypeError:
+        return _dumps(_with_json_keys(value))
+
+
+def json_key(key: Any) -> Any:
+    """
+    Converts a dictionary key to the string json.dumps writes for it.
+
+    Args:
+        key (Any): A dictionary key.
+
+    Returns:
+        Any: The JSON key for None, booleans and numbers, the key itself otherwise.
+    """
+    if key is None or isinstance(key, (bool, int, float)):
+        return json.dumps(key)
+    return key
+
+
+def fingerprint(value: Any) -> str:
+    """
+    Computes a stable SHA-256 fingerprint of a value from its canonical JSON form.
+
+    Args:
+        value (Any): JSON-serializable value.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest.
+    """
+    return sha256_hex(canonical_json(value))
+
+
+def sha256_hex(text: str) -> str:
+    """
+    Computes the SHA-256 digest of a string, for callers that already hold its canonical JSON form.
+
+    Args:
+        text (str): Text to hash, encoded as UTF-8.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _with_json_keys(value: Any) -> Any:
+    """Copies dictionaries and lists, with keys that are not strings converted by json_key."""
+    if isinstance(value, dict):
+        return {json_key(key): _with_json_keys(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_with_json_keys(item) for item in value]
+    return value
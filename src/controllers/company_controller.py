@@ -1,24 +1,33 @@
-from typing import Optional, List
+from datetime import date
+from typing import Any, Optional, List, Union
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Body
 from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
 
-from src.core.context import get_company_service
+from src.commons.config import IMPORT_BATCH_SIZE, COMPANIES_PAGE_SIZE, COMPANIES_MAX_PAGE_SIZE
+from src.commons.file_utils import iter_ndjson_batches, iter_json_array_batches, MalformedPayloadError
+from src.core.context import get_async_company_service, get_async_company_service_session, \
+    get_async_rule_set_service
 from src.core.database.logger import get_logger
 from src.models.companies_response import CompaniesResponse
 from src.models.import_response import ImportSummary
-from src.models.rules import Rule
+from src.models.process_response import ProcessResponse
+from src.models.rules import Rule, ExecutionMode
 
 router = APIRouter(prefix='/v1/company', tags=['Company'])
+router_v2 = APIRouter(prefix='/v2/company', tags=['Company'])
 logger = get_logger(__name__)
 
 @router.post('/import-company-data', response_model=ImportSummary)
 async def import_company_data(
         request: Request,
         file: Optional[UploadFile] = File(None),
-        company_service=Depends(get_company_service)):
+        company_service=Depends(get_async_company_service)):
     """
-    Endpoint to import company data from an uploaded CSV file or json data.
+    Endpoint to import company data from an uploaded CSV file, a JSON array
+    or newline-delimited JSON (application/x-ndjson). JSON bodies are parsed
+    and saved in batches while they are still being received.
 
     Args:
         request (Request): The incoming HTTP request with json data.
@@ -30,11 +39,13 @@ async def import_company_data(
     """
     content_type = request.headers.get("content-type", "")
 
-    if "application/json" in content_type:
+    if "application/x-ndjson" in content_type:
+        logger.debug("Processing NDJSON import data")
+        return await __import_stream(company_service, iter_ndjson_batches(request.stream(), IMPORT_BATCH_SIZE))
+
+    elif "application/json" in content_type:
         logger.debug("Processing JSON import data")
-        data = await request.json()
-        response = company_service.import_data(data)
-        return response
+        return await __import_stream(company_service, iter_json_array_batches(request.stream(), IMPORT_BATCH_SIZE))
 
     elif "multipart/form-data" in content_type:
         logger.debug("Processing multipart/form-data import")
@@ -47,36 +58,145 @@ async def import_company_data(
         raise HTTPException(status_code=415, detail="Unsupported Media Type")
 
 
-@router.post('/process-company')
-async def process_company(urls: List[str], rules: List[Rule], company_service=Depends(get_company_service)):
+@router.post('/process-company', response_model=List[dict[str, Any]])
+async def process_company(response: Response, urls: List[str], rules: Optional[List[Rule]] = Body(None),
+                          rule_set_id: Optional[Union[int, str]] = Body(None),
+                          execution: ExecutionMode = ExecutionMode.PYTHON, as_of: Optional[date] = None,
+                          company_service=Depends(get_async_company_service),
+                          rule_set_service=Depends(get_async_rule_set_service)):
     """
     Endpoint to process company data based on provided URLs and rules.
 
+    Answers 207 instead of 200 when some companies could not be saved. The X-Failed-Count and
+    X-Recomputed-Count headers give the number of companies not saved and of companies whose rules
+    were evaluated by the request; /v2/company/process-company reports their URLs.
+
+    Args:
+        response (Response): The outgoing response, carrying the status and headers.
+        urls (List[str]): A list of URLs to process.
+        rules (Optional[List[Rule]]): A list of rules to apply during processing.
+        rule_set_id (Optional[Union[int, str]]): Id or fingerprint of a registered rule set to apply
+                                                 instead of `rules`, see /v1/rule-sets.
+        execution (ExecutionMode): Query parameter choosing whether the rules run in the
+                                   application (default) or inside PostgreSQL.
+        as_of (Optional[date]): Query parameter fixing the date features like company_age are
+                                computed for, to backfill or reproduce a run. Defaults to today.
+        company_service: Dependency-injected service for handling company-related logic.
+        rule_set_service: Dependency-injected service resolving registered rule sets.
+
+    Returns:
+        List[dict[str, Any]]: The processed variables of each saved company.
+    """
+    processed = await __process(urls, rules, rule_set_id, execution, as_of, company_service, rule_set_service)
+    if processed.failures:
+        response.status_code = 207
+    response.headers["X-Failed-Count"] = str(len(processed.failures))
+    response.headers["X-Recomputed-Count"] = str(len(processed.recomputed))
+    return processed.companies
+
+
+@router_v2.post('/process-company', response_model=ProcessResponse)
+async def process_company_v2(urls: List[str], rules: Optional[List[Rule]] = Body(None),
+                             rule_set_id: Optional[Union[int, str]] = Body(None),
+                             execution: ExecutionMode = ExecutionMode.PYTHON, as_of: Optional[date] = None,
+                             company_service=Depends(get_async_company_service),
+                             rule_set_service=Depends(get_async_rule_set_service)):
+    """
+    Endpoint to process company data like /v1/company/process-company, reporting which
+    companies could not be saved and which ones were recomputed.
+
     Args:
         urls (List[str]): A list of URLs to process.
-        rules (List[Rule]): A list of rules to apply during processing.
+        rules (Optional[List[Rule]]): A list of rules to apply during processing.
+        rule_set_id (Optional[Union[int, str]]): Id or fingerprint of a registered rule set to apply
+                                                 instead of `rules`, see /v1/rule-sets.
+        execution (ExecutionMode): Query parameter choosing whether the rules run in the
+                                   application (default) or inside PostgreSQL.
+        as_of (Optional[date]): Query parameter fixing the date features like company_age are
+                                computed for. Defaults to today.
         company_service: Dependency-injected service for handling company-related logic.
+        rule_set_service: Dependency-injected service resolving registered rule sets.
 
     Returns:
-        response: The result of the company processing operation.
+        ProcessResponse: The processed companies and the ones that could not be saved.
     """
-    logger.info(f"Processing companies")
-    return company_service.process_company(urls, rules)
+    return await __process(urls, rules, rule_set_id, execution, as_of, company_service, rule_set_service)
 
 
 @router.get('/get-companies', response_model=CompaniesResponse)
-async def get_companies(company_service=Depends(get_company_service)):
+async def get_companies(limit: Optional[int] = Query(None, ge=1, le=COMPANIES_MAX_PAGE_SIZE),
+                        after: Optional[str] = None,
+                        company_service_session=Depends(get_async_company_service_session)):
     """
-    Endpoint to retrieve a list of previously processed companies.
+    Endpoint to retrieve previously processed companies.
+
+    Without `limit` or `after`, every company of the latest run is returned, streamed from
+    the database through a server-side cursor so memory stays flat regardless of the run size.
+    Otherwise a single page ordered by URL is returned, of COMPANIES_PAGE_SIZE companies by default.
 
     Args:
-        company_service: Dependency-injected service for handling company-related logic.
+        limit (Optional[int]): Maximum number of companies in the page.
+        after (Optional[str]): The `next_cursor` returned with the previous page.
+        company_service_session: Dependency-injected factory of company service sessions.
 
     Returns:
-        CompaniesResponse: A response containing the list of processed companies.
+        CompaniesResponse: A response containing the processed companies and, when paginated, the next cursor.
     """
     logger.info("Fetching previously processed companies")
-    return company_service.get_companies_previously_processed()
+    if limit is None and after is None:
+        async def body():
+            async with company_service_session() as company_service:
+                async for chunk in company_service.stream_companies_response():
+                    yield chunk
+
+        return StreamingResponse(body(), media_type="application/json")
+
+    async with company_service_session() as company_service:
+        return await company_service.get_companies_previously_processed(limit or COMPANIES_PAGE_SIZE, after)
+
+
+@router.get('/get-companies/stream')
+async def stream_companies(company_service_session=Depends(get_async_company_service_session)):
+    """
+    Endpoint streaming every previously processed company as newline-delimited JSON,
+    read from the database through a server-side cursor.
+
+    Args:
+        company_service_session: Dependency-injected factory of company service sessions.
+
+    Returns:
+        StreamingResponse: One processed company per line (application/x-ndjson).
+    """
+    logger.info("Streaming previously processed companies")
+
+    async def body():
+        async with company_service_session() as company_service:
+            async for chunk in company_service.stream_companies_previously_processed():
+                yield chunk
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+async def __process(urls, rules, rule_set_id, execution, as_of, company_service,
+                    rule_set_service) -> ProcessResponse:
+    """Process companies with the given rules or registered rule set."""
+    logger.info("Processing companies")
+    if (rules is None) == (rule_set_id is None):
+        raise HTTPException(status_code=400, detail="Either rules or rule_set_id is required")
+    if rule_set_id is not None:
+        rules = await rule_set_service.get_plan(rule_set_id)
+        if rules is None:
+            raise HTTPException(status_code=404, detail="Rule set not found")
+    return await company_service.process_company(urls, rules, execution, as_of=as_of)
+
+
+async def __import_stream(company_service, batches) -> ImportSummary:
+    """Import streamed batches, reporting a malformed body as a client error."""
+    try:
+        return await company_service.import_batches(batches)
+    except MalformedPayloadError as error:
+        logger.error(f"Malformed import payload: {error}")
+        raise HTTPException(status_code=400, detail=str(error))
 
 
 def __validate_file(file: Optional[UploadFile]) -> UploadFile:
@@ -1,10 +1,11 @@
 from datetime import datetime
 
 from fastapi import APIRouter
-from psycopg2 import OperationalError
+from psycopg import OperationalError
+from psycopg_pool import PoolTimeout
 from starlette.responses import JSONResponse
 
-from src.core.context import get_database
+from src.core.context import async_database_session, get_company_cache, get_rule_set_plan_cache
 
 router = APIRouter(prefix='', tags=['Health and Status'])
 
@@ -23,24 +24,30 @@ async def health():
 @router.get("/status", summary="Detailed status check")
 async def status():
     """
-    Performs a detailed status check including database connectivity.
+    Performs a detailed status check including database connectivity, and the metrics
+    of the company and rule set plan caches of the worker answering when they are enabled.
 
     Returns:
         JSONResponse: A JSON response indicating the health of dependencies
                       and current timestamp. Returns 503 if the database is unreachable.
     """
     try:
-        db = get_database()
-        db.execute("SELECT 1")
-    except OperationalError:
+        async with async_database_session() as db:
+            await db.fetch_one("SELECT 1")
+    except (OperationalError, PoolTimeout):
         return JSONResponse(content={"database": "unreachable"}, status_code=503)
 
-    return JSONResponse(
-        content={
-            "status": "ok",
-            "timestamp": datetime.now().__str__(),
-            "dependencies": {
-                "database": "ok"
-            }
+    content = {
+        "status": "ok",
+        "timestamp": datetime.now().__str__(),
+        "dependencies": {
+            "database": "ok"
         }
-    )
+    }
+    company_cache = get_company_cache()
+    if company_cache is not None:
+        content["company_cache"] = company_cache.metrics()
+    rule_set_plan_cache = get_rule_set_plan_cache()
+    if rule_set_plan_cache is not None:
+        content["rule_set_plan_cache"] = rule_set_plan_cache.metrics()
+    return JSONResponse(content=content)
@@ -0,0 +1,145 @@
+import os
+from datetime import date
+from typing import Optional, List, Union
+
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Body
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from src.commons.config import JOB_SPOOL_DIR, CSV_READ_CHUNK_SIZE
+from src.commons.file_utils import spool_to_file
+from src.core.context import get_job_service, get_rule_set_service
+from src.core.database.logger import get_logger
+from src.models.job import Job, ImportFormat
+from src.models.rules import Rule, ExecutionMode
+from src.services.job_service import JobQueueFullError, JobNotFinishedError
+
+router = APIRouter(prefix='/v1/jobs', tags=['Jobs'])
+logger = get_logger(__name__)
+
+
+@router.post('/import-company-data', response_model=Job, status_code=202)
+async def submit_import_company_data(
+        request: Request,
+        file: Optional[UploadFile] = File(None),
+        job_service=Depends(get_job_service)):
+    """
+    Endpoint to submit a background import. Accepts the same bodies as
+    /v1/company/import-company-data, spools them to disk and returns right away.
+
+    Args:
+        request (Request): The incoming HTTP request with json data.
+        file (Optional[UploadFile]): The uploaded CSV file containing company data.
+        job_service: Dependency-injected service running background jobs.
+
+    Returns:
+        Job: The queued job.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "application/x-ndjson" in content_type:
+        import_format, chunks = ImportFormat.NDJSON, request.stream()
+    elif "application/json" in content_type:
+        import_format, chunks = ImportFormat.JSON, request.stream()
+    elif "multipart/form-data" in content_type:
+        if not file:
+            logger.error("File upload attempted without file present")
+            raise HTTPException(status_code=400, detail="File is required for multipart upload")
+        import_format, chunks = ImportFormat.CSV, __iter_upload(file)
+    else:
+        logger.error(f"Unsupported Media Type: {content_type}")
+        raise HTTPException(status_code=415, detail="Unsupported Media Type")
+
+    path = await spool_to_file(chunks, JOB_SPOOL_DIR, f".{import_format.value}")
+    logger.info(f"Submitting {import_format.value} import job")
+    try:
+        return await run_in_threadpool(__submit, job_service.submit_import, path, import_format)
+    except HTTPException:
+        os.remove(path)
+        raise
+
+
+@router.post('/process-company', response_model=Job, status_code=202)
+def submit_process_company(urls: List[str], rules: Optional[List[Rule]] = Body(None),
+                           rule_set_id: Optional[Union[int, str]] = Body(None),
+                           execution: ExecutionMode = ExecutionMode.PYTHON, as_of: Optional[date] = None,
+                           job_service=Depends(get_job_service), rule_set_service=Depends(get_rule_set_service)):
+    """
+    Endpoint to submit a background processing run. Accepts the same body as /v1/company/process-company.
+
+    Args:
+        urls (List[str]): A list of URLs to process.
+        rules (Optional[List[Rule]]): A list of rules to apply during processing.
+        rule_set_id (Optional[Union[int, str]]): Id or fingerprint of a registered rule set to apply instead.
+        execution (ExecutionMode): Whether the rules run in the application or inside PostgreSQL.
+        as_of (Optional[date]): Query parameter fixing the date features like company_age are
+                                computed for, for the whole job. Defaults to the day of the submission.
+        job_service: Dependency-injected service running background jobs.
+        rule_set_service: Dependency-injected service resolving registered rule sets.
+
+    Returns:
+        Job: The queued job.
+    """
+    logger.info(f"Submitting process job for {len(urls)} companies")
+    if (rules is None) == (rule_set_id is None):
+        raise HTTPException(status_code=400, detail="Either rules or rule_set_id is required")
+    if rule_set_id is not None:
+        rules = rule_set_service.get_plan(rule_set_id)
+        if rules is None:
+            raise HTTPException(status_code=404, detail="Rule set not found")
+    return __submit(job_service.submit_process, urls, rules, execution, as_of)
+
+
+@router.get('/{job_id}', response_model=Job)
+def get_job(job_id: str, job_service=Depends(get_job_service)):
+    """
+    Endpoint to follow a job: status, rows done / total, throughput and ETA.
+
+    Args:
+        job_id (str): The job identifier.
+        job_service: Dependency-injected service running background jobs.
+
+    Returns:
+        Job: The job and its progress.
+    """
+    job = job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get('/{job_id}/result')
+def get_job_result(job_id: str, job_service=Depends(get_job_service)):
+    """
+    Endpoint to retrieve the result of a completed job: an ImportSummary for imports,
+    a ProcessResponse for processing runs.
+
+    Args:
+        job_id (str): The job identifier.
+        job_service: Dependency-injected service running background jobs.
+
+    Returns:
+        ImportSummary or ProcessResponse: The job result.
+    """
+    try:
+        result = job_service.get_result(job_id)
+    except JobNotFinishedError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return result
+
+
+def __submit(submit, *args) -> Job:
+    """Submit a job, reporting a full queue as a retryable client error."""
+    try:
+        return submit(*args)
+    except JobQueueFullError as error:
+        logger.error(f"Job rejected: {error}")
+        raise HTTPException(status_code=429, detail=str(error), headers={"Retry-After": "60"})
+
+
+async def __iter_upload(file: UploadFile):
+    """Read an uploaded file in chunks."""
+    while chunk := await file.read(CSV_READ_CHUNK_SIZE):
+        yield chunk
@@ -0,0 +1,47 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from src.core.context import get_async_rule_set_service
+from src.core.database.logger import get_logger
+from src.models.rule_set import RuleSet
+from src.models.rules import Rule
+
+router = APIRouter(prefix='/v1/rule-sets', tags=['Rule sets'])
+logger = get_logger(__name__)
+
+
+@router.post('', response_model=RuleSet, response_model_exclude={"rules"})
+async def register_rule_set(rules: List[Rule], rule_set_service=Depends(get_async_rule_set_service)):
+    """
+    Endpoint to register a rule set once, so processing requests can name it by id or fingerprint
+    instead of sending and validating its rules every time. Registering equal rules again returns
+    the rule set already registered.
+
+    Args:
+        rules (List[Rule]): The rules of the set, in evaluation order.
+        rule_set_service: Dependency-injected service handling rule sets.
+
+    Returns:
+        RuleSet: The registered rule set, without its rules.
+    """
+    logger.info(f"Registering rule set of {len(rules)} rules")
+    return await rule_set_service.register(rules)
+
+
+@router.get('/{reference}', response_model=RuleSet)
+async def get_rule_set(reference: str, rule_set_service=Depends(get_async_rule_set_service)):
+    """
+    Endpoint to retrieve a registered rule set with its rules.
+
+    Args:
+        reference (str): Id of the rule set, or its fingerprint.
+        rule_set_service: Dependency-injected service handling rule sets.
+
+    Returns:
+        RuleSet: The rule set.
+    """
+    rule_set = await rule_set_service.get(reference)
+    if rule_set is None:
+        raise HTTPException(status_code=404, detail="Rule set not found")
+    return rule_set
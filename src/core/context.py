@@ -1,27 +1,304 @@
-from src.commons.config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, asynccontextmanager
+from typing import Iterator, Optional, AsyncIterator, Callable, AsyncContextManager
+
+from fastapi import Depends
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+from src.commons.config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DB_POOL_MIN_SIZE, \
+    DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_CHECK_ON_BORROW, PROCESS_POOL_WORKERS, COMPANY_CACHE_MAX_ENTRIES, \
+    COMPANY_CACHE_MAX_BYTES, COMPANY_CACHE_TTL, COMPANY_CACHE_LISTEN_RETRY_INTERVAL, RULE_SET_PLAN_CACHE_SIZE
+from src.core.database.async_database import AsyncDatabase
 from src.core.database.database import Database
+from src.core.database.listener import NotificationListener
+from src.core.database.pool import DatabasePool
+from src.core.database.schema import COMPANY_DATA_CHANGED_CHANNEL
+from src.repositories.async_company_repository import AsyncCompanyRepository
+from src.repositories.company_cache import CompanyCache
 from src.repositories.company_repository import CompanyRepository
+from src.repositories.async_rule_set_repository import AsyncRuleSetRepository
+from src.repositories.rule_set_repository import RuleSetRepository
+from src.services.async_company_service import AsyncCompanyService
 from src.services.company_service import CompanyService
+from src.services.async_rule_set_service import AsyncRuleSetService
+from src.services.job_service import JobService
+from src.services.rule_set_service import RuleSetPlanCache, RuleSetService
+
+_database_pool: Optional[DatabasePool] = None
+_async_database_pool: Optional[AsyncConnectionPool] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_job_service: Optional[JobService] = None
+_company_cache: Optional[CompanyCache] = None
+_company_cache_listener: Optional[NotificationListener] = None
+_rule_set_plan_cache: Optional[RuleSetPlanCache] = None
+
+
+def open_database_pool() -> DatabasePool:
+    """
+    Creates the application-wide connection pool using configuration parameters.
+    Meant to be called once from the application startup hook.
+
+    Returns:
+        DatabasePool: The opened pool.
+    """
+    global _database_pool
+    if _database_pool is None or _database_pool.closed:
+        _database_pool = DatabasePool(min_size=DB_POOL_MIN_SIZE,
+                                      max_size=DB_POOL_MAX_SIZE,
+                                      timeout=DB_POOL_TIMEOUT,
+                                      check_on_borrow=DB_POOL_CHECK_ON_BORROW,
+                                      host=DB_HOST,
+                                      port=DB_PORT,
+                                      dbname=DB_NAME,
+                                      user=DB_USER,
+                                      password=DB_PASSWORD)
+        _database_pool.open()
+    return _database_pool
+
+
+def close_database_pool():
+    """
+    Closes the application-wide connection pool. Meant to be called from the shutdown hook.
+    """
+    global _database_pool
+    if _database_pool is not None:
+        _database_pool.close()
+        _database_pool = None
+
+
+@contextmanager
+def database_session() -> Iterator[Database]:
+    """
+    Borrows a connection from the shared pool and wraps it in a Database instance.
+    The connection is returned to the pool when the context exits.
+
+    Yields:
+        Database: A Database object bound to a pooled connection.
+    """
+    pool = _database_pool if _database_pool is not None else open_database_pool()
+    with pool.connection() as connection:
+        yield Database(connection)
+
+
+def get_database() -> Iterator[Database]:
+    """
+    FastAPI dependency that provides a pooled Database for the duration of a request.
+
+    Yields:
+        Database: A Database object bound to a pooled connection.
+    """
+    with database_session() as db:
+        yield db
+
+
+async def open_async_database_pool() -> AsyncConnectionPool:
+    """
+    Creates the application-wide asynchronous connection pool used by the HTTP handlers.
+    Meant to be called once from the application startup hook.
+
+    Returns:
+        AsyncConnectionPool: The opened pool.
+    """
+    global _async_database_pool
+    if _async_database_pool is None or _async_database_pool.closed:
+        conninfo = make_conninfo(host=DB_HOST, port=DB_PORT, dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD)
+        _async_database_pool = AsyncConnectionPool(
+            conninfo,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            timeout=DB_POOL_TIMEOUT,
+            check=AsyncConnectionPool.check_connection if DB_POOL_CHECK_ON_BORROW else None,
+            open=False)
+        await _async_database_pool.open(wait=True, timeout=DB_POOL_TIMEOUT)
+    return _async_database_pool
+
+
+async def close_async_database_pool():
+    """
+    Closes the application-wide asynchronous connection pool. Meant to be called from the shutdown hook.
+    """
+    global _async_database_pool
+    if _async_database_pool is not None:
+        await _async_database_pool.close()
+        _async_database_pool = None
+
+
+@asynccontextmanager
+async def async_database_session() -> AsyncIterator[AsyncDatabase]:
+    """
+    Borrows a connection from the shared asynchronous pool and wraps it in an AsyncDatabase.
+    The connection is returned to the pool when the context exits.
+
+    Yields:
+        AsyncDatabase: An AsyncDatabase object bound to a pooled connection.
+    """
+    pool = _async_database_pool if _async_database_pool is not None else await open_async_database_pool()
+    async with pool.connection() as connection:
+        yield AsyncDatabase(connection)
+
+
+async def get_async_database() -> AsyncIterator[AsyncDatabase]:
+    """
+    FastAPI dependency that provides a pooled AsyncDatabase for the duration of a request.
+
+    Yields:
+        AsyncDatabase: An AsyncDatabase object bound to a pooled connection.
+    """
+    async with async_database_session() as db:
+        yield db
+
+
+def open_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Starts the application-wide pool of PROCESS_POOL_WORKERS processes used to evaluate
+    rules of large batches in parallel. Meant to be called once from the application startup hook.
+    Workers are spawned rather than forked, so they never inherit the server's threads or connections.
+
+    Returns:
+        ProcessPoolExecutor or None: The pool, or None when PROCESS_POOL_WORKERS is 0.
+    """
+    global _process_pool
+    if _process_pool is None and PROCESS_POOL_WORKERS > 0:
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+
+def close_process_pool():
+    """
+    Shuts the process pool down, cancelling pending chunks. Meant to be called from the shutdown hook.
+    """
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the process pool opened at startup, or None when it is not running,
+    in which case rules are evaluated inline.
+
+    Returns:
+        ProcessPoolExecutor or None: The application-wide process pool.
+    """
+    return _process_pool
+
+
+def open_company_cache() -> Optional[CompanyCache]:
+    """
+    Creates the cache of company rows shared by the repositories of this worker, and starts listening
+    to the changes made by the other workers. The cache only serves rows while the listener is connected.
+    Meant to be called once from the application startup hook.
+
+    Returns:
+        CompanyCache or None: The cache, or None when COMPANY_CACHE_MAX_ENTRIES is 0.
+    """
+    global _company_cache, _company_cache_listener
+    if _company_cache is None and COMPANY_CACHE_MAX_ENTRIES > 0:
+        _company_cache = CompanyCache(max_entries=COMPANY_CACHE_MAX_ENTRIES,
+                                      max_bytes=COMPANY_CACHE_MAX_BYTES,
+                                      ttl=COMPANY_CACHE_TTL)
+        _company_cache.suspend()
+        _company_cache_listener = NotificationListener(COMPANY_DATA_CHANGED_CHANNEL,
+                                                       on_notification=_company_cache.on_notification,
+                                                       on_connect=_company_cache.resume,
+                                                       on_disconnect=_company_cache.suspend,
+                                                       retry_interval=COMPANY_CACHE_LISTEN_RETRY_INTERVAL,
+                                                       host=DB_HOST,
+                                                       port=DB_PORT,
+                                                       dbname=DB_NAME,
+                                                       user=DB_USER,
+                                                       password=DB_PASSWORD)
+        _company_cache_listener.start()
+    return _company_cache
 
 
-def get_database():
+def close_company_cache():
     """
-    Creates and returns a connected Database instance
-    using configuration parameters for the connection.
+    Stops listening to changes and drops the cache. Meant to be called from the shutdown hook.
+    """
+    global _company_cache, _company_cache_listener
+    if _company_cache_listener is not None:
+        _company_cache_listener.stop()
+        _company_cache_listener = None
+    _company_cache = None
+
+
+def get_company_cache() -> Optional[CompanyCache]:
+    """
+    Returns the cache of company rows opened at startup, or None when it is not running,
+    in which case repositories read every company from the database.
 
     Returns:
-        Database: A connected Database object.
+        CompanyCache or None: The cache of this worker.
     """
-    db = Database()
-    db.connect(host=DB_HOST,
-               port=DB_PORT,
-               dbname=DB_NAME,
-               user=DB_USER,
-               password=DB_PASSWORD)
-    return db
+    return _company_cache
+
 
+def get_rule_set_plan_cache() -> Optional[RuleSetPlanCache]:
+    """
+    Returns the cache of rule set plans shared by the services of this worker, created on first use.
+
+    Returns:
+        RuleSetPlanCache or None: The cache, or None when RULE_SET_PLAN_CACHE_SIZE is 0.
+    """
+    global _rule_set_plan_cache
+    if _rule_set_plan_cache is None and RULE_SET_PLAN_CACHE_SIZE > 0:
+        _rule_set_plan_cache = RuleSetPlanCache(max_entries=RULE_SET_PLAN_CACHE_SIZE)
+    return _rule_set_plan_cache
 
-def get_company_service() -> CompanyService:
+
+def start_job_service() -> JobService:
+    """
+    Starts the background job workers, resuming the jobs left unfinished by a previous run.
+    Meant to be called from the application startup hook, after the database and process pools.
+
+    Returns:
+        JobService: The started service.
+    """
+    global _job_service
+    if _job_service is None:
+        _job_service = JobService(session_factory=database_session, process_pool=get_process_pool(),
+                                  company_cache=get_company_cache(), rule_set_plan_cache=get_rule_set_plan_cache())
+        _job_service.start()
+    return _job_service
+
+
+def stop_job_service():
+    """
+    Stops the background job workers after their current batch. Meant to be called from the shutdown hook.
+    """
+    global _job_service
+    if _job_service is not None:
+        _job_service.stop()
+        _job_service = None
+
+
+def get_job_service() -> JobService:
+    """
+    FastAPI dependency that provides the application-wide JobService.
+
+    Returns:
+        JobService: The started service.
+    """
+    return _job_service if _job_service is not None else start_job_service()
+
+
+def get_company_repository(db: Database = Depends(get_database)) -> CompanyRepository:
+    """
+    Creates and returns a CompanyRepository instance,
+    injecting a pooled Database instance.
+
+    Returns:
+        CompanyRepository: Repository object to handle database operations for companies.
+    """
+    return CompanyRepository(db=db, cache=get_company_cache())
+
+
+def get_company_service(company_repository: CompanyRepository = Depends(get_company_repository)) -> CompanyService:
     """
     Creates and returns an instance of CompanyService,
     injecting the CompanyRepository dependency.
@@ -29,15 +306,74 @@ def get_company_service() -> CompanyService:
     Returns:
         CompanyService: Service object to handle company-related business logic.
     """
-    return CompanyService(company_repository=get_company_repository())
+    return CompanyService(company_repository=company_repository, process_pool=get_process_pool())
 
 
-def get_company_repository():
+def get_rule_set_service(db: Database = Depends(get_database)) -> RuleSetService:
     """
-    Creates and returns a CompanyRepository instance,
-    injecting a connected Database instance.
+    Creates and returns an instance of RuleSetService, injecting a RuleSetRepository
+    and the rule set plan cache of the worker.
 
     Returns:
-        CompanyRepository: Repository object to handle database operations for companies.
+        RuleSetService: Service object to register rule sets and resolve their plans.
+    """
+    return RuleSetService(rule_set_repository=RuleSetRepository(db=db), plan_cache=get_rule_set_plan_cache())
+
+
+def get_async_rule_set_service(db: AsyncDatabase = Depends(get_async_database)) -> AsyncRuleSetService:
+    """
+    Creates and returns an instance of AsyncRuleSetService, injecting an AsyncRuleSetRepository
+    and the rule set plan cache of the worker.
+
+    Returns:
+        AsyncRuleSetService: Service object to register rule sets and resolve their plans without blocking.
+    """
+    return AsyncRuleSetService(rule_set_repository=AsyncRuleSetRepository(db=db),
+                               plan_cache=get_rule_set_plan_cache())
+
+
+def get_async_company_repository(db: AsyncDatabase = Depends(get_async_database)) -> AsyncCompanyRepository:
+    """
+    Creates and returns an AsyncCompanyRepository instance,
+    injecting a pooled AsyncDatabase instance.
+
+    Returns:
+        AsyncCompanyRepository: Repository object to handle asynchronous database operations for companies.
+    """
+    return AsyncCompanyRepository(db=db, cache=get_company_cache())
+
+
+def get_async_company_service(
+        company_repository: AsyncCompanyRepository = Depends(get_async_company_repository)) -> AsyncCompanyService:
+    """
+    Creates and returns an instance of AsyncCompanyService,
+    injecting the AsyncCompanyRepository dependency.
+
+    Returns:
+        AsyncCompanyService: Service object to handle company-related business logic without blocking the event loop.
+    """
+    return AsyncCompanyService(company_repository=company_repository, process_pool=get_process_pool())
+
+
+@asynccontextmanager
+async def async_company_service_session() -> AsyncIterator[AsyncCompanyService]:
+    """
+    Provides an AsyncCompanyService bound to its own pooled connection, for the duration of the block.
+
+    Yields:
+        AsyncCompanyService: Service object bound to a pooled connection.
+    """
+    async with async_database_session() as db:
+        yield AsyncCompanyService(company_repository=AsyncCompanyRepository(db=db, cache=get_company_cache()),
+                                  process_pool=get_process_pool())
+
+
+def get_async_company_service_session() -> Callable[[], AsyncContextManager[AsyncCompanyService]]:
+    """
+    FastAPI dependency for streaming responses. Dependencies with yield are closed before a
+    StreamingResponse body is sent, so the body opens its own session with the returned factory.
+
+    Returns:
+        Callable: Factory of AsyncCompanyService sessions.
     """
-    return CompanyRepository(db=get_database())
+    return async_company_service_session
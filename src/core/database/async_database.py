@@ -0,0 +1,128 @@
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterable, AsyncIterator
+
+from psycopg import AsyncConnection
+
+
+class AsyncDatabase:
+    """
+    Asynchronous counterpart of Database, wrapping a psycopg (v3) AsyncConnection
+    so queries can be awaited without blocking the event loop.
+    """
+
+    def __init__(self, connection: AsyncConnection):
+        """
+        Initializes the wrapper around an already open asynchronous connection,
+        usually one borrowed from an AsyncConnectionPool.
+
+        Args:
+            connection (AsyncConnection): An open psycopg asynchronous connection.
+        """
+        self.__connection = connection
+        self.__transaction_depth = 0
+
+    async def fetch_one(self, command, values=None):
+        """
+        Executes a query and fetches a single row from the result.
+
+        Args:
+            command (str): SQL query to execute.
+            values (tuple, optional): Parameters for the SQL query.
+
+        Returns:
+            tuple: The first row of the query result, or None if no rows.
+        """
+        async with self.__connection.cursor() as cursor:
+            await cursor.execute(command, values)
+            return await cursor.fetchone()
+
+    async def fetch_all(self, command, values=None):
+        """
+        Executes a query and fetches all rows from the result.
+
+        Args:
+            command (str): SQL query to execute.
+            values (tuple, optional): Parameters for the SQL query.
+
+        Returns:
+            list of tuples: All rows returned by the query.
+        """
+        async with self.__connection.cursor() as cursor:
+            await cursor.execute(command, values)
+            return await cursor.fetchall()
+
+    async def fetch_batches(self, command, values=None, batch_size: int = 1000) -> AsyncIterator[list[tuple]]:
+        """
+        Executes a query through a named server-side cursor and yields its rows in batches,
+        so arbitrarily large results are never held in memory at once.
+
+        Args:
+            command (str): SQL query to execute.
+            values (tuple, optional): Parameters for the SQL query.
+            batch_size (int): Number of rows fetched from the server per round trip.
+
+        Yields:
+            list of tuples: Up to `batch_size` rows of the query result.
+        """
+        async with self.transaction():
+            async with self.__connection.cursor(name=f"cursor_{uuid.uuid4().hex}") as cursor:
+                await cursor.execute(command, values)
+                while rows := await cursor.fetchmany(batch_size):
+                    yield rows
+
+    async def execute(self, command, values: tuple = None):
+        """
+        Executes a SQL command (INSERT, UPDATE, DELETE, etc.) and commits the transaction.
+
+        Args:
+            command (str): SQL command to execute.
+            values (tuple, optional): Parameters for the SQL command.
+
+        Returns:
+            int: Number of rows affected by the command.
+        """
+        async with self.__connection.cursor() as cursor:
+            await cursor.execute(command, values)
+            await self.commit()
+            return cursor.rowcount
+
+    async def copy_from(self, command, chunks: AsyncIterable[str]):
+        """
+        Streams data into the database with a COPY ... FROM STDIN command and commits the transaction.
+
+        Args:
+            command (str): COPY command to execute.
+            chunks (AsyncIterable[str]): Pieces of COPY-formatted data, consumed lazily.
+
+        Returns:
+            int: Number of rows copied.
+        """
+        async with self.__connection.cursor() as cursor:
+            async with cursor.copy(command) as copy:
+                async for chunk in chunks:
+                    await copy.write(chunk)
+            await self.commit()
+            return cursor.rowcount
+
+    async def commit(self):
+        """
+        Commits the current transaction to the database.
+        Inside a `transaction()` block the commit is deferred until the block exits.
+        """
+        if self.__transaction_depth == 0:
+            await self.__connection.commit()
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Groups every command executed in the block into a single transaction, committed
+        once on exit and rolled back if the block raises. Nested blocks use savepoints,
+        so a failing inner block can be rolled back without losing the outer work.
+        """
+        async with self.__connection.transaction():
+            self.__transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self.__transaction_depth -= 1
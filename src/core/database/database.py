@@ -1,14 +1,29 @@
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
 import psycopg2
 
-from src.core.database.schema import SCHEMA, SET_SCHEMA, COMPANY_DATA_TABLE
+from src.commons.file_utils import IteratorReader
 
 
 class Database:
     """
     A simple wrapper around a psycopg2 PostgreSQL connection to manage
-    database connection, schema/table creation, and query execution.
+    database connection and query execution. The schema is created by MigrationRunner.
     """
     __connection = None
+    __transaction_depth = 0
+
+    def __init__(self, connection=None):
+        """
+        Initializes the wrapper, optionally around an already open connection
+        (for example one borrowed from a DatabasePool).
+
+        Args:
+            connection (optional): An open psycopg2 connection.
+        """
+        self.__connection = connection
 
     def connect(self, host, port, dbname, user, password):
         """
@@ -31,26 +46,6 @@ class Database:
                 password=password
             )
 
-    def create_db(self):
-        """
-        Creates the database schema and tables by executing the respective SQL commands.
-        """
-        self.__create_schemas()
-        self.__create_tables()
-
-    def __create_schemas(self):
-        """
-        Executes the SQL commands to create the database schemas.
-        """
-        self.execute(SCHEMA)
-        self.execute(SET_SCHEMA)
-
-    def __create_tables(self):
-        """
-        Executes the SQL command to create the database tables.
-        """
-        self.execute(COMPANY_DATA_TABLE)
-
     def fetch_one(self, command, values=None):
         """
         Executes a query and fetches a single row from the result.
@@ -85,6 +80,26 @@ class Database:
         cursor.close()
         return result
 
+    def fetch_batches(self, command, values=None, batch_size: int = 1000) -> Iterator[list[tuple]]:
+        """
+        Executes a query through a named server-side cursor and yields its rows in batches,
+        so arbitrarily large results are never held in memory at once.
+
+        Args:
+            command (str): SQL query to execute.
+            values (tuple, optional): Parameters for the SQL query.
+            batch_size (int): Number of rows fetched from the server per round trip.
+
+        Yields:
+            list of tuples: Up to `batch_size` rows of the query result.
+        """
+        with self.transaction():
+            with self.__connection.cursor(name=f"cursor_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(command, values)
+                while rows := cursor.fetchmany(batch_size):
+                    yield rows
+
     def execute(self, command, values: tuple = None):
         """
         Executes a SQL command (INSERT, UPDATE, DELETE, etc.) and commits the transaction.
@@ -103,26 +118,74 @@ class Database:
         cursor.close()
         return rows_affected
 
-    def execute_insert_many(self, command, values: list[tuple]):
+    def copy_from(self, command, chunks: Iterable[str]):
         """
-        Executes a SQL command multiple times with different parameter sets (bulk insert).
+        Streams data into the database with a COPY ... FROM STDIN command and commits the transaction.
 
         Args:
-            command (str): SQL command to execute.
-            values (list of tuples): List of parameter tuples for each execution.
+            command (str): COPY command to execute.
+            chunks (Iterable[str]): Pieces of COPY-formatted data, consumed lazily.
 
         Returns:
-            int: Number of rows affected by the command.
+            int: Number of rows copied.
         """
         cursor = self.__connection.cursor()
-        cursor.executemany(command, values)
+        cursor.copy_expert(command, IteratorReader(chunks))
         self.commit()
-        rows_affected = cursor.rowcount
+        rows_copied = cursor.rowcount
         cursor.close()
-        return rows_affected
+        return rows_copied
 
     def commit(self):
         """
         Commits the current transaction to the database.
+        Inside a `transaction()` block the commit is deferred until the block exits.
+        """
+        if self.__transaction_depth == 0:
+            self.__connection.commit()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups every command executed in the block into a single transaction, committed
+        once on exit and rolled back if the block raises. Nested blocks use savepoints,
+        so a failing inner block can be rolled back without losing the outer work.
+        """
+        depth = self.__transaction_depth
+        savepoint = f"savepoint_{depth}"
+        if depth > 0:
+            self.__run(f"SAVEPOINT {savepoint}")
+        self.__transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__transaction_depth = depth
+            if depth > 0:
+                self.__run(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            else:
+                self.__connection.rollback()
+            raise
+        self.__transaction_depth = depth
+        if depth > 0:
+            self.__run(f"RELEASE SAVEPOINT {savepoint}")
+        else:
+            self.__connection.commit()
+
+    @contextmanager
+    def autocommit(self):
+        """
+        Runs every command executed in the block in its own implicit transaction, as required by
+        statements that cannot run inside a transaction block, such as CREATE INDEX CONCURRENTLY.
+        Any pending work is committed before the block starts.
         """
         self.__connection.commit()
+        self.__connection.autocommit = True
+        try:
+            yield self
+        finally:
+            self.__connection.autocommit = False
+
+    def __run(self, command):
+        cursor = self.__connection.cursor()
+        cursor.execute(command)
+        cursor.close()
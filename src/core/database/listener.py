@@ -0,0 +1,90 @@
+import select
+import threading
+from typing import Callable, Optional
+
+import psycopg2
+
+from src.core.database.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds between checks of the stop flag while waiting for notifications
+LISTEN_POLL_INTERVAL = 1.0
+
+
+class NotificationListener:
+    """
+    Receives the PostgreSQL notifications of a channel on a background thread, over a dedicated
+    connection kept outside of the pool since it stays busy for the lifetime of the worker.
+
+    Notifications sent while the listener is disconnected are lost, so `on_disconnect` and
+    `on_connect` let the receiver drop whatever state the missed notifications would have changed.
+    The connection is opened again every `retry_interval` seconds until the listener is stopped.
+    """
+
+    def __init__(self, channel: str, on_notification: Callable[[str], None],
+                 on_connect: Optional[Callable[[], None]] = None, on_disconnect: Optional[Callable[[], None]] = None,
+                 retry_interval: float = 5.0, **connect_kwargs):
+        """
+        Args:
+            channel (str): Channel listened to.
+            on_notification (Callable): Called with the payload of every notification.
+            on_connect (Callable, optional): Called once listening, on the first connection and after every reconnection.
+            on_disconnect (Callable, optional): Called when the connection is lost.
+            retry_interval (float): Seconds to wait before reconnecting.
+            **connect_kwargs: Parameters forwarded to `psycopg2.connect`.
+        """
+        self.__channel = channel
+        self.__on_notification = on_notification
+        self.__on_connect = on_connect or (lambda: None)
+        self.__on_disconnect = on_disconnect or (lambda: None)
+        self.__retry_interval = retry_interval
+        self.__connect_kwargs = connect_kwargs
+        self.__stopping = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Starts listening on a daemon thread.
+        """
+        self.__stopping.clear()
+        self.__thread = threading.Thread(target=self.__run, name=f"listen-{self.__channel}", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops listening and waits for the thread to close its connection.
+        """
+        self.__stopping.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self):
+        while not self.__stopping.is_set():
+            try:
+                self.__listen()
+            except psycopg2.Error as error:
+                logger.warning("Listening to %s failed, retrying in %ss: %s", self.__channel, self.__retry_interval,
+                               str(error).strip())
+            self.__on_disconnect()
+            self.__stopping.wait(self.__retry_interval)
+
+    def __listen(self):
+        """
+        Listens until the listener is stopped or the connection fails.
+        """
+        connection = psycopg2.connect(**self.__connect_kwargs)
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.__channel};")
+            self.__on_connect()
+            while not self.__stopping.is_set():
+                if select.select([connection], [], [], LISTEN_POLL_INTERVAL) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    self.__on_notification(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
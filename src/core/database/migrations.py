@@ -0,0 +1,202 @@
+import time
+from datetime import datetime
+
+from src.commons.config import DB_MIGRATION_LOCK_POLL_INTERVAL, DB_PARTITIONS
+from src.core.database.database import Database
+from src.core.database.logger import get_logger
+from src.core.database.schema import SCHEMA, COMPANY_DATA_TABLE, PARTITIONED_COMPANY_DATA_TABLE, \
+    CREATE_HASH_PARTITION, SELECT_PARTITIONS, JOB_TABLE, PROCESSING_RUN_TABLE, COMPANY_DATA_RUN_ID_COLUMN, \
+    BACKFILL_PROCESSING_RUN, COMPANY_DATA_CONTENT_HASH_COLUMN, COMPANY_DATA_PROCESSED_INPUTS_COLUMNS, \
+    MIGRATION_TABLE, SELECT_MIGRATION_TABLE, SELECT_MIGRATION_VERSION, SELECT_APPLIED_MIGRATIONS, INSERT_MIGRATION, \
+    TRY_ACQUIRE_MIGRATION_LOCK, RELEASE_MIGRATION_LOCK, SELECT_INVALID_INDEXES, DROP_INDEX_CONCURRENTLY, \
+    CREATE_INDEX_CONCURRENTLY, CREATE_PARENT_INDEX, ATTACH_PARTITION_INDEX, RULE_SET_TABLE, JOB_LEASE_COLUMNS
+
+logger = get_logger(__name__)
+
+
+class Migration:
+    """
+    A versioned change to the database schema, applied once and recorded in company.schema_migration.
+    """
+
+    def __init__(self, version: int, name: str, statements: list[str], concurrent: bool = False):
+        """
+        Args:
+            version (int): Position of the migration. Versions are applied in increasing order.
+            name (str): Short description, recorded with the version.
+            statements (list of str): SQL statements applied by the migration.
+            concurrent (bool): Run the statements outside a transaction, for CREATE INDEX CONCURRENTLY
+                               and similar statements that keep the table writable. The statements
+                               must then be idempotent, as a failure halfway leaves the earlier ones applied.
+        """
+        self.version = version
+        self.name = name
+        self.statements = statements
+        self.concurrent = concurrent
+
+    def build_statements(self, db: Database) -> list[str]:
+        """
+        Returns the statements to run against the current database.
+
+        Args:
+            db (Database): The database being migrated.
+
+        Returns:
+            list of str: SQL statements applied by the migration.
+        """
+        return self.statements
+
+
+class IndexMigration(Migration):
+    """
+    Builds an index without blocking writes. Plain tables are indexed with CREATE INDEX CONCURRENTLY;
+    on a partitioned table every partition is indexed concurrently and attached to the parent index.
+    """
+
+    def __init__(self, version: int, name: str, index: str, table: str, columns: str):
+        """
+        Args:
+            version (int): Position of the migration.
+            name (str): Short description, recorded with the version.
+            index (str): Name of the index, created in the schema of the table.
+            table (str): Schema-qualified table to index.
+            columns (str): Indexed columns, as written in CREATE INDEX.
+        """
+        super().__init__(version, name, [], concurrent=True)
+        self.index = index
+        self.table = table
+        self.columns = columns
+
+    def build_statements(self, db: Database) -> list[str]:
+        partitions = db.fetch_all(SELECT_PARTITIONS, (self.table,))
+        if not partitions:
+            return [CREATE_INDEX_CONCURRENTLY.format(index=self.index, table=self.table, columns=self.columns)]
+
+        schema, table_name = self.table.split(".")
+        suffix = self.index[len(table_name):] if self.index.startswith(table_name) else f"_{self.index}"
+        statements = [CREATE_PARENT_INDEX.format(index=self.index, table=self.table, columns=self.columns)]
+        for partition, partition_name in partitions:
+            partition_index = partition_name + suffix
+            statements.append(CREATE_INDEX_CONCURRENTLY.format(index=partition_index, table=partition,
+                                                               columns=self.columns))
+            statements.append(ATTACH_PARTITION_INDEX.format(index=f"{schema}.{self.index}",
+                                                            partition_index=f"{schema}.{partition_index}"))
+        return statements
+
+
+def company_data_table(partitions: int) -> list[str]:
+    """
+    Statements creating company.company_data, hash-partitioned on url when partitions > 0.
+
+    Args:
+        partitions (int): Number of hash partitions. 0 creates a plain table.
+
+    Returns:
+        list of str: The CREATE TABLE statements.
+    """
+    if partitions <= 0:
+        return [COMPANY_DATA_TABLE]
+    return [PARTITIONED_COMPANY_DATA_TABLE] + [
+        CREATE_HASH_PARTITION.format(partition=f"company.company_data_p{remainder}", table="company.company_data",
+                                     modulus=partitions, remainder=remainder)
+        for remainder in range(partitions)]
+
+
+MIGRATIONS = [
+    Migration(1, "create company_data", [SCHEMA, *company_data_table(DB_PARTITIONS)]),
+    Migration(2, "create job", [JOB_TABLE]),
+    Migration(3, "track processing runs", [PROCESSING_RUN_TABLE, COMPANY_DATA_RUN_ID_COLUMN, BACKFILL_PROCESSING_RUN]),
+    IndexMigration(4, "index company_data by run", "company_data_run_id_url_idx", "company.company_data", "run_id, url"),
+    Migration(5, "hash company content", [COMPANY_DATA_CONTENT_HASH_COLUMN]),
+    Migration(6, "track processed inputs", [COMPANY_DATA_PROCESSED_INPUTS_COLUMNS]),
+    Migration(7, "create rule_set", [RULE_SET_TABLE]),
+    Migration(8, "lease jobs", [JOB_LEASE_COLUMNS]),
+]
+
+
+class MigrationRunner:
+    """
+    Brings the database schema up to date by applying the pending migrations in version order.
+
+    Workers booting at once serialize on a PostgreSQL advisory lock, and the first one applies
+    the migrations while the others wait and then find nothing left to do. When the schema is
+    already up to date, startup only reads the current version, without taking the lock or running DDL.
+    """
+
+    def __init__(self, db: Database, migrations: list[Migration] = None):
+        """
+        Args:
+            db (Database): The database connection wrapper. Must not be inside a transaction.
+            migrations (list of Migration, optional): Migrations to apply. Defaults to MIGRATIONS.
+        """
+        self.__db = db
+        self.__migrations = sorted(MIGRATIONS if migrations is None else migrations,
+                                   key=lambda migration: migration.version)
+
+    def migrate(self) -> list[int]:
+        """
+        Applies the migrations not recorded yet. Each migration runs in its own transaction
+        together with its record, except concurrent migrations, which are recorded once done.
+
+        Returns:
+            list of int: Versions applied by this call.
+        """
+        if not self.__migrations or self.__current_version() >= self.__migrations[-1].version:
+            return []
+
+        self.__acquire_lock()
+        try:
+            self.__db.execute(SCHEMA)
+            self.__db.execute(MIGRATION_TABLE)
+            applied = {row[0] for row in self.__db.fetch_all(SELECT_APPLIED_MIGRATIONS)}
+            self.__db.commit()
+
+            versions = []
+            for migration in self.__migrations:
+                if migration.version not in applied:
+                    logger.info("Applying migration %s: %s", migration.version, migration.name)
+                    self.__apply(migration)
+                    versions.append(migration.version)
+            return versions
+        finally:
+            self.__db.fetch_one(RELEASE_MIGRATION_LOCK)
+            self.__db.commit()
+
+    def __acquire_lock(self):
+        """
+        Polls the advisory lock instead of blocking on it: CREATE INDEX CONCURRENTLY waits for every
+        statement holding an older snapshot, so a worker blocked on the lock would deadlock the index build.
+        """
+        with self.__db.autocommit():
+            while not self.__db.fetch_one(TRY_ACQUIRE_MIGRATION_LOCK)[0]:
+                logger.info("Waiting for another worker to apply the migrations")
+                time.sleep(DB_MIGRATION_LOCK_POLL_INTERVAL)
+
+    def __current_version(self) -> int:
+        """
+        Reads the latest applied version, 0 when no migration was ever applied.
+        """
+        version = 0
+        if self.__db.fetch_one(SELECT_MIGRATION_TABLE)[0] is not None:
+            version = self.__db.fetch_one(SELECT_MIGRATION_VERSION)[0] or 0
+        self.__db.commit()
+        return version
+
+    def __apply(self, migration: Migration):
+        """
+        Runs the statements of a migration and records its version.
+        """
+        if not migration.concurrent:
+            with self.__db.transaction():
+                for statement in migration.build_statements(self.__db):
+                    self.__db.execute(statement)
+                self.__db.execute(INSERT_MIGRATION, (migration.version, migration.name, datetime.now()))
+            return
+
+        with self.__db.autocommit():
+            for (index,) in self.__db.fetch_all(SELECT_INVALID_INDEXES):
+                logger.info("Dropping invalid index %s", index)
+                self.__db.execute(DROP_INDEX_CONCURRENTLY.format(index=index))
+            for statement in migration.build_statements(self.__db):
+                self.__db.execute(statement)
+            self.__db.execute(INSERT_MIGRATION, (migration.version, migration.name, datetime.now()))
@@ -0,0 +1,140 @@
+"""
+Moves an existing, plain company.company_data to a table hash-partitioned on url, while the
+application keeps reading and writing it:
+
+    python -m src.core.database.partitioning --partitions 16 --batch-size 10000
+
+The rows are copied in batches to company.company_data_partitioned while a trigger mirrors every
+concurrent write, then the tables are swapped under a short exclusive lock. The previous table is
+kept as company.company_data_unpartitioned, to be dropped once the new layout is trusted.
+The tool can be re-run after an interruption. Schema migrations must not run while it does.
+"""
+import argparse
+from typing import Iterator
+
+from src.commons.config import DB_PARTITIONS, DB_PARTITION_COPY_BATCH_SIZE
+from src.core.context import open_database_pool, close_database_pool, database_session
+from src.core.database.database import Database
+from src.core.database.logger import get_logger
+from src.core.database.schema import SELECT_RELATION_KIND, CREATE_PARTITIONED_COPY, CREATE_HASH_PARTITION, \
+    SYNC_PARTITIONED_COPY_FUNCTION, SYNC_PARTITIONED_COPY_TRIGGER, COPY_PARTITIONED_BATCH, LOCK_COMPANY_DATA, \
+    DROP_SYNC_PARTITIONED_COPY, SELECT_TABLE_RELATIONS, RENAME_TABLE, RENAME_INDEX
+
+logger = get_logger(__name__)
+
+TABLE = "company_data"
+PARTITIONED_COPY = "company_data_partitioned"
+UNPARTITIONED = "company_data_unpartitioned"
+
+
+class CompanyDataPartitioner:
+    """
+    Online migration of company.company_data to hash partitions: prepare, copy, then swap.
+    """
+
+    def __init__(self, db: Database):
+        """
+        Args:
+            db (Database): The database connection wrapper. Must not be inside a transaction.
+        """
+        self.__db = db
+
+    def is_partitioned(self) -> bool:
+        """
+        Returns:
+            bool: Whether company.company_data is already partitioned.
+        """
+        return self.__db.fetch_one(SELECT_RELATION_KIND, (f"company.{TABLE}",))[0] == "p"
+
+    def prepare(self, partitions: int):
+        """
+        Creates the partitioned copy, with the columns and indexes of company_data,
+        and starts mirroring the writes on company_data to it.
+
+        Args:
+            partitions (int): Number of hash partitions.
+        """
+        with self.__db.transaction():
+            self.__db.execute(CREATE_PARTITIONED_COPY)
+            for remainder in range(partitions):
+                self.__db.execute(CREATE_HASH_PARTITION.format(partition=f"company.{PARTITIONED_COPY}_p{remainder}",
+                                                               table=f"company.{PARTITIONED_COPY}",
+                                                               modulus=partitions, remainder=remainder))
+            self.__db.execute(SYNC_PARTITIONED_COPY_FUNCTION)
+            self.__db.execute(SYNC_PARTITIONED_COPY_TRIGGER)
+
+    def copy(self, batch_size: int = DB_PARTITION_COPY_BATCH_SIZE) -> Iterator[int]:
+        """
+        Copies the rows of company_data to the partitioned copy in URL order,
+        one transaction per batch so locks are held briefly.
+
+        Args:
+            batch_size (int): Rows copied per transaction.
+
+        Yields:
+            int: Rows scanned so far, after every batch.
+        """
+        after, scanned = None, 0
+        while True:
+            with self.__db.transaction():
+                last_url, count = self.__db.fetch_one(COPY_PARTITIONED_BATCH, (after, after, batch_size))
+            if count == 0:
+                return
+            after, scanned = last_url, scanned + count
+            yield scanned
+
+    def swap(self):
+        """
+        Stops the mirroring and swaps the tables, their partitions and indexes by renaming them,
+        in a single transaction holding an exclusive lock on company_data.
+        """
+        with self.__db.transaction():
+            self.__db.execute(LOCK_COMPANY_DATA)
+            self.__db.execute(DROP_SYNC_PARTITIONED_COPY)
+            self.__rename(TABLE, UNPARTITIONED)
+            self.__rename(PARTITIONED_COPY, TABLE)
+
+    def migrate(self, partitions: int, batch_size: int = DB_PARTITION_COPY_BATCH_SIZE):
+        """
+        Runs the whole migration: prepare, copy and swap.
+
+        Args:
+            partitions (int): Number of hash partitions.
+            batch_size (int): Rows copied per transaction.
+        """
+        if self.is_partitioned():
+            logger.info("company.%s is already partitioned", TABLE)
+            return
+        self.prepare(partitions)
+        logger.info("Copying company.%s to %s hash partitions", TABLE, partitions)
+        for scanned in self.copy(batch_size):
+            logger.info("Copied %s rows", scanned)
+        self.swap()
+        logger.info("company.%s is partitioned, the previous table is kept as company.%s", TABLE, UNPARTITIONED)
+
+    def __rename(self, table: str, name: str):
+        """
+        Renames a table, its partitions and indexes, replacing the table name prefix of each of them.
+        """
+        for relation, is_index in self.__db.fetch_all(SELECT_TABLE_RELATIONS, (f"company.{table}",) * 2):
+            if relation.startswith(table):
+                rename = RENAME_INDEX if is_index else RENAME_TABLE
+                self.__db.execute(rename.format(relation=relation, name=name + relation[len(table):]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--partitions", type=int, default=DB_PARTITIONS or 16)
+    parser.add_argument("--batch-size", type=int, default=DB_PARTITION_COPY_BATCH_SIZE)
+    args = parser.parse_args()
+
+    open_database_pool()
+    try:
+        with database_session() as db:
+            CompanyDataPartitioner(db).migrate(args.partitions, args.batch_size)
+    finally:
+        close_database_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+import psycopg2
+from psycopg2 import extensions
+
+from src.core.database.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no connection could be checked out of the pool within the configured timeout.
+    """
+
+
+class DatabasePool:
+    """
+    A thread-safe pool of psycopg2 connections shared by the whole application.
+
+    At most `max_size` connections are open at any time. Idle connections are kept
+    for reuse, connections are optionally validated before being handed out, and
+    every connection is returned to a clean state when it comes back to the pool.
+    """
+
+    def __init__(self, min_size: int, max_size: int, timeout: float, check_on_borrow: bool = True,
+                 **connect_kwargs):
+        """
+        Args:
+            min_size (int): Number of connections opened eagerly when the pool is opened.
+            max_size (int): Maximum number of connections open at the same time.
+            timeout (float): Seconds to wait for a free connection before giving up.
+            check_on_borrow (bool): Whether to ping a connection before handing it out.
+            **connect_kwargs: Parameters forwarded to `psycopg2.connect`.
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        self.__min_size = min_size
+        self.__max_size = max_size
+        self.__timeout = timeout
+        self.__check_on_borrow = check_on_borrow
+        self.__connect_kwargs = connect_kwargs
+        self.__idle = deque()
+        self.__lock = threading.Lock()
+        self.__slots = threading.BoundedSemaphore(max_size)
+        self.__closed = True
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    def open(self):
+        """
+        Opens the pool and eagerly creates `min_size` connections.
+        """
+        self.__closed = False
+        for _ in range(self.__min_size):
+            self.__idle.append(self.__connect())
+        logger.info("Database pool opened (min_size=%s, max_size=%s)", self.__min_size, self.__max_size)
+
+    def close(self):
+        """
+        Closes the pool and every idle connection. Connections currently checked out
+        are closed when they are returned.
+        """
+        with self.__lock:
+            self.__closed = True
+            while self.__idle:
+                self.__idle.pop().close()
+        logger.info("Database pool closed")
+
+    @contextmanager
+    def connection(self) -> Iterator[extensions.connection]:
+        """
+        Checks a connection out of the pool and guarantees it is returned afterward.
+
+        Yields:
+            connection: An open psycopg2 connection.
+
+        Raises:
+            PoolTimeoutError: If no connection becomes available within the timeout.
+        """
+        connection = self.__acquire()
+        try:
+            yield connection
+        finally:
+            self.__release(connection)
+
+    def __acquire(self) -> extensions.connection:
+        if self.__closed:
+            raise PoolTimeoutError("Database pool is closed")
+        if not self.__slots.acquire(timeout=self.__timeout):
+            raise PoolTimeoutError(f"No database connection available after {self.__timeout}s")
+
+        try:
+            with self.__lock:
+                connection = self.__idle.pop() if self.__idle else None
+
+            if connection is not None and self.__check_on_borrow and not self.__is_healthy(connection):
+                logger.warning("Discarding broken pooled connection")
+                connection.close()
+                connection = None
+
+            return connection if connection is not None else self.__connect()
+        except Exception:
+            self.__slots.release()
+            raise
+
+    def __release(self, connection: extensions.connection):
+        try:
+            reusable = self.__reset(connection)
+            with self.__lock:
+                if reusable and not self.__closed:
+                    self.__idle.append(connection)
+                    connection = None
+            if connection is not None:
+                connection.close()
+        finally:
+            self.__slots.release()
+
+    def __connect(self) -> extensions.connection:
+        return psycopg2.connect(**self.__connect_kwargs)
+
+    @staticmethod
+    def __is_healthy(connection: extensions.connection) -> bool:
+        """
+        Pings the server to make sure the connection is still usable.
+        """
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def __reset(connection: extensions.connection) -> bool:
+        """
+        Rolls back any unfinished transaction so the next borrower gets a clean connection.
+
+        Returns:
+            bool: True if the connection can be reused, False if it must be discarded.
+        """
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
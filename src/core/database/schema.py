@@ -1,5 +1,33 @@
 SCHEMA = "CREATE SCHEMA IF NOT EXISTS company;"
-SET_SCHEMA = "SET SCHEMA 'company';"
+
+# Schema versions applied by MigrationRunner, see src/core/database/migrations.py
+MIGRATION_TABLE = """
+                  CREATE TABLE IF NOT EXISTS company.schema_migration( version integer PRIMARY KEY,
+                                                                       name varchar NOT NULL,
+                                                                       applied_date timestamp NOT NULL);
+                  """
+SELECT_MIGRATION_TABLE = "SELECT to_regclass('company.schema_migration');"
+SELECT_MIGRATION_VERSION = "SELECT MAX(version) FROM company.schema_migration;"
+SELECT_APPLIED_MIGRATIONS = "SELECT version FROM company.schema_migration;"
+INSERT_MIGRATION = "INSERT INTO company.schema_migration (version, name, applied_date) VALUES (%s, %s, %s);"
+# Session-level lock: held across the transactions of a migration run, released explicitly or on disconnect
+TRY_ACQUIRE_MIGRATION_LOCK = "SELECT pg_try_advisory_lock(hashtext('company.schema_migration'));"
+RELEASE_MIGRATION_LOCK = "SELECT pg_advisory_unlock(hashtext('company.schema_migration'));"
+# Indexes left invalid by an interrupted CREATE INDEX CONCURRENTLY, dropped before building them again.
+# Parent indexes of partitioned tables are kept: they become valid once the missing partition indexes are attached.
+SELECT_INVALID_INDEXES = """
+                         SELECT quote_ident(namespace.nspname) || '.' || quote_ident(class.relname)
+                         FROM pg_index AS index
+                         JOIN pg_class AS class ON class.oid = index.indexrelid
+                         JOIN pg_namespace AS namespace ON namespace.oid = class.relnamespace
+                         WHERE NOT index.indisvalid AND class.relkind = 'i' AND namespace.nspname = 'company';
+                         """
+DROP_INDEX_CONCURRENTLY = "DROP INDEX CONCURRENTLY IF EXISTS {index};"
+CREATE_INDEX_CONCURRENTLY = "CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} ({columns});"
+# Partitioned tables cannot be indexed concurrently: the parent index is created empty and invalid,
+# each partition is indexed concurrently, and the parent becomes valid once every partition index is attached
+CREATE_PARENT_INDEX = "CREATE INDEX IF NOT EXISTS {index} ON ONLY {table} ({columns});"
+ATTACH_PARTITION_INDEX = "ALTER INDEX {index} ATTACH PARTITION {partition_index};"
 
 COMPANY_DATA_TABLE = """
                      CREATE TABLE IF NOT EXISTS company.company_data( url varchar PRIMARY KEY, 
@@ -9,30 +37,398 @@ COMPANY_DATA_TABLE = """
                                                                       imported_date timestamp, 
                                                                       last_processed_date timestamp);
                      """
-UPSERT_DATA_IN_BATCH = """
-                        INSERT INTO company.company_data (url, name, content, processed_variables, imported_date, last_processed_date)
-                        VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT (url) DO
-                        UPDATE
-                            SET 
-                                name = EXCLUDED.name,
-                                content = EXCLUDED.content,
-                                processed_variables = EXCLUDED.processed_variables,
-                                imported_date = EXCLUDED.imported_date,
-                                last_processed_date = EXCLUDED.last_processed_date;
+# Opt-in layout for very large datasets (DB_PARTITIONS > 0): same columns, rows spread over
+# hash partitions of url. Statements addressing company.company_data work unchanged on either layout.
+PARTITIONED_COMPANY_DATA_TABLE = """
+                                 CREATE TABLE IF NOT EXISTS company.company_data( url varchar PRIMARY KEY,
+                                                                                  name varchar,
+                                                                                  content JSONB,
+                                                                                  processed_variables JSONB,
+                                                                                  imported_date timestamp,
+                                                                                  last_processed_date timestamp)
+                                 PARTITION BY HASH (url);
+                                 """
+CREATE_HASH_PARTITION = """
+                        CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table}
+                        FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder});
                         """
+SELECT_PARTITIONS = """
+                    SELECT quote_ident(namespace.nspname) || '.' || quote_ident(class.relname), class.relname
+                    FROM pg_inherits
+                    JOIN pg_class AS class ON class.oid = pg_inherits.inhrelid
+                    JOIN pg_namespace AS namespace ON namespace.oid = class.relnamespace
+                    WHERE pg_inherits.inhparent = %s::regclass
+                    ORDER BY class.relname;
+                    """
+# Online move of a plain company.company_data to a partitioned copy, see src/core/database/partitioning.py
+SELECT_RELATION_KIND = "SELECT relkind FROM pg_class WHERE oid = %s::regclass;"
+CREATE_PARTITIONED_COPY = """
+                          CREATE TABLE IF NOT EXISTS company.company_data_partitioned
+                          (LIKE company.company_data INCLUDING ALL)
+                          PARTITION BY HASH (url);
+                          """
+# Mirrors every write on company_data to the copy while it is filled; relies on both tables having the same columns
+SYNC_PARTITIONED_COPY_FUNCTION = """
+                                 CREATE OR REPLACE FUNCTION company.sync_company_data_partitioned() RETURNS trigger
+                                 LANGUAGE plpgsql AS $$
+                                 BEGIN
+                                     IF TG_OP <> 'INSERT' THEN
+                                         DELETE FROM company.company_data_partitioned WHERE url = OLD.url;
+                                     END IF;
+                                     IF TG_OP <> 'DELETE' THEN
+                                         INSERT INTO company.company_data_partitioned SELECT (NEW).*;
+                                     END IF;
+                                     RETURN NULL;
+                                 END;
+                                 $$;
+                                 """
+SYNC_PARTITIONED_COPY_TRIGGER = """
+                                CREATE OR REPLACE TRIGGER sync_company_data_partitioned
+                                AFTER INSERT OR UPDATE OR DELETE ON company.company_data
+                                FOR EACH ROW EXECUTE FUNCTION company.sync_company_data_partitioned();
+                                """
+# Copies the next batch of rows after the cursor. FOR SHARE holds writers of the batch until it commits,
+# so their mirrored write lands after the copied row; rows mirrored first are kept by DO NOTHING.
+COPY_PARTITIONED_BATCH = """
+                         WITH batch AS (
+                             SELECT *
+                             FROM company.company_data
+                             WHERE url >= COALESCE(%s::varchar, '')
+                             AND url IS DISTINCT FROM %s
+                             ORDER BY url
+                             LIMIT %s
+                             FOR SHARE
+                         ), copied AS (
+                             INSERT INTO company.company_data_partitioned
+                             SELECT * FROM batch
+                             ON CONFLICT (url) DO NOTHING
+                         )
+                         SELECT MAX(url), COUNT(*) FROM batch;
+                         """
+LOCK_COMPANY_DATA = "LOCK TABLE company.company_data IN ACCESS EXCLUSIVE MODE;"
+DROP_SYNC_PARTITIONED_COPY = """
+                             DROP TRIGGER IF EXISTS sync_company_data_partitioned ON company.company_data;
+                             DROP FUNCTION IF EXISTS company.sync_company_data_partitioned();
+                             """
+# A table, its partitions and the indexes of all of them, flagged as index or not
+SELECT_TABLE_RELATIONS = """
+                         WITH tables AS (
+                             SELECT %s::regclass AS oid
+                             UNION ALL
+                             SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass
+                         )
+                         SELECT class.relname, false
+                         FROM tables
+                         JOIN pg_class AS class ON class.oid = tables.oid
+                         UNION ALL
+                         SELECT class.relname, true
+                         FROM tables
+                         JOIN pg_index ON pg_index.indrelid = tables.oid
+                         JOIN pg_class AS class ON class.oid = pg_index.indexrelid;
+                         """
+RENAME_TABLE = "ALTER TABLE company.{relation} RENAME TO {name};"
+RENAME_INDEX = "ALTER INDEX company.{relation} RENAME TO {name};"
+PROCESSING_RUN_TABLE = """
+                       CREATE TABLE IF NOT EXISTS company.processing_run( id bigserial PRIMARY KEY,
+                                                                          processed_date timestamp NOT NULL);
+                       """
+# Companies point to the run that processed them last; an index on (run_id, url), see MIGRATIONS, serves
+# the latest-run lookup (MAX(run_id) is read from the end of the index) and the run's rows ordered by URL.
+COMPANY_DATA_RUN_ID_COLUMN = "ALTER TABLE company.company_data ADD COLUMN IF NOT EXISTS run_id bigint;"
+# SHA-256 of the canonical JSON content, see CompanyRepository.build_copy_chunks
+COMPANY_DATA_CONTENT_HASH_COLUMN = "ALTER TABLE company.company_data ADD COLUMN IF NOT EXISTS content_hash varchar;"
+# Inputs of the stored processed_variables: fingerprint of the rule set and content_hash of the evaluated content
+COMPANY_DATA_PROCESSED_INPUTS_COLUMNS = """
+                                        ALTER TABLE company.company_data
+                                            ADD COLUMN IF NOT EXISTS rules_fingerprint varchar,
+                                            ADD COLUMN IF NOT EXISTS processed_content_hash varchar;
+                                        """
+# Attaches the companies processed before runs were tracked to a run of their own, once.
+BACKFILL_PROCESSING_RUN = """
+                          WITH run AS (
+                              INSERT INTO company.processing_run (processed_date)
+                              SELECT MAX(last_processed_date)
+                              FROM company.company_data
+                              WHERE NOT EXISTS (SELECT 1 FROM company.processing_run)
+                              HAVING MAX(last_processed_date) IS NOT NULL
+                              RETURNING id, processed_date
+                          )
+                          UPDATE company.company_data AS company
+                          SET run_id = run.id
+                          FROM run
+                          WHERE company.last_processed_date = run.processed_date;
+                          """
+# Registered rule sets, immutable once stored: a rule set is identified by the fingerprint of its canonical rules
+RULE_SET_TABLE = """
+                 CREATE TABLE IF NOT EXISTS company.rule_set( id bigserial PRIMARY KEY,
+                                                              fingerprint varchar NOT NULL UNIQUE,
+                                                              rules JSONB NOT NULL,
+                                                              created_date timestamp NOT NULL);
+                 """
+JOB_TABLE = """
+            CREATE TABLE IF NOT EXISTS company.job( id varchar PRIMARY KEY,
+                                                    kind varchar NOT NULL,
+                                                    status varchar NOT NULL,
+                                                    payload JSONB NOT NULL,
+                                                    result JSONB,
+                                                    error text,
+                                                    rows_total bigint,
+                                                    rows_done bigint NOT NULL DEFAULT 0,
+                                                    started_rows bigint NOT NULL DEFAULT 0,
+                                                    created_date timestamp NOT NULL,
+                                                    started_date timestamp,
+                                                    updated_date timestamp,
+                                                    finished_date timestamp);
+            """
+# Worker holding a running job, and when it last renewed its lease
+JOB_LEASE_COLUMNS = """
+                    ALTER TABLE company.job
+                        ADD COLUMN IF NOT EXISTS claimed_by varchar,
+                        ADD COLUMN IF NOT EXISTS heartbeat_date timestamp;
+                    """
+CREATE_IMPORT_STAGING_TABLE = """
+                              CREATE TEMP TABLE company_data_staging( position bigserial,
+                                                                      url varchar,
+                                                                      name varchar,
+                                                                      content JSONB,
+                                                                      imported_date timestamp,
+                                                                      content_hash varchar) ON COMMIT DROP;
+                              """
+COPY_INTO_IMPORT_STAGING = """
+                           COPY company_data_staging (url, name, content, imported_date, content_hash)
+                           FROM STDIN WITH (FORMAT csv);
+                           """
+# Companies whose content hash is unchanged are left untouched (no new row version, no WAL). Inserted and updated
+# rows are told apart by counting, in the statement snapshot, the staged URLs that already exist.
+# Returns (distinct rows staged, rows that existed, rows inserted or updated).
+MERGE_IMPORT_STAGING = """
+                       WITH staged AS (
+                           SELECT DISTINCT ON (url) url, name, content, imported_date, content_hash
+                           FROM company_data_staging
+                           ORDER BY url, position DESC
+                       ), existing AS (
+                           SELECT COUNT(*) AS count
+                           FROM staged
+                           JOIN company.company_data AS company ON company.url = staged.url
+                       ), merged AS (
+                           INSERT INTO company.company_data AS company (url, name, content, processed_variables,
+                                                                        imported_date, last_processed_date,
+                                                                        content_hash)
+                           SELECT url, name, content, NULL::jsonb, imported_date, NULL::timestamp, content_hash
+                           FROM staged
+                           ON CONFLICT (url) DO
+                           UPDATE
+                               SET
+                                   name = EXCLUDED.name,
+                                   content = EXCLUDED.content,
+                                   processed_variables = EXCLUDED.processed_variables,
+                                   imported_date = EXCLUDED.imported_date,
+                                   last_processed_date = EXCLUDED.last_processed_date,
+                                   run_id = NULL,
+                                   content_hash = EXCLUDED.content_hash
+                               WHERE company.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+                           RETURNING 1
+                       )
+                       SELECT (SELECT COUNT(*) FROM staged), existing.count, (SELECT COUNT(*) FROM merged)
+                       FROM existing;
+                       """
+
+INSERT_PROCESSING_RUN = "INSERT INTO company.processing_run (processed_date) VALUES (%s) RETURNING id;"
 
 UPDATE_PROCESSED_DATA = """
                         UPDATE company.company_data SET processed_variables = %s,
-                                                        last_processed_date = %s
+                                                        last_processed_date = %s,
+                                                        run_id = %s,
+                                                        rules_fingerprint = NULL
                                                     WHERE url = %s;                            
                         """
 
-SELECT_COMPANY_BY_URL= "SELECT * FROM company.company_data WHERE url = %s;"
+# Records the content hash each result was computed from, see SELECT_COMPANIES_TO_PROCESS
+UPDATE_PROCESSED_DATA_IN_BATCH = """
+                                 UPDATE company.company_data AS company
+                                 SET processed_variables = processed.processed_variables,
+                                     last_processed_date = %s,
+                                     run_id = %s,
+                                     rules_fingerprint = %s,
+                                     processed_content_hash = processed.content_hash
+                                 FROM unnest(%s::varchar[], %s::jsonb[], %s::varchar[])
+                                     AS processed(url, processed_variables, content_hash)
+                                 WHERE company.url = processed.url
+                                 RETURNING company.url;
+                                 """
+# Moves companies whose stored result is still current to the run, without rewriting the result
+UPDATE_PROCESSING_RUN = """
+                        UPDATE company.company_data
+                        SET last_processed_date = %s,
+                            run_id = %s
+                        WHERE url = ANY(%s);
+                        """
+
+# The stored processed_variables of a company are current when they were computed by the same rule set
+# (rules_fingerprint = %s) from the same content. Rows without a content hash are always recomputed.
+PROCESSED_IS_CURRENT = """
+                       COALESCE(company.rules_fingerprint = %s
+                                AND company.processed_content_hash = company.content_hash
+                                AND company.processed_variables IS NOT NULL, false)
+                       """
+
+# {processed_variables} is an expression over the row aliased as "company", see RulesProcessorService.compile_rules_to_sql
+# Current results are kept and only moved to the run; the last column tells whether the row was recomputed.
+UPDATE_PROCESSED_DATA_WITH_RULES = f"""
+                                   UPDATE company.company_data AS company
+                                   SET processed_variables = CASE
+                                           WHEN state.current THEN company.processed_variables
+                                           ELSE {{processed_variables}} || jsonb_build_object('company', company.name)
+                                       END,
+                                       last_processed_date = %s,
+                                       run_id = %s,
+                                       rules_fingerprint = %s,
+                                       processed_content_hash = company.content_hash
+                                   FROM (
+                                       SELECT url, {PROCESSED_IS_CURRENT} AS current
+                                       FROM company.company_data AS company
+                                       WHERE url = ANY(%s)
+                                   ) AS state
+                                   WHERE company.url = state.url
+                                   RETURNING company.url, company.processed_variables, NOT state.current;
+                                   """
+
+COMPANY_COLUMNS = """url, name, content, processed_variables, imported_date, last_processed_date,
+                     run_id, content_hash, rules_fingerprint, processed_content_hash"""
+SELECT_COMPANY_BY_URL= f"SELECT {COMPANY_COLUMNS} FROM company.company_data WHERE url = %s;"
+SELECT_COMPANIES_BY_URLS= f"SELECT {COMPANY_COLUMNS} FROM company.company_data WHERE url = ANY(%s);"
+# The columns written only by imports, which are the ones workers cache, see src/repositories/company_cache.py
+SELECT_COMPANY_CONTENTS_BY_URLS = """
+                                  SELECT url, name, content, content_hash
+                                  FROM company.company_data
+                                  WHERE url = ANY(%s);
+                                  """
+# Sent in the transaction importing companies, delivered on commit to the workers caching them
+COMPANY_DATA_CHANGED_CHANNEL = "company_data_changed"
+NOTIFY_COMPANY_DATA_CHANGED = f"""
+                              SELECT pg_notify('{COMPANY_DATA_CHANGED_CHANNEL}', payload)
+                              FROM unnest(%s::text[]) AS payload;
+                              """
+# (url, name, content, processed_variables, content_hash): the content of the companies to recompute,
+# or the stored result of the companies whose result is current, so only one of them is transferred
+SELECT_COMPANIES_TO_PROCESS = f"""
+                              SELECT url,
+                                     name,
+                                     CASE WHEN current THEN NULL ELSE content END,
+                                     CASE WHEN current THEN processed_variables END,
+                                     content_hash
+                              FROM (
+                                  SELECT *, {PROCESSED_IS_CURRENT} AS current
+                                  FROM company.company_data AS company
+                                  WHERE url = ANY(%s)
+                              ) AS company;
+                              """
+# (url, processed_variables, content_hash): SELECT_COMPANIES_TO_PROCESS without the columns workers cache
+SELECT_PROCESSING_STATE = f"""
+                          SELECT url,
+                                 CASE WHEN {PROCESSED_IS_CURRENT} THEN processed_variables END,
+                                 content_hash
+                          FROM company.company_data AS company
+                          WHERE url = ANY(%s);
+                          """
+# The latest run is the highest run_id still referenced by a company, read from company_data_run_id_url_idx.
 SELECT_PREVIOUSLY_PROCESSED= """
                                 SELECT *
                                 FROM company.company_data
-                                WHERE last_processed_date = (
-                                    SELECT MAX(last_processed_date)
+                                WHERE run_id = (
+                                    SELECT MAX(run_id)
                                     FROM company.company_data
                                 );
                               """
+# url >= COALESCE(...) keeps the cursor an index condition; IS DISTINCT FROM excludes the cursor itself
+SELECT_PREVIOUSLY_PROCESSED_PAGE = """
+                                   SELECT *
+                                   FROM company.company_data
+                                   WHERE run_id = (
+                                       SELECT MAX(run_id)
+                                       FROM company.company_data
+                                   )
+                                   AND url >= COALESCE(%s::varchar, '')
+                                   AND url IS DISTINCT FROM %s
+                                   ORDER BY url
+                                   LIMIT %s;
+                                   """
+SELECT_PREVIOUSLY_PROCESSED_ORDERED = """
+                                      SELECT *
+                                      FROM company.company_data
+                                      WHERE run_id = (
+                                          SELECT MAX(run_id)
+                                          FROM company.company_data
+                                      )
+                                      ORDER BY url;
+                                      """
+
+JOB_COLUMNS = """id, kind, status, payload, result, error, rows_total, rows_done, started_rows,
+                 created_date, started_date, updated_date, finished_date"""
+INSERT_JOB = f"""
+             INSERT INTO company.job (id, kind, status, payload, created_date)
+             VALUES (%s, %s, %s, %s, %s)
+             RETURNING {JOB_COLUMNS};
+             """
+SELECT_JOB_BY_ID = f"SELECT {JOB_COLUMNS} FROM company.job WHERE id = %s;"
+# Queued jobs, and running jobs whose worker stopped renewing its lease (heartbeat older than the given date)
+SELECT_CLAIMABLE_JOBS = f"""
+                        SELECT {JOB_COLUMNS}
+                        FROM company.job
+                        WHERE status = 'queued'
+                           OR (status = 'running' AND (heartbeat_date IS NULL OR heartbeat_date < %s))
+                        ORDER BY created_date;
+                        """
+# Claims a job for one worker, atomically: concurrent claims of the same job update it only once
+CLAIM_JOB = f"""
+            UPDATE company.job
+            SET status = 'running',
+                claimed_by = %s,
+                heartbeat_date = %s,
+                updated_date = %s
+            WHERE id = %s
+            AND (status = 'queued' OR (status = 'running' AND (heartbeat_date IS NULL OR heartbeat_date < %s)))
+            RETURNING {JOB_COLUMNS};
+            """
+UPDATE_JOB_STARTED = """
+                     UPDATE company.job
+                     SET status = 'running',
+                         rows_total = COALESCE(%s, rows_total),
+                         started_rows = rows_done,
+                         started_date = %s,
+                         updated_date = %s,
+                         heartbeat_date = %s
+                     WHERE id = %s AND claimed_by = %s;
+                     """
+UPDATE_JOB_PROGRESS = """
+                      UPDATE company.job
+                      SET rows_done = %s,
+                          rows_total = COALESCE(%s, rows_total),
+                          result = %s,
+                          updated_date = %s,
+                          heartbeat_date = %s
+                      WHERE id = %s AND claimed_by = %s;
+                      """
+UPDATE_JOB_STATUS = """
+                    UPDATE company.job
+                    SET status = %s,
+                        error = %s,
+                        updated_date = %s,
+                        finished_date = %s
+                    WHERE id = %s AND claimed_by = %s;
+                    """
+
+# Registering a rule set again returns the stored one; the no-op update makes RETURNING see the existing row,
+# also when it was inserted by a concurrent transaction
+UPSERT_RULE_SET = """
+                  INSERT INTO company.rule_set (fingerprint, rules, created_date)
+                  VALUES (%s, %s, %s)
+                  ON CONFLICT (fingerprint) DO UPDATE SET fingerprint = EXCLUDED.fingerprint
+                  RETURNING id, fingerprint, created_date;
+                  """
+SELECT_RULE_SET_BY_ID = "SELECT id, fingerprint, rules, created_date FROM company.rule_set WHERE id = %s;"
+SELECT_RULE_SET_BY_FINGERPRINT = """
+                                 SELECT id, fingerprint, rules, created_date
+                                 FROM company.rule_set
+                                 WHERE fingerprint = %s;
+                                 """
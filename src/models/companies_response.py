@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import BaseModel
 
@@ -21,6 +21,23 @@ class CompanyProcessed(BaseModel):
     imported_date: str
     last_processed_date: str
 
+    @classmethod
+    def from_row(cls, row: tuple) -> "CompanyProcessed":
+        """
+        Maps a raw company_data database tuple to a CompanyProcessed model.
+
+        Args:
+            row (tuple): A row selected from company.company_data.
+
+        Returns:
+            CompanyProcessed: The mapped model.
+        """
+        return cls(url=row[0],
+                   imported_data=row[2],
+                   processed_variables=row[3],
+                   imported_date=str(row[4]) if row[4] is not None else None,
+                   last_processed_date=str(row[5]) if row[5] is not None else None)
+
 
 class CompaniesResponse(BaseModel):
     """
@@ -28,5 +45,7 @@ class CompaniesResponse(BaseModel):
 
     Attributes:
         companies (list[CompanyProcessed]): List of processed companies.
+        next_cursor (Optional[str]): Cursor to pass as `after` to get the next page, None on the last page.
     """
     companies: list[CompanyProcessed]
+    next_cursor: Optional[str] = None
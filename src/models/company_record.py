@@ -0,0 +1,129 @@
+import json
+from collections.abc import MutableMapping
+from json.encoder import encode_basestring
+from operator import itemgetter
+from typing import Any, Iterator, Optional, Sequence
+
+from src.commons.hash_utils import json_key
+
+# Columns of assets/company-dataset.csv, followed by the features added by PreGenerateService
+COMPANY_FIELDS = ("company_name", "url", "founded_year", "total_employees", "headquarters_city",
+                  "employee_locations", "employee_rowth_2Y", "employee_growth_1Y", "employee_growth_6M",
+                  "description", "industry", "company_age", "is_usa_based", "is_saas")
+
+_FIELD_SET = frozenset(COMPANY_FIELDS)
+# Same output as hash_utils.canonical_json, applied to single keys and values
+_ENCODE = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode
+_SORTED_KEYS = tuple((name, _ENCODE(name) + ":") for name in sorted(COMPANY_FIELDS))
+
+
+class CompanyRecord(MutableMapping):
+    """
+    Company row of the import pipeline, holding the known columns in slots instead of a dictionary.
+
+    Behaves like the dictionary `csv.DictReader` would build: a field is present once set, and
+    columns that are not known are kept in an overflow dictionary, only allocated when needed.
+    `to_canonical_json` renders the same text as `canonical_json(dict(record))` without building a dictionary.
+    """
+    __slots__ = COMPANY_FIELDS + ("__extra",)
+
+    def __init__(self):
+        self.__extra: Optional[dict] = None
+
+    @classmethod
+    def from_row(cls, fieldnames: Sequence[Optional[str]], values: Sequence[str]) -> "CompanyRecord":
+        """
+        Builds a record from a CSV row, as `csv.DictReader` does: missing values are None, and values
+        beyond the header are kept as a list under the None key.
+
+        Args:
+            fieldnames (Sequence of str): The CSV header.
+            values (Sequence of str): The values of the row.
+
+        Returns:
+            CompanyRecord: The record.
+        """
+        record = cls()
+        for name, value in zip(fieldnames, values):
+            setter = _SETTERS.get(name)
+            if setter is None:
+                record[name] = value
+            else:
+                setter(record, value)
+        if len(values) > len(fieldnames):
+            record[None] = list(values[len(fieldnames):])
+        for name in fieldnames[len(values):]:
+            record[name] = None
+        return record
+
+    def to_canonical_json(self) -> str:
+        """
+        Serializes the record to the canonical JSON stored as company content.
+
+        Returns:
+            str: JSON object with sorted keys and no insignificant whitespace.
+        """
+        if self.__extra:
+            items = sorted([*((name, self[name]) for name in COMPANY_FIELDS if hasattr(self, name)),
+                            *((json_key(name), value) for name, value in self.__extra.items())], key=itemgetter(0))
+            return "{" + ",".join(_ENCODE(name) + ":" + _encode_value(value) for name, value in items) + "}"
+
+        parts = []
+        for name, key in _SORTED_KEYS:
+            try:
+                value = getattr(self, name)
+            except AttributeError:
+                continue
+            parts.append(key + _encode_value(value))
+        return "{" + ",".join(parts) + "}"
+
+    def __getitem__(self, key: Any) -> Any:
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.__extra is None:
+            raise KeyError(key)
+        return self.__extra[key]
+
+    def __setitem__(self, key: Any, value: Any):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.__extra is None:
+                self.__extra = {}
+            self.__extra[key] = value
+
+    def __delitem__(self, key: Any):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self.__extra is None:
+            raise KeyError(key)
+        else:
+            del self.__extra[key]
+
+    def __iter__(self) -> Iterator[Any]:
+        for name in COMPANY_FIELDS:
+            if hasattr(self, name):
+                yield name
+        if self.__extra:
+            yield from self.__extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"CompanyRecord({dict(self)!r})"
+
+
+# Slot descriptors, so CSV rows are stored without going through __setitem__
+_SETTERS = {name: CompanyRecord.__dict__[name].__set__ for name in COMPANY_FIELDS}
+
+
+def _encode_value(value: Any) -> str:
+    """Encodes a value as canonical JSON, strings through the C encoder json.dumps uses."""
+    return encode_basestring(value) if isinstance(value, str) else _ENCODE(value)
@@ -0,0 +1,22 @@
+from enum import Enum
+
+
+class ColumnType(str, Enum):
+    """
+    Type imported values of a column are coerced to, see TypeCoercionService:
+    - number: integer or decimal text becomes a JSON number, int when it has no fraction or exponent
+    - json: JSON object or array text becomes the parsed object or array
+    """
+    NUMBER = "number"
+    JSON = "json"
+
+
+# Typed columns of assets/company-dataset.csv. Other columns are stored as imported.
+COMPANY_SCHEMA = {
+    "founded_year": ColumnType.NUMBER,
+    "total_employees": ColumnType.NUMBER,
+    "employee_rowth_2Y": ColumnType.NUMBER,
+    "employee_growth_1Y": ColumnType.NUMBER,
+    "employee_growth_6M": ColumnType.NUMBER,
+    "employee_locations": ColumnType.JSON,
+}
@@ -6,8 +6,27 @@ class ImportSummary(BaseModel):
     Represents a summary of an import operation.
 
     Attributes:
-        rows_inserted (int): The number of rows successfully inserted into the database.
+        rows_inserted (int): The number of new companies inserted into the database.
         rows_read (int): The total number of rows read from the source file.
+        rows_updated (int): The number of existing companies whose content changed and was rewritten.
+        rows_unchanged (int): The number of existing companies whose content was identical and left untouched.
     """
     rows_inserted: int
     rows_read: int
+    rows_updated: int = 0
+    rows_unchanged: int = 0
+
+    def combine(self, other: "ImportSummary") -> "ImportSummary":
+        """
+        Adds up the counts of two summaries, to accumulate an import done in batches.
+
+        Args:
+            other (ImportSummary): Summary of another batch.
+
+        Returns:
+            ImportSummary: The summary of both batches.
+        """
+        return ImportSummary(rows_inserted=self.rows_inserted + other.rows_inserted,
+                             rows_read=self.rows_read + other.rows_read,
+                             rows_updated=self.rows_updated + other.rows_updated,
+                             rows_unchanged=self.rows_unchanged + other.rows_unchanged)
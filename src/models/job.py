@@ -0,0 +1,96 @@
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class JobKind(str, Enum):
+    """
+    Operation run by a background job.
+    """
+    IMPORT = "import"
+    PROCESS = "process"
+
+
+class JobStatus(str, Enum):
+    """
+    Lifecycle of a background job. Queued and running jobs are resumed after a restart.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportFormat(str, Enum):
+    """
+    Format of the body spooled for an import job.
+    """
+    CSV = "csv"
+    JSON = "json"
+    NDJSON = "ndjson"
+
+
+class Job(BaseModel):
+    """
+    Represents a background job and its progress.
+
+    Attributes:
+        id (str): The job identifier.
+        kind (JobKind): Operation run by the job.
+        status (JobStatus): Current status of the job.
+        rows_done (int): Rows committed so far.
+        rows_total (Optional[int]): Total rows to process, known once a process job has started
+                                    and once an import job has read its whole upload.
+        throughput (Optional[float]): Rows committed per second since the job last started.
+        eta_seconds (Optional[float]): Estimated seconds until the job completes.
+        error (Optional[str]): Why the job failed.
+        created_date (str): When the job was submitted.
+        started_date (Optional[str]): When the job last started or resumed.
+        finished_date (Optional[str]): When the job completed or failed.
+    """
+    id: str
+    kind: JobKind
+    status: JobStatus
+    rows_done: int
+    rows_total: Optional[int] = None
+    throughput: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    error: Optional[str] = None
+    created_date: str
+    started_date: Optional[str] = None
+    finished_date: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Job":
+        """
+        Maps a company.job row, selected with JOB_COLUMNS, to a Job model.
+        Throughput and ETA are derived from the rows committed since the job last started.
+
+        Args:
+            row (tuple): A row selected from company.job.
+
+        Returns:
+            Job: The mapped model.
+        """
+        (job_id, kind, status, _, _, error, rows_total, rows_done, started_rows,
+         created_date, started_date, updated_date, finished_date) = row
+
+        throughput = None
+        eta_seconds = None
+        if started_date is not None and updated_date is not None and updated_date > started_date:
+            throughput = (rows_done - started_rows) / (updated_date - started_date).total_seconds()
+            if rows_total is not None and throughput > 0 and status == JobStatus.RUNNING:
+                eta_seconds = (rows_total - rows_done) / throughput
+
+        return cls(id=job_id,
+                   kind=kind,
+                   status=status,
+                   rows_done=rows_done,
+                   rows_total=rows_total,
+                   throughput=throughput,
+                   eta_seconds=eta_seconds,
+                   error=error,
+                   created_date=str(created_date),
+                   started_date=str(started_date) if started_date is not None else None,
+                   finished_date=str(finished_date) if finished_date is not None else None)
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, field_validator
+
+
+class KeywordSet(BaseModel):
+    """
+    Named set of keywords detected in the text fields of a company, producing a boolean feature
+    that is True when any of the keywords appears in any of the fields (case-insensitive substring).
+
+    Attributes:
+        feature_name (str): Name of the boolean feature added to the company.
+        fields (list[str]): Company fields searched for the keywords.
+        keywords (list[str]): Keywords of the set.
+        on_import (bool): Whether the feature is computed on import, or only when a rule uses it.
+    """
+    feature_name: str
+    fields: list[str]
+    keywords: list[str]
+    on_import: bool = True
+
+    @field_validator("keywords")
+    @classmethod
+    def check_keywords(cls, keywords: list[str]) -> list[str]:
+        """
+        Rejects empty keywords, which would match every company.
+        """
+        if any(not keyword for keyword in keywords):
+            raise ValueError("Keywords must not be empty")
+        return keywords
@@ -0,0 +1,31 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class ProcessFailure(BaseModel):
+    """
+    Describes a company whose processed variables could not be saved.
+
+    Attributes:
+        url (str): The URL of the company.
+        error (str): Why the company could not be saved.
+    """
+    url: str
+    error: str
+
+
+class ProcessResponse(BaseModel):
+    """
+    Response model of a process-company operation.
+
+    Attributes:
+        companies (list[dict[str, Any]]): Processed variables of each company saved successfully.
+        failures (list[ProcessFailure]): Companies that could not be saved and can be resubmitted.
+        recomputed (list[str]): URLs of the companies whose rules were evaluated by this request. The others
+                                were served from the result stored by a previous run with the same rules
+                                and the same company content.
+    """
+    companies: list[dict[str, Any]]
+    failures: list[ProcessFailure] = []
+    recomputed: list[str] = []
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from src.models.rules import Rule
+
+
+class RuleSet(BaseModel):
+    """
+    A registered rule set, addressed by its id or by its fingerprint.
+
+    Attributes:
+        id (int): The rule set identifier.
+        fingerprint (str): SHA-256 of the canonical rules, the same for every registration of equal rules.
+        rule_count (int): Number of rules of the set.
+        created_date (datetime): When the rule set was first registered.
+        rules (Optional[list[Rule]]): The rules, only returned when the rule set is retrieved.
+    """
+    id: int
+    fingerprint: str
+    rule_count: int
+    created_date: datetime
+    rules: Optional[list[Rule]] = None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "RuleSet":
+        """
+        Maps a company.rule_set row (id, fingerprint, rules, created_date) to a RuleSet model.
+
+        Args:
+            row (tuple): A row selected from company.rule_set.
+
+        Returns:
+            RuleSet: The mapped model.
+        """
+        rule_set_id, rules_fingerprint, rules, created_date = row
+        return cls(id=rule_set_id, fingerprint=rules_fingerprint, rule_count=len(rules), created_date=created_date,
+                   rules=[Rule.model_validate(rule) for rule in rules])
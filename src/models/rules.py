@@ -1,3 +1,4 @@
+from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel
@@ -52,3 +53,14 @@ class Rule(BaseModel):
     operation: Operation
     match: int
     default: int
+
+
+class ExecutionMode(str, Enum):
+    """
+    Where the rules of a process-company request are evaluated:
+    - python: company content is fetched and the rules run in the application
+    - database: the rules are translated to SQL and run inside PostgreSQL,
+      so company content never leaves the database
+    """
+    PYTHON = "python"
+    DATABASE = "database"
@@ -0,0 +1,215 @@
+from datetime import datetime
+from typing import Any, Optional, AsyncIterator
+
+import psycopg
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from src.commons.config import DB_FETCH_CHUNK_SIZE, DB_WRITE_CHUNK_SIZE, DB_CURSOR_BATCH_SIZE
+from src.core.database.async_database import AsyncDatabase
+from src.core.database.schema import CREATE_IMPORT_STAGING_TABLE, COPY_INTO_IMPORT_STAGING, MERGE_IMPORT_STAGING, \
+    SELECT_COMPANY_BY_URL, UPDATE_PROCESSED_DATA, SELECT_PREVIOUSLY_PROCESSED, SELECT_PREVIOUSLY_PROCESSED_PAGE, \
+    SELECT_PREVIOUSLY_PROCESSED_ORDERED, SELECT_COMPANIES_BY_URLS, UPDATE_PROCESSED_DATA_IN_BATCH, \
+    UPDATE_PROCESSED_DATA_WITH_RULES, INSERT_PROCESSING_RUN, UPDATE_PROCESSING_RUN, SELECT_COMPANIES_TO_PROCESS, \
+    NOTIFY_COMPANY_DATA_CHANGED, SELECT_COMPANY_CONTENTS_BY_URLS, SELECT_PROCESSING_STATE
+from src.repositories.company_cache import CompanyCache, build_invalidation_payloads
+from src.repositories.company_repository import CompanyRepository, iter_chunks
+
+
+class AsyncCompanyRepository:
+    """
+    Asynchronous counterpart of CompanyRepository, running the same statements through an
+    AsyncDatabase so callers can await them. Rows are built and parsed by the static methods of
+    CompanyRepository, and the CPU-bound ones (COPY rendering, result serialization) run in the
+    thread pool so they do not block the event loop.
+    """
+
+    def __init__(self, db: AsyncDatabase, cache: Optional[CompanyCache] = None):
+        """
+        Initializes the repository with an asynchronous database instance.
+
+        Args:
+            db (AsyncDatabase): The asynchronous database connection wrapper.
+            cache (CompanyCache, optional): Cache of company rows shared by the repositories of the worker.
+        """
+        self.__db = db
+        self.__cache = cache
+
+    def transaction(self):
+        """
+        See CompanyRepository.transaction.
+        """
+        return self.__db.transaction()
+
+    async def upsert_data(self, data: list[dict[str, Any]]) -> tuple[int, int, int]:
+        """
+        See CompanyRepository.upsert_data. COPY blocks are rendered in the thread pool while they are sent.
+        """
+        if not data:
+            return 0, 0, 0
+        async with self.__db.transaction():
+            await self.__db.execute(CREATE_IMPORT_STAGING_TABLE)
+            await self.__db.copy_from(COPY_INTO_IMPORT_STAGING,
+                                      iterate_in_threadpool(CompanyRepository.build_copy_chunks(data)))
+            counts = CompanyRepository.build_import_counts(await self.__db.fetch_one(MERGE_IMPORT_STAGING))
+            await self.__imported([row["url"] for row in data])
+            return counts
+
+    async def create_run(self, processed_date: datetime) -> int:
+        """
+        See CompanyRepository.create_run.
+        """
+        async with self.__db.transaction():
+            return (await self.__db.fetch_one(INSERT_PROCESSING_RUN, (processed_date,)))[0]
+
+    async def upsert_processed_data(self, url: str, last_processed_date: datetime, processed: dict[str, Any],
+                                    run_id: Optional[int] = None) -> int:
+        """
+        See CompanyRepository.upsert_processed_data.
+        """
+        async with self.__db.transaction():
+            return await self.__db.execute(UPDATE_PROCESSED_DATA,
+                                           CompanyRepository.build_processed_values(url, last_processed_date,
+                                                                                    processed, run_id))
+
+    async def upsert_processed_data_in_batch(self, processed_by_url: dict[str, dict[str, Any]],
+                                             last_processed_date: datetime, run_id: int,
+                                             rules_fingerprint: Optional[str] = None,
+                                             content_hashes: Optional[dict[str, str]] = None) -> dict[str, str]:
+        """
+        See CompanyRepository.upsert_processed_data_in_batch. Variables are serialized in the thread pool.
+        """
+        rows, failures = await run_in_threadpool(CompanyRepository.build_processed_batch, processed_by_url,
+                                                 content_hashes)
+        async with self.__db.transaction():
+            for chunk in iter_chunks(rows, DB_WRITE_CHUNK_SIZE):
+                try:
+                    async with self.__db.transaction():
+                        saved = await self.__update_processed_chunk(chunk, last_processed_date, run_id,
+                                                                    rules_fingerprint)
+                except psycopg.DatabaseError:
+                    saved = await self.__update_processed_rows(chunk, last_processed_date, run_id,
+                                                               rules_fingerprint, failures)
+                CompanyRepository.add_not_found(chunk, saved, failures)
+        return failures
+
+    async def __update_processed_chunk(self, chunk: list[tuple[str, str, Optional[str]]], last_processed_date: datetime,
+                                       run_id: int, rules_fingerprint: Optional[str]) -> set[str]:
+        """
+        Runs UPDATE_PROCESSED_DATA_IN_BATCH for a chunk of (url, processed json, content hash) rows.
+
+        Returns:
+            set of str: URLs of the companies actually updated.
+        """
+        urls, payloads, content_hashes = (list(column) for column in zip(*chunk))
+        updated = await self.__db.fetch_all(UPDATE_PROCESSED_DATA_IN_BATCH,
+                                            (last_processed_date, run_id, rules_fingerprint, urls, payloads,
+                                             content_hashes))
+        return {row[0] for row in updated}
+
+    async def __update_processed_rows(self, chunk: list[tuple[str, str, Optional[str]]], last_processed_date: datetime,
+                                      run_id: int, rules_fingerprint: Optional[str],
+                                      failures: dict[str, str]) -> set[str]:
+        """
+        Fallback for a failed chunk: updates each row in its own savepoint and records
+        the error of every row that still fails.
+
+        Returns:
+            set of str: URLs of the companies actually updated.
+        """
+        saved = set()
+        for row in chunk:
+            try:
+                async with self.__db.transaction():
+                    saved |= await self.__update_processed_chunk([row], last_processed_date, run_id, rules_fingerprint)
+            except psycopg.DatabaseError as error:
+                failures[row[0]] = CompanyRepository.build_failure(error)
+        return saved
+
+    async def process_in_database(self, urls: list[str], processed_variables: str, params: list[Any],
+                                  last_processed_date: datetime, run_id: int, rules_fingerprint: Optional[str] = None
+                                  ) -> tuple[dict[str, dict[str, Any]], set[str]]:
+        """
+        See CompanyRepository.process_in_database.
+        """
+        command = UPDATE_PROCESSED_DATA_WITH_RULES.format(processed_variables=processed_variables)
+        async with self.__db.transaction():
+            updated = await self.__db.fetch_all(command, (*params, last_processed_date, run_id, rules_fingerprint,
+                                                          rules_fingerprint, list(dict.fromkeys(urls))))
+        return CompanyRepository.build_processed_in_database(updated)
+
+    async def assign_run(self, urls: list[str], last_processed_date: datetime, run_id: int):
+        """
+        See CompanyRepository.assign_run.
+        """
+        if not urls:
+            return
+        async with self.__db.transaction():
+            await self.__db.execute(UPDATE_PROCESSING_RUN, (last_processed_date, run_id, urls))
+
+    async def __imported(self, urls: list[str]):
+        """
+        Invalidates imported companies in the cache, and notifies the other workers in the
+        current transaction so they invalidate them once it commits.
+        """
+        if self.__cache is None or not urls:
+            return
+        await self.__db.execute(NOTIFY_COMPANY_DATA_CHANGED, (build_invalidation_payloads(urls),))
+        self.__cache.invalidate(urls)
+
+    async def fetch_by_url(self, url: str):
+        """
+        See CompanyRepository.fetch_by_url.
+        """
+        return await self.__db.fetch_one(SELECT_COMPANY_BY_URL, (url,))
+
+    async def fetch_by_urls(self, urls: list[str]) -> dict[str, tuple]:
+        """
+        See CompanyRepository.fetch_by_urls.
+        """
+        return await self.__fetch_in_chunks(SELECT_COMPANIES_BY_URLS, list(dict.fromkeys(urls)))
+
+    async def __fetch_in_chunks(self, query: str, urls: list[str], *params: Any) -> dict[str, tuple]:
+        """
+        Runs a query selecting companies by URL for chunks of DB_FETCH_CHUNK_SIZE unique URLs,
+        passing the chunk after `params`.
+
+        Returns:
+            dict: Mapping from URL, the first column, to row.
+        """
+        companies = {}
+        for chunk in iter_chunks(urls, DB_FETCH_CHUNK_SIZE):
+            for company in await self.__db.fetch_all(query, (*params, chunk)):
+                companies[company[0]] = company
+        return companies
+
+    async def fetch_for_processing(self, urls: list[str], rules_fingerprint: str) -> dict[str, tuple]:
+        """
+        See CompanyRepository.fetch_for_processing.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        if self.__cache is None:
+            return await self.__fetch_in_chunks(SELECT_COMPANIES_TO_PROCESS, unique_urls, rules_fingerprint)
+
+        states = await self.__fetch_in_chunks(SELECT_PROCESSING_STATE, unique_urls, rules_fingerprint)
+        generation = self.__cache.generation
+        contents = CompanyRepository.select_unchanged_contents(states, self.__cache.get_many(states))
+        fetched = await self.__fetch_in_chunks(SELECT_COMPANY_CONTENTS_BY_URLS,
+                                               [url for url in states if url not in contents])
+        self.__cache.put_many(fetched, generation)
+        contents.update(fetched)
+        return CompanyRepository.build_processing_rows(states, contents)
+
+    async def get_companies_previously_processed(self, limit: Optional[int] = None, after: Optional[str] = None):
+        """
+        See CompanyRepository.get_companies_previously_processed.
+        """
+        if limit is None:
+            return await self.__db.fetch_all(SELECT_PREVIOUSLY_PROCESSED)
+        return await self.__db.fetch_all(SELECT_PREVIOUSLY_PROCESSED_PAGE, (after, after, limit))
+
+    async def iter_companies_previously_processed(self) -> AsyncIterator[list[tuple]]:
+        """
+        See CompanyRepository.iter_companies_previously_processed.
+        """
+        async for rows in self.__db.fetch_batches(SELECT_PREVIOUSLY_PROCESSED_ORDERED, batch_size=DB_CURSOR_BATCH_SIZE):
+            yield rows
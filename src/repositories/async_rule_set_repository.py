@@ -0,0 +1,50 @@
+import json
+from datetime import datetime
+from typing import Any, Optional, Union
+
+from src.core.database.async_database import AsyncDatabase
+from src.core.database.schema import UPSERT_RULE_SET
+from src.repositories.rule_set_repository import RuleSetRepository
+
+
+class AsyncRuleSetRepository:
+    """
+    Asynchronous counterpart of RuleSetRepository, running the same statements
+    through an AsyncDatabase so callers can await them.
+    """
+
+    def __init__(self, db: AsyncDatabase):
+        """
+        Initializes the repository with an asynchronous database instance.
+
+        Args:
+            db (AsyncDatabase): The asynchronous database connection wrapper.
+        """
+        self.__db = db
+
+    async def register(self, rules_fingerprint: str, rules: list[dict[str, Any]]) -> tuple:
+        """
+        Stores a rule set, unless a rule set with the same fingerprint is already stored.
+
+        Args:
+            rules_fingerprint (str): Fingerprint of the canonical rules.
+            rules (list of dict): The rules, as dumped from Rule models.
+
+        Returns:
+            tuple: (id, fingerprint, created_date) of the stored rule set.
+        """
+        async with self.__db.transaction():
+            return await self.__db.fetch_one(UPSERT_RULE_SET, (rules_fingerprint, json.dumps(rules), datetime.now()))
+
+    async def fetch(self, reference: Union[int, str]) -> Optional[tuple]:
+        """
+        Retrieves a rule set by id or by fingerprint.
+
+        Args:
+            reference (int or str): Id of the rule set, or its fingerprint.
+
+        Returns:
+            tuple or None: (id, fingerprint, rules, created_date) if found, else None.
+        """
+        lookup = RuleSetRepository.build_lookup(reference)
+        return await self.__db.fetch_one(*lookup) if lookup is not None else None
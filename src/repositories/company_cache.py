@@ -0,0 +1,226 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+
+# NOTIFY payloads are limited to 8000 bytes; an empty payload asks every worker to clear its cache
+NOTIFY_PAYLOAD_MAX_BYTES = 7900
+INVALIDATE_ALL = ""
+
+
+class CompanyCache:
+    """
+    Thread-safe, in-process LRU cache of the imported columns of companies (url, name, content, content_hash)
+    keyed by URL, shared by the repositories of a worker. Processing results are never cached, so saving
+    them leaves the cache untouched.
+
+    The cache is bounded both in entries and in estimated bytes, and entries expire after a TTL,
+    which bounds how long a row changed by another worker can be served if its notification is late.
+    Imports made through the repositories invalidate their URLs in this worker and notify the other
+    workers (see build_invalidation_payloads and NotificationListener).
+
+    Rows read from the database are only stored if no invalidation happened since the read started,
+    so a read racing with a write never caches the row the write replaced.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries (int): Maximum number of rows kept.
+            max_bytes (int): Maximum estimated size of the rows kept, in bytes.
+            ttl (float): Seconds a row is served after being read from the database.
+            clock (Callable): Monotonic time source, in seconds.
+        """
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__entries: OrderedDict[str, tuple[tuple, int, float]] = OrderedDict()
+        self.__bytes = 0
+        self.__generation = 0
+        self.__serving = True
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+        self.__invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        """
+        Counter of invalidations, read before querying the database and handed back to `put_many`.
+        """
+        return self.__generation
+
+    def get_many(self, urls: Iterable[str]) -> dict[str, tuple]:
+        """
+        Returns the cached rows of the given URLs, marking them as recently used.
+
+        Args:
+            urls (Iterable of str): URLs looked up.
+
+        Returns:
+            dict: Mapping from URL to cached row. URLs not cached, or expired, are absent.
+        """
+        found = {}
+        now = self.__clock()
+        with self.__lock:
+            for url in urls:
+                entry = self.__entries.get(url) if self.__serving else None
+                if entry is not None and entry[2] <= now:
+                    self.__remove(url)
+                    self.__expirations += 1
+                    entry = None
+                if entry is None:
+                    self.__misses += 1
+                    continue
+                self.__entries.move_to_end(url)
+                self.__hits += 1
+                found[url] = entry[0]
+        return found
+
+    def put_many(self, rows: dict[str, tuple], generation: int):
+        """
+        Stores rows read from the database, evicting the least recently used rows beyond the bounds.
+        Nothing is stored when an invalidation happened since `generation` was read.
+
+        Args:
+            rows (dict): Mapping from URL to row.
+            generation (int): Value of `generation` read before the rows were queried.
+        """
+        expires_at = self.__clock() + self.__ttl
+        with self.__lock:
+            if not self.__serving or generation != self.__generation:
+                return
+            for url, row in rows.items():
+                size = estimate_size(row)
+                if size > self.__max_bytes:
+                    continue
+                self.__remove(url)
+                self.__entries[url] = (row, size, expires_at)
+                self.__bytes += size
+            while len(self.__entries) > self.__max_entries or self.__bytes > self.__max_bytes:
+                _, (_, size, _) = self.__entries.popitem(last=False)
+                self.__bytes -= size
+                self.__evictions += 1
+
+    def invalidate(self, urls: Iterable[str]):
+        """
+        Drops the rows of the given URLs, after they were written.
+
+        Args:
+            urls (Iterable of str): URLs of the companies written.
+        """
+        with self.__lock:
+            self.__generation += 1
+            for url in urls:
+                if self.__remove(url):
+                    self.__invalidations += 1
+
+    def clear(self):
+        """
+        Drops every row.
+        """
+        with self.__lock:
+            self.__generation += 1
+            self.__invalidations += len(self.__entries)
+            self.__entries.clear()
+            self.__bytes = 0
+
+    def suspend(self):
+        """
+        Clears the cache and stops serving and storing rows, while invalidations may be missed.
+        """
+        with self.__lock:
+            self.__serving = False
+        self.clear()
+
+    def resume(self):
+        """
+        Clears the cache, whose rows may have missed invalidations, and serves rows again.
+        """
+        self.clear()
+        with self.__lock:
+            self.__serving = True
+
+    def on_notification(self, payload: str):
+        """
+        Applies an invalidation notified by a worker, as built by `build_invalidation_payloads`.
+
+        Args:
+            payload (str): Newline-separated URLs, or INVALIDATE_ALL.
+        """
+        if payload == INVALIDATE_ALL:
+            self.clear()
+        else:
+            self.invalidate(payload.split("\n"))
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict: Counters of hits, misses, evictions, expirations and invalidations since startup,
+                  and the current number of entries and estimated bytes.
+        """
+        with self.__lock:
+            return {"hits": self.__hits,
+                    "misses": self.__misses,
+                    "evictions": self.__evictions,
+                    "expirations": self.__expirations,
+                    "invalidations": self.__invalidations,
+                    "entries": len(self.__entries),
+                    "bytes": self.__bytes,
+                    "serving": self.__serving}
+
+    def __remove(self, url: str) -> bool:
+        """Removes an entry if present. Must be called with the lock held."""
+        entry = self.__entries.pop(url, None)
+        if entry is None:
+            return False
+        self.__bytes -= entry[1]
+        return True
+
+
+def build_invalidation_payloads(urls: Iterable[str]) -> list[str]:
+    """
+    Packs the URLs of written companies into NOTIFY payloads of at most NOTIFY_PAYLOAD_MAX_BYTES bytes.
+
+    Args:
+        urls (Iterable of str): URLs of the companies written.
+
+    Returns:
+        list of str: Newline-separated URLs per payload. A URL that cannot fit in a payload
+                     turns the whole notification into a single INVALIDATE_ALL.
+    """
+    payloads, current, current_bytes = [], [], 0
+    for url in dict.fromkeys(urls):
+        size = len(url.encode("utf-8")) + 1
+        if size > NOTIFY_PAYLOAD_MAX_BYTES or "\n" in url:
+            return [INVALIDATE_ALL]
+        if current_bytes + size > NOTIFY_PAYLOAD_MAX_BYTES:
+            payloads.append("\n".join(current))
+            current, current_bytes = [], 0
+        current.append(url)
+        current_bytes += size
+    if current:
+        payloads.append("\n".join(current))
+    return payloads
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimates the memory held by a row, following tuples, lists and dictionaries.
+
+    Args:
+        value (Any): A row, or a value of a row.
+
+    Returns:
+        int: Estimated size in bytes.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
+    return size
@@ -1,10 +1,37 @@
 import json
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterator, Optional
 
+import psycopg2
+
+from src.commons.config import DB_FETCH_CHUNK_SIZE, DB_WRITE_CHUNK_SIZE, DB_CURSOR_BATCH_SIZE
+from src.commons.hash_utils import canonical_json, sha256_hex
 from src.core.database.database import Database
-from src.core.database.schema import UPSERT_DATA_IN_BATCH, SELECT_COMPANY_BY_URL, UPDATE_PROCESSED_DATA, \
-    SELECT_PREVIOUSLY_PROCESSED
+from src.core.database.schema import CREATE_IMPORT_STAGING_TABLE, COPY_INTO_IMPORT_STAGING, MERGE_IMPORT_STAGING, \
+    SELECT_COMPANY_BY_URL, UPDATE_PROCESSED_DATA, SELECT_PREVIOUSLY_PROCESSED, SELECT_PREVIOUSLY_PROCESSED_PAGE, \
+    SELECT_PREVIOUSLY_PROCESSED_ORDERED, SELECT_COMPANIES_BY_URLS, UPDATE_PROCESSED_DATA_IN_BATCH, \
+    UPDATE_PROCESSED_DATA_WITH_RULES, INSERT_PROCESSING_RUN, UPDATE_PROCESSING_RUN, SELECT_COMPANIES_TO_PROCESS, \
+    NOTIFY_COMPANY_DATA_CHANGED, SELECT_COMPANY_CONTENTS_BY_URLS, SELECT_PROCESSING_STATE
+from src.models.company_record import CompanyRecord
+from src.repositories.company_cache import CompanyCache, build_invalidation_payloads
+
+COMPANY_NOT_FOUND = "Company not found"
+COPY_ROWS_PER_CHUNK = 1000
+
+
+def iter_chunks(items: list, size: int) -> Iterator[list]:
+    """
+    Splits a list in consecutive chunks of at most `size` items.
+
+    Args:
+        items (list): The items to split.
+        size (int): Maximum number of items per chunk.
+
+    Yields:
+        list: A chunk of items.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 
 class CompanyRepository:
@@ -13,37 +40,67 @@ class CompanyRepository:
     in the database.
     """
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, cache: Optional[CompanyCache] = None):
         """
         Initializes the repository with a database instance.
 
+        With a cache, processing reads the imported columns of the companies from it, and imports
+        invalidate the companies they change, in this worker and, through NOTIFY, in the other workers.
+
         Args:
             db (Database): The database connection wrapper.
+            cache (CompanyCache, optional): Cache of company rows shared by the repositories of the worker.
         """
         self.__db = db
+        self.__cache = cache
+
+    def transaction(self):
+        """
+        Groups the writes of the repository executed in the block into one transaction,
+        see Database.transaction.
+        """
+        return self.__db.transaction()
 
     def upsert_data(self, data: list[dict[str, Any]]):
         """
         Inserts or updates company data in batch.
 
+        Rows are streamed into a temporary staging table with COPY and merged into
+        company_data with a single INSERT ... ON CONFLICT statement, in one transaction.
+        When a URL appears more than once, the last occurrence wins.
+        Companies whose content hash did not change are not rewritten.
+
         Args:
             data (list of dict): List of dictionaries, each representing company data.
 
         Returns:
-            int: Number of rows affected by the batch upsert operation.
+            tuple: Number of companies inserted, updated and left unchanged.
+        """
+        if not data:
+            return 0, 0, 0
+        with self.__db.transaction():
+            self.__db.execute(CREATE_IMPORT_STAGING_TABLE)
+            self.__db.copy_from(COPY_INTO_IMPORT_STAGING, self.build_copy_chunks(data))
+            counts = self.build_import_counts(self.__db.fetch_one(MERGE_IMPORT_STAGING))
+            self.__imported([row["url"] for row in data])
+            return counts
+
+    def create_run(self, processed_date: datetime) -> int:
+        """
+        Registers a processing run. Companies saved by the run point to it, so the latest
+        run can be resolved from the run_id index.
+
+        Args:
+            processed_date (datetime): Timestamp of the run.
+
+        Returns:
+            int: The run identifier.
         """
-        values = [
-            (row["url"],
-             row["company_name"],
-             json.dumps(row),
-             None,
-             datetime.now(),
-             None)
-            for row in data
-        ]
-        return self.__db.execute_insert_many(UPSERT_DATA_IN_BATCH, values)
+        with self.__db.transaction():
+            return self.__db.fetch_one(INSERT_PROCESSING_RUN, (processed_date,))[0]
 
-    def upsert_processed_data(self, url: str, last_processed_date: datetime, processed: dict[str, Any]):
+    def upsert_processed_data(self, url: str, last_processed_date: datetime, processed: dict[str, Any],
+                              run_id: Optional[int] = None):
         """
         Updates the processed data and last processed date for a company identified by URL.
 
@@ -51,14 +108,137 @@ class CompanyRepository:
             url (str): The unique URL of the company.
             last_processed_date (datetime): Timestamp of last processing.
             processed (dict): Processed variables stored as JSON.
+            run_id (int, optional): The processing run saving the data.
 
         Returns:
             int: Number of rows affected by the update.
         """
-        values = (json.dumps(processed),
-                  last_processed_date,
-                  url)
-        return self.__db.execute(UPDATE_PROCESSED_DATA, values)
+        with self.__db.transaction():
+            return self.__db.execute(UPDATE_PROCESSED_DATA,
+                                     self.build_processed_values(url, last_processed_date, processed, run_id))
+
+    def upsert_processed_data_in_batch(self, processed_by_url: dict[str, dict[str, Any]],
+                                       last_processed_date: datetime, run_id: int,
+                                       rules_fingerprint: Optional[str] = None,
+                                       content_hashes: Optional[dict[str, str]] = None) -> dict[str, str]:
+        """
+        Saves the processed variables of many companies in a single transaction,
+        running one UPDATE statement per chunk of DB_WRITE_CHUNK_SIZE companies.
+
+        A chunk that fails is retried row by row inside savepoints, so one bad row
+        does not discard the rest of the batch.
+
+        The rule set fingerprint and the content hash of each company are recorded with the
+        result, so the next run with the same rules can reuse it while the content is unchanged.
+
+        Args:
+            processed_by_url (dict): Mapping from company URL to its processed variables.
+            last_processed_date (datetime): Timestamp of last processing.
+            run_id (int): The processing run saving the data.
+            rules_fingerprint (str, optional): Fingerprint of the rule set that computed the variables.
+            content_hashes (dict, optional): Mapping from company URL to the hash of the evaluated content.
+
+        Returns:
+            dict: Mapping from URL to error message for every company that was not saved.
+        """
+        rows, failures = self.build_processed_batch(processed_by_url, content_hashes)
+        with self.__db.transaction():
+            for chunk in iter_chunks(rows, DB_WRITE_CHUNK_SIZE):
+                try:
+                    with self.__db.transaction():
+                        saved = self.__update_processed_chunk(chunk, last_processed_date, run_id,
+                                                              rules_fingerprint)
+                except psycopg2.DatabaseError:
+                    saved = self.__update_processed_rows(chunk, last_processed_date, run_id,
+                                                         rules_fingerprint, failures)
+                self.add_not_found(chunk, saved, failures)
+        return failures
+
+    def __update_processed_chunk(self, chunk: list[tuple[str, str, Optional[str]]], last_processed_date: datetime,
+                                 run_id: int, rules_fingerprint: Optional[str]) -> set[str]:
+        """
+        Runs UPDATE_PROCESSED_DATA_IN_BATCH for a chunk of (url, processed json, content hash) rows.
+
+        Returns:
+            set of str: URLs of the companies actually updated.
+        """
+        urls, payloads, content_hashes = (list(column) for column in zip(*chunk))
+        updated = self.__db.fetch_all(UPDATE_PROCESSED_DATA_IN_BATCH,
+                                      (last_processed_date, run_id, rules_fingerprint, urls, payloads,
+                                       content_hashes))
+        return {row[0] for row in updated}
+
+    def __update_processed_rows(self, chunk: list[tuple[str, str, Optional[str]]], last_processed_date: datetime,
+                                run_id: int, rules_fingerprint: Optional[str], failures: dict[str, str]) -> set[str]:
+        """
+        Fallback for a failed chunk: updates each row in its own savepoint and records
+        the error of every row that still fails.
+
+        Returns:
+            set of str: URLs of the companies actually updated.
+        """
+        saved = set()
+        for row in chunk:
+            try:
+                with self.__db.transaction():
+                    saved |= self.__update_processed_chunk([row], last_processed_date, run_id, rules_fingerprint)
+            except psycopg2.DatabaseError as error:
+                failures[row[0]] = self.build_failure(error)
+        return saved
+
+    def process_in_database(self, urls: list[str], processed_variables: str, params: list[Any],
+                            last_processed_date: datetime, run_id: int,
+                            rules_fingerprint: Optional[str] = None) -> tuple[dict[str, dict[str, Any]], set[str]]:
+        """
+        Computes and saves the processed variables of many companies with a single UPDATE,
+        so their content is never transferred out of the database.
+
+        Companies whose stored variables were computed by the same rule set from the same
+        content keep them, and are only moved to the run.
+
+        Args:
+            urls (list of str): The unique URLs of the companies. URLs not found are ignored.
+            processed_variables (str): SQL expression computing the processed variables of a row,
+                                       as built by RulesProcessorService.compile_rules_to_sql.
+            params (list): Parameters of the processed_variables expression.
+            last_processed_date (datetime): Timestamp of last processing.
+            run_id (int): The processing run saving the data.
+            rules_fingerprint (str, optional): Fingerprint of the rule set. Every company is recomputed when None.
+
+        Returns:
+            tuple: Mapping from URL to the processed variables of that company,
+                   and the URLs of the companies whose variables were recomputed.
+        """
+        command = UPDATE_PROCESSED_DATA_WITH_RULES.format(processed_variables=processed_variables)
+        with self.__db.transaction():
+            updated = self.__db.fetch_all(command, (*params, last_processed_date, run_id, rules_fingerprint,
+                                                    rules_fingerprint, list(dict.fromkeys(urls))))
+        return self.build_processed_in_database(updated)
+
+    def assign_run(self, urls: list[str], last_processed_date: datetime, run_id: int):
+        """
+        Moves companies to a processing run without rewriting their processed variables,
+        for companies whose stored variables are still current.
+
+        Args:
+            urls (list of str): The unique URLs of the companies.
+            last_processed_date (datetime): Timestamp of last processing.
+            run_id (int): The processing run.
+        """
+        if not urls:
+            return
+        with self.__db.transaction():
+            self.__db.execute(UPDATE_PROCESSING_RUN, (last_processed_date, run_id, urls))
+
+    def __imported(self, urls: list[str]):
+        """
+        Invalidates imported companies in the cache, and notifies the other workers in the
+        current transaction so they invalidate them once it commits.
+        """
+        if self.__cache is None or not urls:
+            return
+        self.__db.execute(NOTIFY_COMPANY_DATA_CHANGED, (build_invalidation_payloads(urls),))
+        self.__cache.invalidate(urls)
 
     def fetch_by_url(self, url: str):
         """
@@ -72,12 +252,264 @@ class CompanyRepository:
         """
         return self.__db.fetch_one(SELECT_COMPANY_BY_URL, (url,))
 
-    def get_companies_previously_processed(self):
+    def fetch_by_urls(self, urls: list[str]) -> dict[str, tuple]:
+        """
+        Retrieves the company records for many URLs at once, one query per chunk of
+        DB_FETCH_CHUNK_SIZE URLs instead of one query per URL.
+
+        Args:
+            urls (list of str): The unique URLs of the companies. Duplicates are fetched once.
+
+        Returns:
+            dict: Mapping from URL to company record. URLs not found are absent.
+        """
+        return self.__fetch_in_chunks(SELECT_COMPANIES_BY_URLS, list(dict.fromkeys(urls)))
+
+    def __fetch_in_chunks(self, query: str, urls: list[str], *params: Any) -> dict[str, tuple]:
+        """
+        Runs a query selecting companies by URL for chunks of DB_FETCH_CHUNK_SIZE unique URLs,
+        passing the chunk after `params`.
+
+        Returns:
+            dict: Mapping from URL, the first column, to row.
         """
-        Retrieves all companies that have previously been processed.
+        companies = {}
+        for chunk in iter_chunks(urls, DB_FETCH_CHUNK_SIZE):
+            for company in self.__db.fetch_all(query, (*params, chunk)):
+                companies[company[0]] = company
+        return companies
+
+    def fetch_for_processing(self, urls: list[str], rules_fingerprint: str) -> dict[str, tuple]:
+        """
+        Retrieves what processing needs for many URLs at once, one query per chunk of DB_FETCH_CHUNK_SIZE URLs:
+        the content of the companies to evaluate, or the stored processed variables of the companies
+        they were already computed for by the same rule set from the same content.
+        With a cache, only the processing state of the companies is queried, and their imported columns
+        are read from the cache while their content hash is still the stored one.
+
+        Args:
+            urls (list of str): The unique URLs of the companies. Duplicates are fetched once.
+            rules_fingerprint (str): Fingerprint of the rule set.
 
         Returns:
-            list of dict: List of company records.
+            dict: Mapping from URL to (url, name, content, processed_variables, content_hash), where
+                  content is None when processed_variables are current, and processed_variables are
+                  None otherwise. URLs not found are absent.
         """
-        return self.__db.fetch_all(SELECT_PREVIOUSLY_PROCESSED)
+        unique_urls = list(dict.fromkeys(urls))
+        if self.__cache is None:
+            return self.__fetch_in_chunks(SELECT_COMPANIES_TO_PROCESS, unique_urls, rules_fingerprint)
 
+        states = self.__fetch_in_chunks(SELECT_PROCESSING_STATE, unique_urls, rules_fingerprint)
+        generation = self.__cache.generation
+        contents = self.select_unchanged_contents(states, self.__cache.get_many(states))
+        fetched = self.__fetch_in_chunks(SELECT_COMPANY_CONTENTS_BY_URLS,
+                                         [url for url in states if url not in contents])
+        self.__cache.put_many(fetched, generation)
+        contents.update(fetched)
+        return self.build_processing_rows(states, contents)
+
+    def get_companies_previously_processed(self, limit: Optional[int] = None, after: Optional[str] = None):
+        """
+        Retrieves the companies processed by the latest run.
+        With a limit, returns one page of companies ordered by URL, starting after the `after` cursor.
+
+        Args:
+            limit (int, optional): Maximum number of companies returned. All of them when None.
+            after (str, optional): URL of the last company of the previous page.
+
+        Returns:
+            list of tuple: List of company records.
+        """
+        if limit is None:
+            return self.__db.fetch_all(SELECT_PREVIOUSLY_PROCESSED)
+        return self.__db.fetch_all(SELECT_PREVIOUSLY_PROCESSED_PAGE, (after, after, limit))
+
+    def iter_companies_previously_processed(self) -> Iterator[list[tuple]]:
+        """
+        Streams the companies processed by the latest run, ordered by URL, through a
+        server-side cursor in batches of DB_CURSOR_BATCH_SIZE rows.
+
+        Yields:
+            list of tuple: A batch of company records.
+        """
+        for rows in self.__db.fetch_batches(SELECT_PREVIOUSLY_PROCESSED_ORDERED, batch_size=DB_CURSOR_BATCH_SIZE):
+            yield rows
+
+    @staticmethod
+    def build_copy_chunks(data: list[dict[str, Any]], rows_per_chunk: int = COPY_ROWS_PER_CHUNK) -> Iterator[str]:
+        """
+        Lazily renders company data as CSV blocks for COPY_INTO_IMPORT_STAGING.
+        The content is serialized in canonical form and hashed, so identical content
+        always gets the same hash regardless of key order. CompanyRecord rows render their
+        canonical form directly, without being converted to dictionaries.
+        Shared with AsyncCompanyRepository.
+
+        Args:
+            data (list of dict or CompanyRecord): Company data, one mapping per company.
+            rows_per_chunk (int): Number of rows rendered per yielded block.
+
+        Yields:
+            str: CSV-formatted lines (url, name, content, imported_date, content_hash).
+        """
+        imported_date = datetime.now().isoformat()
+        lines = []
+        for row in data:
+            content = row.to_canonical_json() if isinstance(row, CompanyRecord) else canonical_json(row)
+            lines.append(",".join((CompanyRepository.__copy_field(row["url"]),
+                                   CompanyRepository.__copy_field(row["company_name"]),
+                                   CompanyRepository.__copy_field(content),
+                                   imported_date,
+                                   sha256_hex(content))))
+            if len(lines) == rows_per_chunk:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    @staticmethod
+    def select_unchanged_contents(states: dict[str, tuple], cached: dict[str, tuple]) -> dict[str, tuple]:
+        """
+        Keeps the cached rows of SELECT_COMPANY_CONTENTS_BY_URLS whose content hash is the one
+        SELECT_PROCESSING_STATE read, dropping rows an import changed since they were cached.
+        Shared with AsyncCompanyRepository.
+
+        Args:
+            states (dict): Mapping from URL to (url, processed_variables, content_hash).
+            cached (dict): Mapping from URL to cached (url, name, content, content_hash).
+
+        Returns:
+            dict: The cached rows still matching the database.
+        """
+        return {url: row for url, row in cached.items() if row[3] == states[url][2]}
+
+    @staticmethod
+    def build_processing_rows(states: dict[str, tuple], contents: dict[str, tuple]) -> dict[str, tuple]:
+        """
+        Builds the rows returned by SELECT_COMPANIES_TO_PROCESS from the rows of SELECT_PROCESSING_STATE
+        and SELECT_COMPANY_CONTENTS_BY_URLS. Companies missing from either are absent.
+        Shared with AsyncCompanyRepository.
+
+        Args:
+            states (dict): Mapping from URL to (url, processed_variables, content_hash).
+            contents (dict): Mapping from URL to (url, name, content, content_hash).
+
+        Returns:
+            dict: Mapping from URL to (url, name, content, processed_variables, content_hash).
+        """
+        rows = {}
+        for url, (_, processed, content_hash) in states.items():
+            if url not in contents:
+                continue
+            _, name, content, imported_hash = contents[url]
+            if processed is not None:
+                rows[url] = (url, name, None, processed, content_hash)
+            else:
+                rows[url] = (url, name, content, None, imported_hash)
+        return rows
+
+    @staticmethod
+    def build_import_counts(merged: tuple) -> tuple[int, int, int]:
+        """
+        Derives the inserted, updated and unchanged counts from the row returned by MERGE_IMPORT_STAGING.
+        Shared with AsyncCompanyRepository.
+
+        Args:
+            merged (tuple): Distinct companies staged, companies that already existed, companies written.
+
+        Returns:
+            tuple: Number of companies inserted, updated and left unchanged.
+        """
+        staged, existing, written = merged
+        inserted = staged - existing
+        updated = written - inserted
+        return inserted, updated, existing - updated
+
+    @staticmethod
+    def build_processed_in_database(updated: list[tuple]) -> tuple[dict[str, dict[str, Any]], set[str]]:
+        """
+        Splits the rows returned by UPDATE_PROCESSED_DATA_WITH_RULES.
+        Shared with AsyncCompanyRepository.
+
+        Args:
+            updated (list of tuple): (url, processed variables, recomputed) rows.
+
+        Returns:
+            tuple: Mapping from URL to the processed variables of that company,
+                   and the URLs of the companies whose variables were recomputed.
+        """
+        return ({url: processed for url, processed, _ in updated},
+                {url for url, _, recomputed in updated if recomputed})
+
+    @staticmethod
+    def add_not_found(chunk: list[tuple], saved: set[str], failures: dict[str, str]):
+        """
+        Records the companies of a saved chunk that were neither updated nor reported as failed.
+        Shared with AsyncCompanyRepository.
+        """
+        for url, *_ in chunk:
+            if url not in saved and url not in failures:
+                failures[url] = COMPANY_NOT_FOUND
+
+    @staticmethod
+    def build_failure(error: Exception) -> str:
+        """
+        Returns the first line of a database error, as reported for a company that could not be saved.
+        Shared with AsyncCompanyRepository.
+        """
+        return str(error).strip().splitlines()[0]
+
+    @staticmethod
+    def __copy_field(value: Any) -> str:
+        """
+        Renders a value as a CSV field for COPY: NULL stays unquoted, anything else is quoted.
+        """
+        if value is None:
+            return ""
+        return '"' + str(value).replace('"', '""') + '"'
+
+    @staticmethod
+    def build_processed_values(url: str, last_processed_date: datetime, processed: dict[str, Any],
+                               run_id: Optional[int] = None) -> tuple:
+        """
+        Builds the parameter tuple expected by UPDATE_PROCESSED_DATA.
+        Shared with AsyncCompanyRepository.
+
+        Args:
+            url (str): The unique URL of the company.
+            last_processed_date (datetime): Timestamp of last processing.
+            processed (dict): Processed variables stored as JSON.
+            run_id (int, optional): The processing run saving the data.
+
+        Returns:
+            tuple: The parameters for the update statement.
+        """
+        return (json.dumps(processed),
+                last_processed_date,
+                run_id,
+                url)
+
+    @staticmethod
+    def build_processed_batch(processed_by_url: dict[str, dict[str, Any]],
+                              content_hashes: Optional[dict[str, str]] = None) -> tuple[list[tuple], dict[str, str]]:
+        """
+        Serializes processed variables for UPDATE_PROCESSED_DATA_IN_BATCH.
+        Shared with AsyncCompanyRepository.
+
+        Args:
+            processed_by_url (dict): Mapping from company URL to its processed variables.
+            content_hashes (dict, optional): Mapping from company URL to the hash of the evaluated content.
+
+        Returns:
+            tuple: The (url, processed json, content hash) rows, and a mapping from URL to error
+                   message for every company whose variables could not be serialized.
+        """
+        content_hashes = content_hashes or {}
+        rows = []
+        failures = {}
+        for url, processed in processed_by_url.items():
+            try:
+                rows.append((url, json.dumps(processed, allow_nan=False), content_hashes.get(url)))
+            except (TypeError, ValueError) as error:
+                failures[url] = str(error)
+        return rows, failures
@@ -0,0 +1,134 @@
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from src.core.database.database import Database
+from src.core.database.schema import INSERT_JOB, SELECT_JOB_BY_ID, SELECT_CLAIMABLE_JOBS, CLAIM_JOB, \
+    UPDATE_JOB_STARTED, UPDATE_JOB_PROGRESS, UPDATE_JOB_STATUS
+from src.models.job import JobKind, JobStatus
+
+
+class JobRepository:
+    """
+    Repository class for persisting background jobs and their progress in company.job.
+    """
+
+    def __init__(self, db: Database):
+        """
+        Initializes the repository with a database instance.
+
+        Args:
+            db (Database): The database connection wrapper.
+        """
+        self.__db = db
+
+    def create(self, job_id: str, kind: JobKind, payload: dict[str, Any]) -> tuple:
+        """
+        Inserts a new queued job.
+
+        Args:
+            job_id (str): The job identifier.
+            kind (JobKind): Operation run by the job.
+            payload (dict): Everything needed to run, or resume, the job.
+
+        Returns:
+            tuple: The inserted job row.
+        """
+        with self.__db.transaction():
+            return self.__db.fetch_one(INSERT_JOB, (job_id, kind.value, JobStatus.QUEUED.value, json.dumps(payload),
+                                                    datetime.now()))
+
+    def fetch(self, job_id: str) -> Optional[tuple]:
+        """
+        Retrieves a job by its identifier.
+
+        Args:
+            job_id (str): The job identifier.
+
+        Returns:
+            tuple or None: The job row if found, else None.
+        """
+        return self.__db.fetch_one(SELECT_JOB_BY_ID, (job_id,))
+
+    def fetch_claimable(self, expired_before: datetime) -> list[tuple]:
+        """
+        Retrieves the jobs a worker may claim, oldest first: queued jobs, and running jobs
+        whose lease was not renewed since `expired_before`.
+
+        Args:
+            expired_before (datetime): Running jobs with an older heartbeat are considered abandoned.
+
+        Returns:
+            list of tuple: The claimable job rows.
+        """
+        return self.__db.fetch_all(SELECT_CLAIMABLE_JOBS, (expired_before,))
+
+    def claim(self, job_id: str, claimed_by: str, expired_before: datetime) -> Optional[tuple]:
+        """
+        Marks a job as running for one worker, if it is queued or its lease expired. The claim is a single
+        conditional UPDATE, so when several workers claim the same job only one of them gets it.
+
+        Args:
+            job_id (str): The job identifier.
+            claimed_by (str): Identifier of the claiming worker, required by every later update of the job.
+            expired_before (datetime): Running jobs with an older heartbeat may be taken over.
+
+        Returns:
+            tuple or None: The claimed job row, or None if the job does not exist or is held by another worker.
+        """
+        now = datetime.now()
+        with self.__db.transaction():
+            return self.__db.fetch_one(CLAIM_JOB, (claimed_by, now, now, job_id, expired_before))
+
+    def start(self, job_id: str, claimed_by: str, rows_total: Optional[int] = None) -> bool:
+        """
+        Resets the baseline used to compute the throughput of a claimed job.
+
+        Args:
+            job_id (str): The job identifier.
+            claimed_by (str): Identifier of the worker holding the job.
+            rows_total (int, optional): Total rows to process. Kept unchanged when None.
+
+        Returns:
+            bool: False if the job is no longer held by the worker.
+        """
+        now = datetime.now()
+        return self.__db.execute(UPDATE_JOB_STARTED, (rows_total, now, now, now, job_id, claimed_by)) == 1
+
+    def update_progress(self, job_id: str, claimed_by: str, rows_done: int, result: dict[str, Any],
+                        rows_total: Optional[int] = None) -> bool:
+        """
+        Records the rows committed so far and the partial result of a job, renewing the lease of the worker.
+        Meant to run in the same transaction as the batch it accounts for.
+
+        Args:
+            job_id (str): The job identifier.
+            claimed_by (str): Identifier of the worker holding the job.
+            rows_done (int): Rows committed so far.
+            result (dict): Partial result accumulated so far.
+            rows_total (int, optional): Total rows to process, once known. Kept unchanged when None.
+
+        Returns:
+            bool: False if the job is no longer held by the worker.
+        """
+        now = datetime.now()
+        return self.__db.execute(UPDATE_JOB_PROGRESS, (rows_done, rows_total, json.dumps(result), now, now, job_id,
+                                                       claimed_by)) == 1
+
+    def update_status(self, job_id: str, claimed_by: str, status: JobStatus, error: Optional[str] = None) -> bool:
+        """
+        Changes the status of a job, recording the finish date of completed and failed jobs.
+
+        Args:
+            job_id (str): The job identifier.
+            claimed_by (str): Identifier of the worker holding the job.
+            status (JobStatus): The new status.
+            error (str, optional): Why the job failed.
+
+        Returns:
+            bool: False if the job is no longer held by the worker.
+        """
+        now = datetime.now()
+        finished_date = now if status in (JobStatus.COMPLETED, JobStatus.FAILED) else None
+        return self.__db.execute(UPDATE_JOB_STATUS, (status.value, error, now, finished_date, job_id,
+                                                     claimed_by)) == 1
@@ -0,0 +1,89 @@
+import json
+from datetime import datetime
+from typing import Any, Optional, Union
+
+from src.core.database.database import Database
+from src.core.database.schema import UPSERT_RULE_SET, SELECT_RULE_SET_BY_ID, SELECT_RULE_SET_BY_FINGERPRINT
+
+# Length of a rule set fingerprint, a hexadecimal SHA-256 digest
+FINGERPRINT_LENGTH = 64
+# Range of the BIGINT ids of company.rule_set
+RULE_SET_ID_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+class RuleSetRepository:
+    """
+    Repository class for registering rule sets in company.rule_set and reading them back by id or fingerprint.
+    """
+
+    def __init__(self, db: Database):
+        """
+        Initializes the repository with a database instance.
+
+        Args:
+            db (Database): The database connection wrapper.
+        """
+        self.__db = db
+
+    def register(self, rules_fingerprint: str, rules: list[dict[str, Any]]) -> tuple:
+        """
+        Stores a rule set, unless a rule set with the same fingerprint is already stored.
+
+        Args:
+            rules_fingerprint (str): Fingerprint of the canonical rules.
+            rules (list of dict): The rules, as dumped from Rule models.
+
+        Returns:
+            tuple: (id, fingerprint, created_date) of the stored rule set.
+        """
+        with self.__db.transaction():
+            return self.__db.fetch_one(UPSERT_RULE_SET, (rules_fingerprint, json.dumps(rules), datetime.now()))
+
+    def fetch(self, reference: Union[int, str]) -> Optional[tuple]:
+        """
+        Retrieves a rule set by id or by fingerprint.
+
+        Args:
+            reference (int or str): Id of the rule set, or its fingerprint.
+
+        Returns:
+            tuple or None: (id, fingerprint, rules, created_date) if found, else None.
+        """
+        lookup = self.build_lookup(reference)
+        return self.__db.fetch_one(*lookup) if lookup is not None else None
+
+    @staticmethod
+    def build_lookup(reference: Union[int, str]) -> Optional[tuple[str, tuple]]:
+        """
+        Builds the query looking a rule set up: numbers are ids, other references are fingerprints.
+
+        Args:
+            reference (int or str): Id of the rule set, or its fingerprint.
+
+        Returns:
+            tuple or None: (SQL statement, values), or None for an id beyond the BIGINT range,
+                           which no rule set can have.
+        """
+        rule_set_id = parse_rule_set_id(reference)
+        if rule_set_id is None:
+            return SELECT_RULE_SET_BY_FINGERPRINT, (reference,)
+        if rule_set_id not in RULE_SET_ID_RANGE:
+            return None
+        return SELECT_RULE_SET_BY_ID, (rule_set_id,)
+
+
+def parse_rule_set_id(reference: Union[int, str]) -> Optional[int]:
+    """
+    Returns the id a rule set reference stands for, or None when the reference is a fingerprint.
+
+    Args:
+        reference (int or str): Id of the rule set, or its fingerprint.
+
+    Returns:
+        int or None: The id.
+    """
+    if isinstance(reference, int):
+        return reference
+    if reference.isdigit() and len(reference) != FINGERPRINT_LENGTH:
+        return int(reference)
+    return None
@@ -0,0 +1,109 @@
+from concurrent.futures import Executor
+from datetime import date
+from typing import Any, List, AsyncIterable, Optional, Union, AsyncIterator
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from src.commons.config import IMPORT_BATCH_SIZE
+from src.commons.file_utils import iter_csv_batches
+from src.models.companies_response import CompaniesResponse
+from src.models.import_response import ImportSummary
+from src.models.process_response import ProcessResponse
+from src.models.rules import Rule, ExecutionMode
+from src.repositories.async_company_repository import AsyncCompanyRepository
+from src.services.company_processing import CompanyProcessing
+from src.services.rule_set_service import RuleSetPlan
+
+
+class AsyncCompanyService:
+    """
+    Asynchronous counterpart of CompanyService used by the HTTP handlers, applying the same
+    CompanyProcessing steps. Database access is awaited so concurrent requests can overlap while
+    waiting on Postgres, and CPU-bound steps (type coercion, pre-generation, rule evaluation) run
+    in the thread pool so they do not block the event loop.
+    """
+
+    def __init__(self, company_repository: AsyncCompanyRepository, process_pool: Optional[Executor] = None):
+        """
+        Initialize with an AsyncCompanyRepository instance.
+        When a process pool is given, rules of large batches are evaluated on it in parallel.
+        """
+        self.__company_repository = company_repository
+        self.__processing = CompanyProcessing(process_pool)
+
+    async def import_file(self, file: UploadFile) -> ImportSummary:
+        """
+        See CompanyService.import_file.
+        """
+        return await self.import_batches(iter_csv_batches(file, IMPORT_BATCH_SIZE))
+
+    async def import_batches(self, batches: AsyncIterable[list[dict[str, Any]]]) -> ImportSummary:
+        """
+        See CompanyService.import_batches.
+        """
+        total = ImportSummary(rows_inserted=0, rows_read=0)
+        async for batch in batches:
+            total = total.combine(await self.import_data(batch))
+        return total
+
+    async def import_data(self, data: list[dict[str, Any]]) -> ImportSummary:
+        """
+        See CompanyService.import_data.
+        """
+        pre_generated_data = await run_in_threadpool(self.__processing.prepare_import, data)
+        counts = await self.__company_repository.upsert_data(pre_generated_data)
+        return self.__processing.build_import_summary(len(data), counts)
+
+    async def process_company(self, urls: List[str], rules: Union[List[Rule], RuleSetPlan],
+                              execution: ExecutionMode = ExecutionMode.PYTHON,
+                              run_id: Optional[int] = None, as_of: Optional[date] = None) -> ProcessResponse:
+        """
+        See CompanyService.process_company.
+        """
+        request = self.__processing.start(urls, rules, execution, as_of)
+        async with self.__company_repository.transaction():
+            if run_id is None:
+                run_id = await self.__company_repository.create_run(request.last_processed_date)
+            if execution == ExecutionMode.DATABASE:
+                processed_by_url, recomputed = await self.__company_repository.process_in_database(
+                    urls, request.processed_variables, request.params, request.last_processed_date, run_id,
+                    request.rules_fingerprint)
+                return request.database_response(processed_by_url, recomputed)
+
+            companies = await self.__company_repository.fetch_for_processing(urls, request.rules_fingerprint)
+            recomputed = await run_in_threadpool(self.__processing.evaluate, request, companies)
+            failures = await self.__company_repository.upsert_processed_data_in_batch(
+                recomputed, request.last_processed_date, run_id, request.rules_fingerprint, request.content_hashes)
+            await self.__company_repository.assign_run(request.current_urls, request.last_processed_date, run_id)
+        return request.response(failures)
+
+    async def get_companies_previously_processed(self, limit: Optional[int] = None,
+                                                 after: Optional[str] = None) -> CompaniesResponse:
+        """
+        See CompanyService.get_companies_previously_processed.
+        """
+        if limit is None:
+            companies_processed = await self.__company_repository.get_companies_previously_processed()
+        else:
+            companies_processed = await self.__company_repository.get_companies_previously_processed(limit + 1, after)
+        return self.__processing.build_companies_response(companies_processed, limit)
+
+    async def stream_companies_previously_processed(self) -> AsyncIterator[str]:
+        """
+        See CompanyService.stream_companies_previously_processed. Batches are rendered in the thread pool.
+        """
+        async for rows in self.__company_repository.iter_companies_previously_processed():
+            yield await run_in_threadpool(self.__processing.render_ndjson, rows)
+
+    async def stream_companies_response(self) -> AsyncIterator[str]:
+        """
+        See CompanyService.stream_companies_response. Batches are rendered in the thread pool.
+        """
+        yield self.__processing.COMPANIES_JSON_START
+        first = True
+        async for rows in self.__company_repository.iter_companies_previously_processed():
+            if rows:
+                yield await run_in_threadpool(self.__processing.render_json_items, rows, first)
+                first = False
+        yield self.__processing.COMPANIES_JSON_END
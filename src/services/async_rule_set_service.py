@@ -0,0 +1,70 @@
+from typing import Optional, Union
+
+from src.models.rule_set import RuleSet
+from src.models.rules import Rule
+from src.repositories.async_rule_set_repository import AsyncRuleSetRepository
+from src.services.rule_set_service import RuleSetPlan, RuleSetPlanCache, build_plan
+
+
+class AsyncRuleSetService:
+    """
+    Asynchronous counterpart of RuleSetService, used by the HTTP handlers.
+    """
+
+    def __init__(self, rule_set_repository: AsyncRuleSetRepository, plan_cache: Optional[RuleSetPlanCache] = None):
+        """
+        Args:
+            rule_set_repository (AsyncRuleSetRepository): Repository of the registered rule sets.
+            plan_cache (RuleSetPlanCache, optional): Plans shared by the services of the worker.
+                                                     Plans are built for every lookup without it.
+        """
+        self.__rule_set_repository = rule_set_repository
+        self.__plan_cache = plan_cache
+
+    async def register(self, rules: list[Rule]) -> RuleSet:
+        """
+        Registers a rule set, returning the stored one when equal rules were registered before.
+
+        Args:
+            rules (list of Rule): The rules, in evaluation order.
+
+        Returns:
+            RuleSet: The registered rule set, without its rules.
+        """
+        plan = RuleSetPlan(rules)
+        rule_set_id, rules_fingerprint, created_date = await self.__rule_set_repository.register(plan.fingerprint,
+                                                                                                 plan.rules_data)
+        return RuleSet(id=rule_set_id, fingerprint=rules_fingerprint, rule_count=len(rules), created_date=created_date)
+
+    async def get(self, reference: Union[int, str]) -> Optional[RuleSet]:
+        """
+        Retrieves a registered rule set with its rules.
+
+        Args:
+            reference (int or str): Id of the rule set, or its fingerprint.
+
+        Returns:
+            RuleSet or None: The rule set if found, else None.
+        """
+        row = await self.__rule_set_repository.fetch(reference)
+        return RuleSet.from_row(row) if row is not None else None
+
+    async def get_plan(self, reference: Union[int, str]) -> Optional[RuleSetPlan]:
+        """
+        Returns the plan of a registered rule set, from the plan cache when it holds it.
+
+        Args:
+            reference (int or str): Id of the rule set, or its fingerprint.
+
+        Returns:
+            RuleSetPlan or None: The plan if the rule set is registered, else None.
+        """
+        plan = self.__plan_cache.get(reference) if self.__plan_cache is not None else None
+        if plan is None:
+            row = await self.__rule_set_repository.fetch(reference)
+            if row is None:
+                return None
+            plan = build_plan(row)
+            if self.__plan_cache is not None:
+                plan = self.__plan_cache.put(plan)
+        return plan
@@ -0,0 +1,281 @@
+from concurrent.futures import Executor
+from datetime import datetime, date
+from itertools import chain, repeat
+from typing import Any, List, Optional, Union
+
+from src.commons.config import PROCESS_POOL_MIN_BATCH, PROCESS_POOL_CHUNK_SIZE
+from src.models.companies_response import CompaniesResponse, CompanyProcessed
+from src.models.import_response import ImportSummary
+from src.models.process_response import ProcessResponse, ProcessFailure
+from src.models.rules import Rule, ExecutionMode
+from src.services.pre_generate_service import PreGenerateService
+from src.services.rules_processor_service import RulesProcessorService
+from src.services.rule_set_service import RuleSetPlan
+from src.services.rules_processor_worker import evaluate_chunk
+from src.services.type_coercion_service import TypeCoercionService
+
+
+class ProcessingRequest:
+    """
+    State of one process_company call: the plan of the rules, the dates and fingerprint of the run,
+    and the companies evaluated by it. Built by CompanyProcessing.start.
+
+    Attributes:
+        urls (list of str): Company URLs to process, in request order.
+        plan (RuleSetPlan): Rules to apply.
+        execution (ExecutionMode): Whether the rules run in the application or in the database.
+        last_processed_date (datetime): Timestamp the companies are saved with.
+        as_of (date): Date features depending on the clock are computed for.
+        rules_fingerprint (str): Fingerprint results are stored and reused with.
+        processed_variables (str, optional): SQL expression of the rules, in database mode.
+        params (list, optional): Parameters of the processed_variables expression.
+    """
+
+    def __init__(self, urls: List[str], plan: RuleSetPlan, execution: ExecutionMode, as_of: Optional[date],
+                 uses_clock: bool):
+        self.urls = urls
+        self.plan = plan
+        self.execution = execution
+        self.last_processed_date = datetime.now()
+        self.as_of = as_of or self.last_processed_date.date()
+        self.rules_fingerprint = plan.fingerprint_for(self.as_of if uses_clock else None)
+        self.processed_variables: Optional[str] = None
+        self.params: Optional[list[Any]] = None
+        self.__current: dict[str, dict[str, Any]] = {}
+        self.__stale: list[tuple] = []
+        self.__recomputed: dict[str, dict[str, Any]] = {}
+
+    @property
+    def recomputed(self) -> dict[str, dict[str, Any]]:
+        """Processed variables evaluated by this call, by URL."""
+        return self.__recomputed
+
+    @property
+    def content_hashes(self) -> dict[str, str]:
+        """Hash of the content each recomputed company was evaluated from, by URL."""
+        return {company[0]: company[4] for company in self.__stale}
+
+    @property
+    def current_urls(self) -> list[str]:
+        """URLs of the companies served from their stored result."""
+        return list(self.__current)
+
+    def select(self, companies: dict[str, tuple]) -> list[dict[str, Any]]:
+        """
+        Splits the companies returned by fetch_for_processing into the ones whose stored result is
+        current and the ones to evaluate.
+
+        Args:
+            companies (dict): Mapping from URL to (url, name, content, processed_variables, content_hash).
+
+        Returns:
+            list of dict: Content of the companies to evaluate.
+        """
+        found = [companies[url] for url in dict.fromkeys(self.urls) if url in companies]
+        self.__current = {company[0]: company[3] for company in found if company[3] is not None}
+        self.__stale = [company for company in found if company[3] is None]
+        return [company[2] for company in self.__stale]
+
+    def collect(self, results: list[dict[str, int]]):
+        """
+        Records the features evaluated for the companies returned by `select`, in the same order.
+
+        Args:
+            results (list of dict): Feature results of each company.
+        """
+        for company, processed in zip(self.__stale, results):
+            processed["company"] = company[1]
+            self.__recomputed[company[0]] = processed
+
+    def response(self, failures: dict[str, str]) -> ProcessResponse:
+        """
+        Builds the response once the recomputed companies were saved.
+
+        Args:
+            failures (dict): Mapping from URL to error message for every company that was not saved.
+
+        Returns:
+            ProcessResponse: Processed variables of each saved company, in request order.
+        """
+        processed_by_url = {**self.__current, **self.__recomputed}
+        return ProcessResponse(
+            companies=[processed_by_url[url] for url in self.urls if url in processed_by_url and url not in failures],
+            failures=[ProcessFailure(url=url, error=error) for url, error in failures.items()],
+            recomputed=[url for url in self.__recomputed if url not in failures])
+
+    def database_response(self, processed_by_url: dict[str, dict[str, Any]], recomputed: set[str]) -> ProcessResponse:
+        """
+        Builds the response of database mode from the result of process_in_database.
+
+        Args:
+            processed_by_url (dict): Mapping from URL to the processed variables of that company.
+            recomputed (set of str): URLs of the companies whose variables were recomputed.
+
+        Returns:
+            ProcessResponse: Processed variables of each company found, in request order.
+        """
+        return ProcessResponse(companies=[processed_by_url[url] for url in self.urls if url in processed_by_url],
+                               recomputed=[url for url in dict.fromkeys(self.urls) if url in recomputed])
+
+
+class CompanyProcessing:
+    """
+    Application logic of company import, processing and retrieval, shared by CompanyService and
+    AsyncCompanyService. It performs no I/O: the services read and write through their repository,
+    and hand the data to these steps in between.
+    """
+
+    COMPANIES_JSON_START = '{"companies":['
+    COMPANIES_JSON_END = '],"next_cursor":null}'
+
+    def __init__(self, process_pool: Optional[Executor] = None,
+                 pre_generate_service: Optional[PreGenerateService] = None):
+        """
+        Args:
+            process_pool (Executor, optional): When given, rules of large batches are evaluated on it in parallel.
+            pre_generate_service (PreGenerateService, optional): Computes the features of the companies.
+                                                                 Defaults to the default feature registry.
+        """
+        self.__process_pool = process_pool
+        self.__rules_processor_service = RulesProcessorService()
+        self.__pre_generate_service = pre_generate_service or PreGenerateService()
+        self.__type_coercion_service = TypeCoercionService()
+
+    def prepare_import(self, data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Converts the values of imported companies to the types of COMPANY_SCHEMA and pre-generates
+        their features, in place.
+
+        Args:
+            data (list of dict): Raw company data.
+
+        Returns:
+            list of dict: Transformed/pre-generated data.
+        """
+        return self.__pre_generate_service.generate(self.__type_coercion_service.coerce(data))
+
+    @staticmethod
+    def build_import_summary(rows_read: int, counts: tuple[int, int, int]) -> ImportSummary:
+        """
+        Args:
+            rows_read (int): Number of companies of the batch.
+            counts (tuple): Number of companies inserted, updated and left unchanged, from upsert_data.
+
+        Returns:
+            ImportSummary: Summary of import operation.
+        """
+        rows_inserted, rows_updated, rows_unchanged = counts
+        return ImportSummary(rows_inserted=rows_inserted, rows_read=rows_read, rows_updated=rows_updated,
+                             rows_unchanged=rows_unchanged)
+
+    def start(self, urls: List[str], rules: Union[List[Rule], RuleSetPlan], execution: ExecutionMode,
+              as_of: Optional[date]) -> ProcessingRequest:
+        """
+        Prepares a process_company call. Plain rule lists are prepared for the call only. In database
+        mode the rules are translated to SQL, so rules that cannot run there fail before anything is written.
+
+        Args:
+            urls (List[str]): Company URLs to process.
+            rules (List[Rule] or RuleSetPlan): Rules to apply.
+            execution (ExecutionMode): Whether the rules run in the application or in the database.
+            as_of (date, optional): Date features depending on the clock are computed for. Defaults to today.
+
+        Returns:
+            ProcessingRequest: The state of the call.
+
+        Raises:
+            ValueError: If the rules cannot be evaluated in the database.
+        """
+        plan = rules if isinstance(rules, RuleSetPlan) else RuleSetPlan(rules)
+        request = ProcessingRequest(urls, plan, execution, as_of, self.__pre_generate_service.uses_clock(plan.inputs))
+        if execution == ExecutionMode.DATABASE:
+            derived_inputs = self.__pre_generate_service.database_features(plan.inputs, request.as_of)
+            request.processed_variables, request.params = plan.compile_sql(derived_inputs)
+        return request
+
+    def evaluate(self, request: ProcessingRequest, companies: dict[str, tuple]) -> dict[str, dict[str, Any]]:
+        """
+        Evaluates the rules for the companies whose stored result is not current, computing the features
+        the rules use and the stored content lacks, such as features depending on the clock.
+
+        Args:
+            request (ProcessingRequest): The state of the call.
+            companies (dict): Mapping from URL to the row returned by fetch_for_processing.
+
+        Returns:
+            dict: Mapping from URL to the processed variables of every recomputed company.
+        """
+        contents = self.__pre_generate_service.complete(request.select(companies), request.plan.inputs,
+                                                        request.as_of)
+        request.collect(self.__evaluate_rules(contents, request.plan))
+        return request.recomputed
+
+    @staticmethod
+    def build_companies_response(companies_processed: list[tuple], limit: Optional[int] = None) -> CompaniesResponse:
+        """
+        Maps the rows of get_companies_previously_processed to a CompaniesResponse model.
+
+        Args:
+            companies_processed (list of tuple): The company records, one more than `limit` when paginated.
+            limit (int, optional): Size of the page, None when every company was read.
+
+        Returns:
+            CompaniesResponse: The companies, with the cursor of the next page when there are more.
+        """
+        if limit is None:
+            return CompaniesResponse(companies=[CompanyProcessed.from_row(processed)
+                                                for processed in companies_processed])
+        companies = [CompanyProcessed.from_row(processed) for processed in companies_processed[:limit]]
+        next_cursor = companies[-1].url if len(companies_processed) > limit else None
+        return CompaniesResponse(companies=companies, next_cursor=next_cursor)
+
+    @staticmethod
+    def render_ndjson(rows: list[tuple]) -> str:
+        """
+        Renders company records as newline-delimited JSON, one CompanyProcessed per line.
+
+        Args:
+            rows (list of tuple): A batch of company records.
+
+        Returns:
+            str: NDJSON lines for the batch.
+        """
+        return "".join(CompanyProcessed.from_row(row).model_dump_json() + "\n" for row in rows)
+
+    @staticmethod
+    def render_json_items(rows: list[tuple], first: bool) -> str:
+        """
+        Renders company records as items of the `companies` array of a CompaniesResponse body,
+        written between COMPANIES_JSON_START and COMPANIES_JSON_END.
+
+        Args:
+            rows (list of tuple): A batch of company records.
+            first (bool): Whether the batch starts the array, so it is not preceded by a comma.
+
+        Returns:
+            str: Comma-separated CompanyProcessed objects for the batch.
+        """
+        items = ",".join(CompanyProcessed.from_row(row).model_dump_json() for row in rows)
+        return items if first else "," + items
+
+    def __evaluate_rules(self, companies_data: list[dict[str, Any]], plan: RuleSetPlan) -> list[dict[str, int]]:
+        """
+        Applies the rules to every company, splitting batches of at least PROCESS_POOL_MIN_BATCH
+        companies in chunks of PROCESS_POOL_CHUNK_SIZE evaluated in parallel on the process pool.
+        Smaller batches are evaluated inline, where inter-process transfer would cost more than it saves.
+
+        Args:
+            companies_data (list of dict): Company attribute dictionaries.
+            plan (RuleSetPlan): Rules to apply.
+
+        Returns:
+            list of dict: Feature results for each company, in the same order.
+        """
+        if self.__process_pool is None or len(companies_data) < PROCESS_POOL_MIN_BATCH:
+            return self.__rules_processor_service.process_batch(companies_data, plan.rules, plan.evaluate)
+
+        rules_fingerprint, rules_payload = plan.serialize()
+        chunks = [companies_data[start:start + PROCESS_POOL_CHUNK_SIZE]
+                  for start in range(0, len(companies_data), PROCESS_POOL_CHUNK_SIZE)]
+        results = self.__process_pool.map(evaluate_chunk, repeat(rules_fingerprint), repeat(rules_payload), chunks)
+        return list(chain.from_iterable(results))
@@ -1,49 +1,68 @@
-from datetime import datetime
-from typing import Any, List
+from concurrent.futures import Executor
+from datetime import date
+from typing import Any, List, AsyncIterable, Optional, Union, Iterator
 
 from fastapi import UploadFile
 
-from src.commons.file_utils import parse_csv_to_dict
-from src.models.companies_response import CompaniesResponse, CompanyProcessed
+from src.commons.config import IMPORT_BATCH_SIZE
+from src.commons.file_utils import iter_csv_batches
+from src.models.companies_response import CompaniesResponse
 from src.models.import_response import ImportSummary
-from src.models.rules import Rule
+from src.models.process_response import ProcessResponse
+from src.models.rules import Rule, ExecutionMode
 from src.repositories.company_repository import CompanyRepository
-from src.services.pre_generate_service import PreGenerateService
-from src.services.rules_processor_service import RulesProcessorService
+from src.services.company_processing import CompanyProcessing
+from src.services.rule_set_service import RuleSetPlan
 
 
 class CompanyService:
     """
     Service layer handling company data import, processing, and retrieval logic.
-    It interacts with repositories and other services to perform business operations.
+    It reads and writes through the repository, and applies the steps of CompanyProcessing in between,
+    which AsyncCompanyService shares.
     """
 
-    def __init__(self, company_repository: CompanyRepository):
+    def __init__(self, company_repository: CompanyRepository, process_pool: Optional[Executor] = None):
         """
         Initialize with a CompanyRepository instance and instantiate dependent services.
+        When a process pool is given, rules of large batches are evaluated on it in parallel.
         """
         self.__company_repository = company_repository
-        self.__rules_processor_service = RulesProcessorService()
-        self.__pre_generate_service = PreGenerateService()
+        self.__processing = CompanyProcessing(process_pool)
 
     async def import_file(self, file: UploadFile):
         """
-        Parses a CSV file asynchronously, pre-generates data,
-        and saves it in the database.
+        Parses a CSV file asynchronously in batches of IMPORT_BATCH_SIZE rows,
+        pre-generating and saving each batch before the next one is read,
+        so memory stays flat regardless of the file size.
 
         Args:
             file (UploadFile): CSV file uploaded by the client.
 
         Returns:
-            ImportSummary: Summary of import operation (rows read and inserted).
+            ImportSummary: Summary of import operation (rows read, inserted, updated and unchanged).
         """
-        data = await parse_csv_to_dict(file)
-        pre_generated_data = self.__pre_generate_data(data)
-        return self.__save_data(pre_generated_data)
+        return await self.import_batches(iter_csv_batches(file, IMPORT_BATCH_SIZE))
+
+    async def import_batches(self, batches: AsyncIterable[list[dict[str, Any]]]):
+        """
+        Pre-generates and saves company data batch by batch as the batches arrive.
+
+        Args:
+            batches (AsyncIterable of list of dict): Raw company data, in batches.
+
+        Returns:
+            ImportSummary: Summary of import operation, accumulated over every batch.
+        """
+        total = ImportSummary(rows_inserted=0, rows_read=0)
+        async for batch in batches:
+            total = total.combine(self.import_data(batch))
+        return total
 
     def import_data(self, data: list[dict[str, Any]]):
         """
-        Takes already loaded data, pre-generates it, and saves it in the database.
+        Takes already loaded data, converts its values to the types of COMPANY_SCHEMA,
+        pre-generates it, and saves it in the database.
 
         Args:
             data (list of dict): Raw company data.
@@ -51,86 +70,112 @@ class CompanyService:
         Returns:
             ImportSummary: Summary of import operation.
         """
-        pre_generated_data = self.__pre_generate_data(data)
-        return self.__save_data(pre_generated_data)
+        pre_generated_data = self.__processing.prepare_import(data)
+        counts = self.__company_repository.upsert_data(pre_generated_data)
+        return self.__processing.build_import_summary(len(data), counts)
 
-    def process_company(self, urls: List[str], rules: List[Rule]):
+    def process_company(self, urls: List[str], rules: Union[List[Rule], RuleSetPlan],
+                        execution: ExecutionMode = ExecutionMode.PYTHON,
+                        run_id: Optional[int] = None, as_of: Optional[date] = None) -> ProcessResponse:
         """
         Processes company data based on given URLs and rules.
-        Applies the rules to each company's imported data, saves processed data,
-        and returns a list of processed results.
+        Applies the rules to the imported data of the whole batch at once, registers the run and
+        saves all processed data in a single transaction, and returns the processed results.
 
-        Args:
-            urls (List[str]): List of company URLs to process.
-            rules (List[Rule]): List of rules to apply during processing.
+        In database mode the rules are translated to SQL and evaluated by PostgreSQL
+        in a single UPDATE, without fetching the company content.
 
-        Returns:
-            List[dict]: List of dictionaries with processed variables for each company.
-        """
-        processed_companies = []
-        last_processed_date = datetime.now()
-        for url in urls:
-            company = self.__company_repository.fetch_by_url(url)
-            if company:
-                processed = self.__rules_processor_service.process_rules(company[2], rules)
-                processed["company"] = company[1]
-                processed_companies.append(processed)
-                self.__save_processed_data(url, last_processed_date, processed)
+        Saved companies point to the processing run, so the latest run can be listed
+        without scanning the table. A new run is registered unless one is given.
 
-        return processed_companies
+        Rules are given as a list, or as the plan of a registered rule set, already validated and
+        compiled; plain lists are prepared for the call only.
 
-    def get_companies_previously_processed(self) -> CompaniesResponse:
-        """
-        Retrieves companies that have been processed previously,
-        maps raw database tuples to CompanyProcessed Pydantic models,
-        and returns a CompaniesResponse model.
+        Features used by the rules and missing from the stored content, such as features
+        not computed on import, are computed before the rules are evaluated. Features depending
+        on the clock, like company_age, are computed for a single as-of date per call, and the
+        stored results of such rule sets are only reused for the same as-of date.
 
-        Returns:
-            CompaniesResponse: Contains a list of processed companies.
-        """
-        companies_processed = self.__company_repository.get_companies_previously_processed()
-        companies = []
-        for processed in companies_processed:
-            companies.append(CompanyProcessed(url=processed[0],
-                                              imported_data=processed[2],
-                                              processed_variables=processed[3],
-                                              imported_date=str(processed[4]) if processed[4] is not None else None,
-                                              last_processed_date=str(processed[5]) if processed[5] is not None else None))
+        Companies whose stored variables were computed by the same rule set (by fingerprint)
+        from the same content (by content hash) are served from the stored result: their
+        rules are not evaluated again and their variables are not rewritten, they are only
+        moved to the run. The response lists the companies that were recomputed.
 
-        return CompaniesResponse(companies=companies)
+        Args:
+            urls (List[str]): List of company URLs to process.
+            rules (List[Rule] or RuleSetPlan): Rules to apply during processing.
+            execution (ExecutionMode): Whether the rules run in the application or in the database.
+            run_id (int, optional): Run the companies are saved under, to spread one run over many calls.
+            as_of (date, optional): Date features depending on the clock are computed for, for backfills
+                                    or to keep one date over the calls of a run. Defaults to today.
 
-    def __save_data(self, data: list[dict[str, Any]]):
-        """
-        Saves pre-generated data by upserting into the database.
+        Returns:
+            ProcessResponse: Processed variables for each saved company, and the
+                             companies that could not be saved.
+        """
+        request = self.__processing.start(urls, rules, execution, as_of)
+        with self.__company_repository.transaction():
+            if run_id is None:
+                run_id = self.__company_repository.create_run(request.last_processed_date)
+            if execution == ExecutionMode.DATABASE:
+                processed_by_url, recomputed = self.__company_repository.process_in_database(
+                    urls, request.processed_variables, request.params, request.last_processed_date, run_id,
+                    request.rules_fingerprint)
+                return request.database_response(processed_by_url, recomputed)
+
+            companies = self.__company_repository.fetch_for_processing(urls, request.rules_fingerprint)
+            recomputed = self.__processing.evaluate(request, companies)
+            failures = self.__company_repository.upsert_processed_data_in_batch(
+                recomputed, request.last_processed_date, run_id, request.rules_fingerprint, request.content_hashes)
+            self.__company_repository.assign_run(request.current_urls, request.last_processed_date, run_id)
+        return request.response(failures)
+
+    def get_companies_previously_processed(self, limit: Optional[int] = None,
+                                         after: Optional[str] = None) -> CompaniesResponse:
+        """
+        Retrieves companies that have been processed by the latest run
+        and maps them to a CompaniesResponse model.
+
+        With a limit, returns a single page ordered by URL (keyset pagination), with the
+        cursor of the next page when there are more companies.
 
         Args:
-            data (list of dict): Pre-generated company data.
+            limit (int, optional): Maximum number of companies returned. All of them when None.
+            after (str, optional): Cursor returned with the previous page.
 
         Returns:
-            ImportSummary: Summary of import operation.
+            CompaniesResponse: Contains a list of processed companies.
         """
-        rows_inserted = self.__company_repository.upsert_data(data)
-        return ImportSummary(rows_inserted=rows_inserted, rows_read=len(data))
+        if limit is None:
+            companies_processed = self.__company_repository.get_companies_previously_processed()
+        else:
+            companies_processed = self.__company_repository.get_companies_previously_processed(limit + 1, after)
+        return self.__processing.build_companies_response(companies_processed, limit)
 
-    def __pre_generate_data(self, data: list[dict[str, Any]]):
+    def stream_companies_previously_processed(self) -> Iterator[str]:
         """
-        Calls the PreGenerateService to transform raw data before saving.
-
-        Args:
-            data (list of dict): Raw company data.
+        Streams the companies processed by the latest run as newline-delimited JSON,
+        one CompanyProcessed per line, so memory stays flat regardless of the run size.
 
-        Returns:
-            list of dict: Transformed/pre-generated data.
+        Yields:
+            str: NDJSON lines for a batch of companies.
         """
-        return self.__pre_generate_service.generate(data)
+        for rows in self.__company_repository.iter_companies_previously_processed():
+            yield self.__processing.render_ndjson(rows)
 
-    def __save_processed_data(self, url: str, last_processed_date: datetime, processed: dict[str, Any]):
+    def stream_companies_response(self) -> Iterator[str]:
         """
-        Saves processed data and last processed timestamp for a company.
+        Streams the companies processed by the latest run as a CompaniesResponse JSON body,
+        the same document get_companies_previously_processed returns without a limit, while
+        only one batch of companies is held in memory at a time.
 
-        Args:
-            url (str): Company URL.
-            last_processed_date (datetime): Timestamp of processing.
-            processed (dict): Processed variables data.
+        Yields:
+            str: Chunks of the JSON body.
         """
-        self.__company_repository.upsert_processed_data(url, last_processed_date, processed)
+        yield self.__processing.COMPANIES_JSON_START
+        first = True
+        for rows in self.__company_repository.iter_companies_previously_processed():
+            if rows:
+                yield self.__processing.render_json_items(rows, first)
+                first = False
+        yield self.__processing.COMPANIES_JSON_END
@@ -0,0 +1,173 @@
+from datetime import date
+from typing import Any, Callable, Iterable, MutableMapping, Optional, Sequence
+
+
+class Feature:
+    """
+    A feature derived from the data of a company, computed for a whole batch of companies at once.
+
+    Features reading the clock, such as ages, are computed against the as-of date of the processing
+    run rather than the time of the import, so they must not be computed on import.
+    """
+
+    def __init__(self, name: str, inputs: Sequence[str], compute: Callable[..., list[Any]],
+                 on_import: bool = True, uses_clock: bool = False, sql: Optional[str] = None):
+        """
+        Args:
+            name (str): Name of the feature, added to the company data and usable as a rule input.
+            inputs (Sequence of str): Company fields read by the feature. Inputs naming another
+                                      registered feature make this feature depend on it.
+            compute (Callable): Returns the value of the feature for each company of a batch, in order.
+                                Called with the as-of date as second argument when `uses_clock` is set.
+            on_import (bool): Compute the feature on import and store it with the company content.
+                              Otherwise it is only computed at process time, when a rule uses it.
+            uses_clock (bool): The value depends on the as-of date of the run.
+            sql (str, optional): Numeric SQL expression computing the feature from `company.content`,
+                                 so rules using a process-time feature can run in the database.
+                                 Every `%s` placeholder is bound to the as-of date.
+
+        Raises:
+            ValueError: If a feature using the clock is computed on import.
+        """
+        if on_import and uses_clock:
+            raise ValueError(f"Feature {name} uses the clock and cannot be computed on import")
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.compute = compute
+        self.on_import = on_import
+        self.uses_clock = uses_clock
+        self.sql = sql
+
+    @classmethod
+    def per_company(cls, name: str, inputs: Sequence[str], compute: Callable[..., Any], on_import: bool = True,
+                    uses_clock: bool = False, sql: Optional[str] = None) -> "Feature":
+        """
+        Builds a feature from a function computing its value for a single company.
+
+        Args:
+            name (str): Name of the feature.
+            inputs (Sequence of str): Company fields read by the feature.
+            compute (Callable): Returns the value of the feature for a company, called with the
+                                as-of date as second argument when `uses_clock` is set.
+            on_import (bool): Compute the feature on import.
+            uses_clock (bool): The value depends on the as-of date of the run.
+            sql (str, optional): SQL expression computing the feature, see `Feature`.
+
+        Returns:
+            Feature: The feature.
+        """
+        if uses_clock:
+            return cls(name, inputs, lambda companies, as_of: [compute(company, as_of) for company in companies],
+                       on_import, uses_clock, sql)
+        return cls(name, inputs, lambda companies: [compute(company) for company in companies], on_import,
+                   uses_clock, sql)
+
+
+class FeatureRegistry:
+    """
+    Features available to the pre-generation pipeline, resolved on demand with their dependencies,
+    so only the features something asks for are computed.
+    """
+
+    def __init__(self, features: Iterable[Feature] = ()):
+        """
+        Args:
+            features (Iterable of Feature): Features registered initially.
+        """
+        self.__features: dict[str, Feature] = {}
+        for feature in features:
+            self.register(feature)
+
+    def register(self, feature: Feature):
+        """
+        Adds a feature.
+
+        Args:
+            feature (Feature): The feature.
+
+        Raises:
+            ValueError: If a feature with the same name is already registered.
+        """
+        if feature.name in self.__features:
+            raise ValueError(f"Feature {feature.name} is already registered")
+        self.__features[feature.name] = feature
+
+    @property
+    def import_features(self) -> list[str]:
+        """
+        Names of the features computed on import, in registration order.
+        """
+        return [feature.name for feature in self.__features.values() if feature.on_import]
+
+    def resolve(self, names: Iterable[str]) -> list[Feature]:
+        """
+        Returns the registered features among the given names, preceded by the features they depend on.
+        Names that are not registered features, such as imported columns, are ignored.
+
+        Args:
+            names (Iterable of str): Names of the features needed, for example the inputs of a rule set.
+
+        Returns:
+            list of Feature: The features to compute, each after its dependencies.
+
+        Raises:
+            ValueError: If the features depend on each other in a cycle.
+        """
+        resolved: dict[str, Feature] = {}
+        visiting: set[str] = set()
+
+        def visit(name: str):
+            feature = self.__features.get(name)
+            if feature is None or name in resolved:
+                return
+            if name in visiting:
+                raise ValueError(f"Feature {name} depends on itself")
+            visiting.add(name)
+            for input_name in feature.inputs:
+                visit(input_name)
+            visiting.discard(name)
+            resolved[name] = feature
+
+        for name in names:
+            visit(name)
+        return list(resolved.values())
+
+    def uses_clock(self, names: Iterable[str]) -> bool:
+        """
+        Whether the given features, or the features they depend on, depend on the as-of date.
+
+        Args:
+            names (Iterable of str): Names of the features needed.
+
+        Returns:
+            bool: True if computing them needs an as-of date.
+        """
+        return any(feature.uses_clock for feature in self.resolve(names))
+
+    def compute(self, companies: list[MutableMapping[str, Any]], names: Iterable[str], missing_only: bool = False,
+                as_of: Optional[date] = None):
+        """
+        Computes the given features and their dependencies, in dependency order, adding them to the companies.
+
+        Args:
+            companies (list of dict): Company data, updated in place.
+            names (Iterable of str): Names of the features needed.
+            missing_only (bool): Only compute a feature for the companies that do not have it yet. Features
+                                 depending on the clock, directly or through their inputs, are always computed,
+                                 since a stored value may come from another as-of date.
+            as_of (date, optional): Date the features using the clock are computed for. Defaults to today.
+
+        Raises:
+            ValueError: If the features depend on each other in a cycle.
+        """
+        as_of = as_of or date.today()
+        clocked: set[str] = set()
+        for feature in self.resolve(names):
+            if feature.uses_clock or clocked.intersection(feature.inputs):
+                clocked.add(feature.name)
+            targets = companies if not missing_only or feature.name in clocked else \
+                [company for company in companies if feature.name not in company]
+            if targets:
+                values = feature.compute(targets, as_of) if feature.uses_clock else feature.compute(targets)
+                for company, value in zip(targets, values):
+                    company[feature.name] = value
@@ -0,0 +1,347 @@
+import asyncio
+import os
+import queue
+import socket
+import threading
+import uuid
+from concurrent.futures import Executor
+from contextlib import AbstractContextManager
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, List, Optional, AsyncIterator, Union
+
+from src.commons.config import JOB_WORKERS, JOB_QUEUE_SIZE, JOB_PROCESS_BATCH_SIZE, JOB_LEASE_TIMEOUT, \
+    IMPORT_BATCH_SIZE
+from src.commons.file_utils import AsyncFileReader, iter_csv_batches, iter_json_array_batches, iter_ndjson_batches
+from src.core.database.database import Database
+from src.core.database.logger import get_logger
+from src.models.import_response import ImportSummary
+from src.models.job import Job, JobKind, JobStatus, ImportFormat
+from src.models.process_response import ProcessResponse, ProcessFailure
+from src.models.rules import Rule, ExecutionMode
+from src.repositories.company_cache import CompanyCache
+from src.repositories.company_repository import CompanyRepository
+from src.repositories.job_repository import JobRepository
+from src.repositories.rule_set_repository import RuleSetRepository
+from src.services.company_service import CompanyService
+from src.services.rule_set_service import RuleSetPlan, RuleSetPlanCache, RuleSetService
+
+logger = get_logger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """
+    Raised when a job is submitted while JOB_QUEUE_SIZE jobs are already waiting.
+    """
+
+
+class JobNotFinishedError(Exception):
+    """
+    Raised when the result of a job that has not completed is requested.
+    """
+
+
+class JobInterruptedError(Exception):
+    """
+    Raised inside a worker when the service stops, so the job is left to resume on the next start.
+    """
+
+
+class JobLeaseLostError(Exception):
+    """
+    Raised inside a worker whose job was taken over by another worker after its lease expired.
+    """
+
+
+class JobService:
+    """
+    Runs long imports and processing runs in the background.
+
+    Jobs are persisted in company.job and executed by JOB_WORKERS threads through CompanyService,
+    one batch per transaction. Every batch commits together with the job progress, so a job
+    interrupted by a restart resumes right after its last committed batch.
+
+    Workers of every process share company.job: a worker claims a job before running it, and each
+    committed batch renews its lease. Another worker only takes a running job over once its lease
+    has not been renewed for JOB_LEASE_TIMEOUT seconds, and the progress of the previous holder is
+    then rejected, so a job never runs twice at the same time.
+    """
+
+    def __init__(self, session_factory: Callable[[], AbstractContextManager[Database]],
+                 process_pool: Optional[Executor] = None, company_cache: Optional[CompanyCache] = None,
+                 rule_set_plan_cache: Optional[RuleSetPlanCache] = None):
+        """
+        Args:
+            session_factory (Callable): Returns a context manager yielding a pooled Database.
+            process_pool (Executor, optional): Pool handed to CompanyService for parallel rule evaluation.
+            company_cache (CompanyCache, optional): Cache of company rows handed to CompanyRepository.
+            rule_set_plan_cache (RuleSetPlanCache, optional): Plans of the registered rule sets run by jobs.
+        """
+        self.__session_factory = session_factory
+        self.__process_pool = process_pool
+        self.__company_cache = company_cache
+        self.__rule_set_plan_cache = rule_set_plan_cache
+        self.__queue = queue.Queue()
+        self.__queue_lock = threading.Lock()
+        self.__stopping = threading.Event()
+        self.__workers = []
+        self.__worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def start(self):
+        """
+        Starts the worker threads and enqueues the queued jobs, and the running jobs whose lease
+        expired, such as jobs left unfinished by a previous run.
+        """
+        self.__stopping.clear()
+        with self.__session_factory() as db:
+            claimable = JobRepository(db).fetch_claimable(self.__lease_expiry())
+        for row in claimable:
+            logger.info("Resuming job %s", row[0])
+            self.__queue.put(row[0])
+
+        for index in range(JOB_WORKERS):
+            worker = threading.Thread(target=self.__work, name=f"job-worker-{index}", daemon=True)
+            worker.start()
+            self.__workers.append(worker)
+
+    def stop(self):
+        """
+        Stops the workers after their current batch. Interrupted jobs stay queued in the database.
+        """
+        self.__stopping.set()
+        for _ in self.__workers:
+            self.__queue.put(None)
+        for worker in self.__workers:
+            worker.join()
+        self.__workers = []
+
+    def submit_import(self, path: str, import_format: ImportFormat) -> Job:
+        """
+        Submits a job importing a spooled upload. The file is removed once the job completes.
+
+        Args:
+            path (str): Path of the spooled upload.
+            import_format (ImportFormat): Format of the upload.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            JobQueueFullError: If JOB_QUEUE_SIZE jobs are already waiting.
+        """
+        return self.__submit(JobKind.IMPORT, {"path": path, "format": import_format.value})
+
+    def submit_process(self, urls: List[str], rules: Union[List[Rule], RuleSetPlan],
+                       execution: ExecutionMode = ExecutionMode.PYTHON, as_of: Optional[date] = None) -> Job:
+        """
+        Submits a job processing companies, in batches of JOB_PROCESS_BATCH_SIZE URLs.
+        A registered rule set is stored in the job by id only.
+
+        Args:
+            urls (List[str]): List of company URLs to process.
+            rules (List[Rule] or RuleSetPlan): Rules to apply during processing, or the plan of a registered rule set.
+            execution (ExecutionMode): Whether the rules run in the application or in the database.
+            as_of (date, optional): Date features depending on the clock are computed for, fixed for
+                                    every batch of the job. Defaults to the day of the submission.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            JobQueueFullError: If JOB_QUEUE_SIZE jobs are already waiting.
+        """
+        payload = {"urls": list(dict.fromkeys(urls)),
+                   "execution": execution.value,
+                   "as_of": (as_of or date.today()).isoformat()}
+        if isinstance(rules, RuleSetPlan) and rules.id is not None:
+            payload["rule_set_id"] = rules.id
+        else:
+            payload["rules"] = [rule.model_dump() for rule in rules]
+        return self.__submit(JobKind.PROCESS, payload)
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """
+        Retrieves a job and its progress.
+
+        Args:
+            job_id (str): The job identifier.
+
+        Returns:
+            Job or None: The job if found, else None.
+        """
+        with self.__session_factory() as db:
+            row = JobRepository(db).fetch(job_id)
+        return Job.from_row(row) if row else None
+
+    def get_result(self, job_id: str) -> Optional[ImportSummary | ProcessResponse]:
+        """
+        Retrieves the result of a completed job: the import summary of an import job, or the
+        current processed variables of the companies of a process job with its failures.
+
+        Args:
+            job_id (str): The job identifier.
+
+        Returns:
+            ImportSummary or ProcessResponse or None: The result, or None if the job does not exist.
+
+        Raises:
+            JobNotFinishedError: If the job has not completed.
+        """
+        with self.__session_factory() as db:
+            row = JobRepository(db).fetch(job_id)
+            if row is None:
+                return None
+            if row[2] != JobStatus.COMPLETED.value:
+                raise JobNotFinishedError(f"Job {job_id} is {row[2]}")
+
+            payload, result = row[3], row[4] or {}
+            if row[1] == JobKind.IMPORT.value:
+                return ImportSummary(**result)
+
+            failures = result.get("failures", {})
+            companies = CompanyRepository(db).fetch_by_urls(payload["urls"])
+            return ProcessResponse(
+                companies=[companies[url][3] for url in payload["urls"]
+                           if url in companies and url not in failures and companies[url][3] is not None],
+                failures=[ProcessFailure(url=url, error=error) for url, error in failures.items()])
+
+    def __submit(self, kind: JobKind, payload: dict[str, Any]) -> Job:
+        with self.__queue_lock:
+            if self.__queue.qsize() >= JOB_QUEUE_SIZE:
+                raise JobQueueFullError(f"{JOB_QUEUE_SIZE} jobs are already waiting")
+            with self.__session_factory() as db:
+                row = JobRepository(db).create(str(uuid.uuid4()), kind, payload)
+            self.__queue.put(row[0])
+        return Job.from_row(row)
+
+    def __work(self):
+        """Worker thread loop: runs queued jobs until a stop sentinel is received."""
+        while (job_id := self.__queue.get()) is not None:
+            try:
+                self.__run(job_id)
+            except Exception:
+                logger.exception("Job %s could not be run", job_id)
+
+    def __run(self, job_id: str):
+        """
+        Claims, then runs or resumes, a job with a dedicated database session.
+        Jobs held by another worker are skipped.
+        """
+        claimed_by = f"{self.__worker_id}/{threading.current_thread().name}"
+        with self.__session_factory() as db:
+            jobs = JobRepository(db)
+            row = jobs.claim(job_id, claimed_by, self.__lease_expiry())
+            if row is None:
+                return
+
+            company_service = CompanyService(CompanyRepository(db, self.__company_cache),
+                                             process_pool=self.__process_pool)
+            try:
+                if row[1] == JobKind.IMPORT.value:
+                    asyncio.run(self.__run_import(db, jobs, company_service, row, claimed_by))
+                else:
+                    self.__run_process(db, jobs, company_service, row, claimed_by)
+            except JobInterruptedError:
+                logger.info("Job %s interrupted, it will resume on the next start", job_id)
+                jobs.update_status(job_id, claimed_by, JobStatus.QUEUED)
+                return
+            except JobLeaseLostError:
+                logger.warning("Job %s was taken over by another worker", job_id)
+                return
+            except Exception as error:
+                logger.exception("Job %s failed", job_id)
+                finished = jobs.update_status(job_id, claimed_by, JobStatus.FAILED,
+                                              str(error).strip().splitlines()[0] or repr(error))
+            else:
+                finished = jobs.update_status(job_id, claimed_by, JobStatus.COMPLETED)
+
+        if finished and row[1] == JobKind.IMPORT.value and os.path.exists(row[3]["path"]):
+            os.remove(row[3]["path"])
+
+    async def __run_import(self, db: Database, jobs: JobRepository, company_service: CompanyService, row: tuple,
+                           claimed_by: str):
+        """
+        Imports a spooled upload in batches of IMPORT_BATCH_SIZE rows, skipping the rows
+        committed before an interruption. The upload is parsed once, so its number of rows
+        is only recorded once it has been read to the end.
+        """
+        job_id, payload, result, rows_done = row[0], row[3], row[4] or {}, row[7]
+        self.__check_claim(jobs.start(job_id, claimed_by))
+
+        total = ImportSummary(**{"rows_read": 0, "rows_inserted": 0, **result})
+        rows_to_skip = rows_done
+        async for batch in self.__iter_import_batches(payload):
+            if rows_to_skip >= len(batch):
+                rows_to_skip -= len(batch)
+                continue
+            batch, rows_to_skip = batch[rows_to_skip:], 0
+            self.__check_stopping()
+
+            with db.transaction():
+                summary = company_service.import_data(batch)
+                rows_done += len(batch)
+                total = total.combine(summary)
+                self.__check_claim(jobs.update_progress(job_id, claimed_by, rows_done, total.model_dump()))
+
+        self.__check_claim(jobs.update_progress(job_id, claimed_by, rows_done, total.model_dump(),
+                                                rows_total=rows_done))
+
+    def __run_process(self, db: Database, jobs: JobRepository, company_service: CompanyService, row: tuple,
+                      claimed_by: str):
+        """
+        Processes the companies of a job in batches of JOB_PROCESS_BATCH_SIZE URLs, starting after
+        the URLs committed before an interruption. Every batch is saved under the same processing run
+        and computes the features depending on the clock for the as-of date of the job. The rules are
+        prepared once for all the batches.
+        """
+        job_id, payload, result, rows_done = row[0], row[3], row[4] or {}, row[7]
+        urls = payload["urls"]
+        if "rule_set_id" in payload:
+            rule_set_service = RuleSetService(RuleSetRepository(db), self.__rule_set_plan_cache)
+            rules = rule_set_service.get_plan(payload["rule_set_id"])
+            if rules is None:
+                raise ValueError(f"Rule set {payload['rule_set_id']} is not registered")
+        else:
+            rules = RuleSetPlan([Rule.model_validate(rule) for rule in payload["rules"]], precompile=True)
+        execution = ExecutionMode(payload["execution"])
+        as_of = date.fromisoformat(payload.get("as_of") or date.today().isoformat())
+        failures = result.get("failures", {})
+        run_id = result.get("run_id") or CompanyRepository(db).create_run(datetime.now())
+        self.__check_claim(jobs.start(job_id, claimed_by, len(urls)))
+
+        for start in range(rows_done, len(urls), JOB_PROCESS_BATCH_SIZE):
+            self.__check_stopping()
+            batch = urls[start:start + JOB_PROCESS_BATCH_SIZE]
+            with db.transaction():
+                response = company_service.process_company(batch, rules, execution, run_id, as_of)
+                failures.update({failure.url: failure.error for failure in response.failures})
+                self.__check_claim(jobs.update_progress(job_id, claimed_by, start + len(batch),
+                                                        {"failures": failures, "run_id": run_id}))
+
+    @staticmethod
+    async def __iter_import_batches(payload: dict[str, Any]) -> AsyncIterator[list[dict[str, Any]]]:
+        """Re-parses a spooled upload with the same batch parsers used by the HTTP import."""
+        with AsyncFileReader(payload["path"]) as reader:
+            import_format = ImportFormat(payload["format"])
+            if import_format == ImportFormat.CSV:
+                batches = iter_csv_batches(reader, IMPORT_BATCH_SIZE)
+            elif import_format == ImportFormat.NDJSON:
+                batches = iter_ndjson_batches(reader, IMPORT_BATCH_SIZE)
+            else:
+                batches = iter_json_array_batches(reader, IMPORT_BATCH_SIZE)
+            async for batch in batches:
+                yield batch
+
+    def __check_stopping(self):
+        if self.__stopping.is_set():
+            raise JobInterruptedError()
+
+    @staticmethod
+    def __check_claim(held: bool):
+        """Stops a job, rolling back its current batch, once another worker took it over."""
+        if not held:
+            raise JobLeaseLostError()
+
+    @staticmethod
+    def __lease_expiry() -> datetime:
+        """Running jobs whose lease was last renewed before this date may be claimed again."""
+        return datetime.now() - timedelta(seconds=JOB_LEASE_TIMEOUT)
@@ -0,0 +1,125 @@
+import json
+import re
+from typing import Any, Callable, Iterable, Mapping
+
+from src.models.keyword_set import KeywordSet
+from src.services.feature_registry import Feature
+
+
+class KeywordClassifier:
+    """
+    Evaluates keyword sets against companies, each set producing its boolean feature.
+
+    The keywords of a set are compiled once into a single regular expression shaped like their
+    prefix tree, so a text is scanned once per set whatever the number of keywords: at each position
+    the expression only follows the branch of the next character, instead of trying every keyword.
+    """
+
+    def __init__(self, keyword_sets: Iterable[KeywordSet]):
+        """
+        Args:
+            keyword_sets (Iterable of KeywordSet): Keyword sets to evaluate, compiled once.
+        """
+        self.__keyword_sets = list(keyword_sets)
+        self.__matchers = [(keyword_set.feature_name, tuple(keyword_set.fields),
+                            re.compile(build_keyword_pattern(keyword_set.keywords)).search)
+                           for keyword_set in self.__keyword_sets]
+
+    @property
+    def feature_names(self) -> list[str]:
+        """
+        Names of the features produced, in the order of the keyword sets.
+        """
+        return [feature_name for feature_name, _, _ in self.__matchers]
+
+    def classify(self, company: Mapping[str, Any]) -> dict[str, bool]:
+        """
+        Evaluates every keyword set against a company.
+
+        Args:
+            company (Mapping): Company data. Missing or empty fields count as empty text.
+
+        Returns:
+            dict: Mapping from feature name to whether a keyword of the set was found.
+        """
+        texts = {}
+        features = {}
+        for feature_name, fields, search in self.__matchers:
+            text = texts.get(fields)
+            if text is None:
+                text = texts[fields] = " ".join(str(company.get(field) or "").lower() for field in fields)
+            features[feature_name] = search(text) is not None
+        return features
+
+    def features(self) -> list[Feature]:
+        """
+        Builds one feature per keyword set, for a FeatureRegistry.
+
+        Returns:
+            list of Feature: Features reading the fields of their set, computed on import unless disabled by the set.
+        """
+        return [Feature(feature_name, fields, self.__build_compute(fields, search), keyword_set.on_import)
+                for keyword_set, (feature_name, fields, search) in zip(self.__keyword_sets, self.__matchers)]
+
+    @staticmethod
+    def __build_compute(fields: tuple[str, ...], search: Callable) -> Callable[[list[Mapping[str, Any]]], list[bool]]:
+        def compute(companies: list[Mapping[str, Any]]) -> list[bool]:
+            return [search(" ".join(str(company.get(field) or "").lower() for field in fields)) is not None
+                    for company in companies]
+
+        return compute
+
+
+def build_keyword_pattern(keywords: Iterable[str]) -> str:
+    """
+    Builds a regular expression matching any of the keywords, lowercased, from their prefix tree.
+    Keywords extending a shorter keyword are left out, since the shorter one already matches.
+
+    Args:
+        keywords (Iterable of str): Keywords to match.
+
+    Returns:
+        str: The regular expression. It never matches when there are no keywords.
+    """
+    tree = {}
+    for keyword in keywords:
+        node = tree
+        for char in keyword.lower():
+            if node.get("") is True:
+                break
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[""] = True
+    return __build_alternation(tree) if tree else "(?!)"
+
+
+def __build_alternation(node: dict) -> str:
+    """
+    Renders the subtree of a node, merging single-character leaves into a character class.
+    """
+    if node.get("") is True:
+        return ""
+    leaves = [char for char, child in node.items() if child.get("") is True]
+    branches = [re.escape(char) + __build_alternation(child) for char, child in node.items()
+                if child.get("") is not True]
+    if len(leaves) == 1:
+        branches.append(re.escape(leaves[0]))
+    elif leaves:
+        branches.append("[" + "".join(re.escape(char) for char in leaves) + "]")
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+
+def load_keyword_sets(path: str) -> list[KeywordSet]:
+    """
+    Reads keyword sets from a JSON file holding a list of objects with
+    `feature_name`, `fields` and `keywords`.
+
+    Args:
+        path (str): Path of the JSON file.
+
+    Returns:
+        list of KeywordSet: The keyword sets of the file.
+    """
+    with open(path, encoding="utf-8") as file:
+        return [KeywordSet(**keyword_set) for keyword_set in json.load(file)]
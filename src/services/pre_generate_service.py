@@ -1,23 +1,137 @@
-from datetime import datetime
-from typing import Any, Optional, List
+from datetime import date
+from typing import Any, Optional, List, Iterable, Mapping
+
+from src.commons.config import KEYWORD_SETS_FILE
+from src.models.keyword_set import KeywordSet
+from src.services.feature_registry import Feature, FeatureRegistry
+from src.services.keyword_classifier import KeywordClassifier, load_keyword_sets
 
 # Keywords to detect if a company operates in SaaS or related domains
 SAAS_KEYWORDS = {
     "saas", "software as a service", "big data", "business intelligence", "cloud management"
 }
 
+DEFAULT_KEYWORD_SETS = [KeywordSet(feature_name="is_saas", fields=["description", "industry"],
+                                   keywords=sorted(SAAS_KEYWORDS))]
+
+# company_age computed in SQL like calculate_company_age, for rules evaluated in the database
+COMPANY_AGE_SQL = r"""extract(year FROM %s::date) - CASE jsonb_typeof(company.content -> 'founded_year')
+                          WHEN 'number' THEN trunc((company.content ->> 'founded_year')::numeric)
+                          WHEN 'boolean' THEN (company.content ->> 'founded_year')::boolean::int
+                          WHEN 'string' THEN CASE WHEN company.content ->> 'founded_year' ~ '^\s*[-+]?[0-9]+\s*$'
+                                                  THEN btrim(company.content ->> 'founded_year')::numeric
+                                             END
+                      END"""
+
+_default_feature_registry: Optional[FeatureRegistry] = None
+
+
+def parse_founded_year(value: Any) -> Optional[int]:
+    """
+    Attempts to convert the founded year value to an integer.
+
+    Args:
+        value (Any): The input value to parse.
+
+    Returns:
+        Optional[int]: Parsed year as int or None if invalid.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def calculate_company_age(company: Mapping[str, Any], as_of: date) -> Optional[int]:
+    """
+    Calculates the age of the company in the year of the as-of date.
+
+    Args:
+        company (Mapping): Company data, read for its founded_year.
+        as_of (date): Date the age is computed for.
+
+    Returns:
+        Optional[int]: Age of the company in years, or None if the founded year is invalid.
+    """
+    founded_year = parse_founded_year(company.get("founded_year"))
+    if founded_year is None:
+        return None
+    return as_of.year - founded_year
+
+
+def check_usa_based(company: Mapping[str, Any]) -> bool:
+    """
+    Checks if the company is based in the USA by looking for
+    'usa' in the headquarters city string.
+
+    Args:
+        company (Mapping): Company data, read for its headquarters_city.
+
+    Returns:
+        bool: True if based in the USA, False otherwise.
+    """
+    headquarters_city = company.get("headquarters_city")
+    if isinstance(headquarters_city, str):
+        return "usa" in headquarters_city.lower()
+    return False
+
+
+def build_feature_registry(keyword_sets: Iterable[KeywordSet]) -> FeatureRegistry:
+    """
+    Registers the pre-defined features: company_age, is_usa_based and one feature per keyword set.
+    company_age depends on the clock, so it is computed at process time for the as-of date of the run.
+
+    Args:
+        keyword_sets (Iterable of KeywordSet): Keyword sets, such as DEFAULT_KEYWORD_SETS.
+
+    Returns:
+        FeatureRegistry: The registry.
+    """
+    return FeatureRegistry([Feature.per_company("company_age", ["founded_year"], calculate_company_age,
+                                                on_import=False, uses_clock=True, sql=COMPANY_AGE_SQL),
+                            Feature.per_company("is_usa_based", ["headquarters_city"], check_usa_based),
+                            *KeywordClassifier(keyword_sets).features()])
+
+
+def get_default_feature_registry() -> FeatureRegistry:
+    """
+    Returns the registry of the pre-defined features, with DEFAULT_KEYWORD_SETS and the keyword sets
+    of KEYWORD_SETS_FILE, built on first use and shared by every PreGenerateService.
+
+    Returns:
+        FeatureRegistry: The shared registry.
+    """
+    global _default_feature_registry
+    if _default_feature_registry is None:
+        keyword_sets = DEFAULT_KEYWORD_SETS + (load_keyword_sets(KEYWORD_SETS_FILE) if KEYWORD_SETS_FILE else [])
+        _default_feature_registry = build_feature_registry(keyword_sets)
+    return _default_feature_registry
+
 
 class PreGenerateService:
     """
     Service responsible for adding pre-defined features to company data
     before further processing, like calculating company age, detecting
     if company is USA-based, or if it is related to SaaS.
+
+    Features are declared in a FeatureRegistry with the inputs they read. Features marked
+    `on_import` are computed on import and stored with the company content; the others are
+    computed at process time, only when the rules use them, so expensive features cost nothing
+    to imports and to rule sets that do not need them.
     """
 
+    def __init__(self, feature_registry: Optional[FeatureRegistry] = None):
+        """
+        Args:
+            feature_registry (FeatureRegistry, optional): Features available to the pipeline.
+                                                          Defaults to get_default_feature_registry().
+        """
+        self.__feature_registry = feature_registry or get_default_feature_registry()
+
     def generate(self, data: List[dict[str, Any]]) -> List[dict[str, Any]]:
         """
-        Iterates over a list of companies and enriches each dictionary
-        with pre-defined features.
+        Enriches each company of an imported batch with the features computed on import
+        (by default is_usa_based and is_saas), in dependency order.
 
         Args:
             data (List[dict]): List of company data dictionaries.
@@ -25,86 +139,64 @@ class PreGenerateService:
         Returns:
             List[dict]: The enriched list with added features.
         """
-        for company in data:
-            self.__set_pre_defined_features(company)
+        self.__feature_registry.compute(data, self.__feature_registry.import_features)
         return data
 
-    def __set_pre_defined_features(self, company: dict[str, Any]) -> None:
+    def complete(self, companies: List[Mapping[str, Any]], inputs: Iterable[str],
+                 as_of: Optional[date] = None) -> List[Mapping[str, Any]]:
         """
-        Adds predefined features to a single company dictionary, including:
-        - company_age (int or None)
-        - is_usa_based (bool)
-        - is_saas (bool)
+        Adds the features used by a rule set to the stored content of companies, at process time:
+        features not computed on import, and features registered after the companies were imported.
+        Features already present in the content are kept as they are, except the features depending
+        on the clock, which are always computed for the as-of date of the run.
 
         Args:
-            company (dict): Company data dictionary to enrich.
-        """
-        founded_year = self.__parse_founded_year(company.get("founded_year"))
-        company["company_age"] = self.__calculate_company_age(founded_year) if founded_year is not None else None
-        company["is_usa_based"] = self.__check_usa_based(company.get("headquarters_city"))
-        company["is_saas"] = self.__check_is_saas(company)
-
-    @staticmethod
-    def __parse_founded_year(value: Any) -> Optional[int]:
-        """
-        Attempts to convert the founded year value to an integer.
-
-        Args:
-            value (Any): The input value to parse.
+            companies (List[Mapping]): Stored company content. It is not modified, since it may be shared.
+            inputs (Iterable of str): The inputs of the rules.
+            as_of (date, optional): Date the features using the clock are computed for. Defaults to today.
 
         Returns:
-            Optional[int]: Parsed year as int or None if invalid.
+            List[Mapping]: The companies, copied when a feature had to be added.
         """
-        try:
-            return int(value)
-        except (TypeError, ValueError):
-            return None
-
-    @staticmethod
-    def __calculate_company_age(founded_year: int) -> int:
+        features = self.__feature_registry.resolve(inputs)
+        if not any(feature.uses_clock for feature in features) and \
+                not any(feature.name not in company for feature in features for company in companies):
+            return companies
+        completed = [dict(company) for company in companies]
+        self.__feature_registry.compute(completed, [feature.name for feature in features], missing_only=True,
+                                        as_of=as_of)
+        return completed
+
+    def uses_clock(self, inputs: Iterable[str]) -> bool:
         """
-        Calculates the age of the company based on the current year.
+        Whether the results of a rule set depend on the as-of date of the run.
 
         Args:
-            founded_year (int): The year the company was founded.
+            inputs (Iterable of str): The inputs of the rules.
 
         Returns:
-            int: Age of the company in years.
+            bool: True if a rule uses a feature depending on the clock.
         """
-        current_year = datetime.now().year
-        return current_year - founded_year
+        return self.__feature_registry.uses_clock(inputs)
 
-    @staticmethod
-    def __check_usa_based(headquarters_city: Any) -> bool:
+    def database_features(self, inputs: Iterable[str], as_of: date) -> dict[str, tuple[str, list[Any]]]:
         """
-        Checks if the company is based in the USA by looking for
-        'usa' in the headquarters city string.
+        Returns the SQL expressions of the process-time features used by a rule set, for rules evaluated
+        in the database, where only the stored company content is available.
 
         Args:
-            headquarters_city (Any): City string to check.
+            inputs (Iterable of str): The inputs of the rules.
+            as_of (date): Date the features using the clock are computed for.
 
         Returns:
-            bool: True if based in the USA, False otherwise.
-        """
-        if isinstance(headquarters_city, str):
-            return "usa" in headquarters_city.lower()
-        return False
-
-    @staticmethod
-    def __check_is_saas(company: dict[str, Any]) -> bool:
-        """
-        Determines if the company is related to SaaS or similar fields
-        by checking certain text fields for keywords.
+            dict: Mapping from feature name to (SQL expression, parameters).
 
-        Args:
-            company (dict): Company data dictionary.
-
-        Returns:
-            bool: True if SaaS-related keywords found, False otherwise.
+        Raises:
+            ValueError: If a process-time feature used by the rules has no SQL expression.
         """
-        fields_to_check = [
-            company.get("description", ""),
-            company.get("industry", "")
-        ]
-        combined_text = " ".join(str(field or "").lower() for field in fields_to_check)
-        return any(keyword in combined_text for keyword in SAAS_KEYWORDS)
+        features = [feature for feature in self.__feature_registry.resolve(inputs) if not feature.on_import]
+        unsupported = [feature.name for feature in features if feature.sql is None]
+        if unsupported:
+            raise ValueError(f"Features computed at process time cannot be evaluated in database mode: "
+                             f"{', '.join(unsupported)}")
+        return {feature.name: (feature.sql, [as_of] * feature.sql.count("%s")) for feature in features}
@@ -0,0 +1,244 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Optional, Union
+
+from src.commons.hash_utils import canonical_json
+from src.models.rule_set import RuleSet
+from src.models.rules import Rule
+from src.repositories.rule_set_repository import RuleSetRepository, parse_rule_set_id
+from src.services.rules_processor_service import RulesProcessorService
+
+# As-of dates whose fingerprint a plan keeps, for rule sets using features that depend on the clock
+PLAN_DATED_FINGERPRINTS = 8
+
+
+class RuleSetPlan:
+    """
+    A rule set prepared for evaluation: validated rules, their inputs and fingerprint, and, once
+    needed, the serialized payload sent to the process pool and the SQL expression of database mode.
+
+    Plans of registered rule sets are built once per worker and kept in a RuleSetPlanCache, so
+    requests naming a rule set skip the validation, fingerprinting and compilation of its rules.
+    Plans of rules sent with a request are built for that request only.
+    """
+
+    def __init__(self, rules: list[Rule], rule_set_id: Optional[int] = None, precompile: bool = False):
+        """
+        Args:
+            rules (list of Rule): Validated rules, in evaluation order.
+            rule_set_id (int, optional): Id of the registered rule set.
+            precompile (bool): Compile the Python evaluator of the rules right away, for plans reused by many requests.
+        """
+        self.id = rule_set_id
+        self.rules = rules
+        self.inputs = [rule.input for rule in rules]
+        self.rules_data = [rule.model_dump() for rule in rules]
+        self.fingerprint = RulesProcessorService.fingerprint_rule_data(self.rules_data)
+        self.evaluate: Optional[Callable[[dict[str, Any]], dict[str, int]]] = \
+            RulesProcessorService().compile_rules(rules) if precompile else None
+        self.__payload: Optional[str] = None
+        self.__sql: Optional[tuple[str, list[Any]]] = None
+        self.__dated_fingerprints: dict[date, str] = {}
+
+    def fingerprint_for(self, as_of: Optional[date]) -> str:
+        """
+        Returns the fingerprint results of the rule set are stored with, see RulesProcessorService.fingerprint_rules.
+
+        Args:
+            as_of (date, optional): As-of date of the run, for rule sets using features that depend on the clock.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest.
+        """
+        if as_of is None:
+            return self.fingerprint
+        dated_fingerprint = self.__dated_fingerprints.get(as_of)
+        if dated_fingerprint is None:
+            if len(self.__dated_fingerprints) >= PLAN_DATED_FINGERPRINTS:
+                self.__dated_fingerprints.clear()
+            dated_fingerprint = RulesProcessorService.fingerprint_rule_data(self.rules_data, as_of)
+            self.__dated_fingerprints[as_of] = dated_fingerprint
+        return dated_fingerprint
+
+    def serialize(self) -> tuple[str, str]:
+        """
+        Returns the rule set as sent to the process pool, see rules_processor_worker.evaluate_chunk.
+
+        Returns:
+            tuple: (fingerprint, canonical JSON payload)
+        """
+        if self.__payload is None:
+            self.__payload = canonical_json(self.rules_data)
+        return self.fingerprint, self.__payload
+
+    def compile_sql(self, derived_inputs: Optional[dict[str, tuple[str, list]]] = None) -> tuple[str, list[Any]]:
+        """
+        Translates the rules into SQL, see RulesProcessorService.compile_rules_to_sql. The translation
+        is kept when no input is derived, since it then does not depend on the run.
+
+        Args:
+            derived_inputs (dict, optional): Mapping from input name to (SQL expression, parameters).
+
+        Returns:
+            tuple: (SQL expression, list of parameters in placeholder order)
+
+        Raises:
+            ValueError: If a rule has no operation.
+        """
+        if derived_inputs:
+            return RulesProcessorService.compile_rules_to_sql(self.rules, derived_inputs)
+        if self.__sql is None:
+            self.__sql = RulesProcessorService.compile_rules_to_sql(self.rules)
+        return self.__sql
+
+
+class RuleSetPlanCache:
+    """
+    Thread-safe, in-process LRU cache of the plans of registered rule sets, found by id or fingerprint.
+    Registered rule sets never change, so cached plans never need to be invalidated.
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        Args:
+            max_entries (int): Maximum number of plans kept.
+        """
+        self.__max_entries = max_entries
+        self.__plans: OrderedDict[str, RuleSetPlan] = OrderedDict()
+        self.__fingerprints_by_id: dict[int, str] = {}
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def get(self, reference: Union[int, str]) -> Optional[RuleSetPlan]:
+        """
+        Returns the cached plan of a rule set, marking it as recently used.
+
+        Args:
+            reference (int or str): Id of the rule set, or its fingerprint.
+
+        Returns:
+            RuleSetPlan or None: The plan, or None when it is not cached.
+        """
+        rule_set_id = parse_rule_set_id(reference)
+        with self.__lock:
+            rules_fingerprint = reference if rule_set_id is None else self.__fingerprints_by_id.get(rule_set_id)
+            plan = self.__plans.get(rules_fingerprint)
+            if plan is None:
+                self.__misses += 1
+                return None
+            self.__plans.move_to_end(rules_fingerprint)
+            self.__hits += 1
+            return plan
+
+    def put(self, plan: RuleSetPlan) -> RuleSetPlan:
+        """
+        Caches the plan of a registered rule set, evicting the least recently used plans over the limit.
+
+        Args:
+            plan (RuleSetPlan): Plan of a registered rule set.
+
+        Returns:
+            RuleSetPlan: The cached plan, which is the one already cached when another request built it first.
+        """
+        with self.__lock:
+            cached = self.__plans.get(plan.fingerprint)
+            if cached is not None:
+                return cached
+            self.__plans[plan.fingerprint] = plan
+            self.__fingerprints_by_id[plan.id] = plan.fingerprint
+            while len(self.__plans) > self.__max_entries:
+                _, evicted = self.__plans.popitem(last=False)
+                del self.__fingerprints_by_id[evicted.id]
+                self.__evictions += 1
+            return plan
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict: Counters of hits, misses and evictions since startup, and the current number of plans.
+        """
+        with self.__lock:
+            return {"hits": self.__hits,
+                    "misses": self.__misses,
+                    "evictions": self.__evictions,
+                    "entries": len(self.__plans)}
+
+
+class RuleSetService:
+    """
+    Service registering rule sets and resolving the plans of registered rule sets, through a RuleSetPlanCache.
+    """
+
+    def __init__(self, rule_set_repository: RuleSetRepository, plan_cache: Optional[RuleSetPlanCache] = None):
+        """
+        Args:
+            rule_set_repository (RuleSetRepository): Repository of the registered rule sets.
+            plan_cache (RuleSetPlanCache, optional): Plans shared by the services of the worker.
+                                                     Plans are built for every lookup without it.
+        """
+        self.__rule_set_repository = rule_set_repository
+        self.__plan_cache = plan_cache
+
+    def register(self, rules: list[Rule]) -> RuleSet:
+        """
+        Registers a rule set, returning the stored one when equal rules were registered before.
+
+        Args:
+            rules (list of Rule): The rules, in evaluation order.
+
+        Returns:
+            RuleSet: The registered rule set, without its rules.
+        """
+        plan = RuleSetPlan(rules)
+        rule_set_id, rules_fingerprint, created_date = self.__rule_set_repository.register(plan.fingerprint,
+                                                                                           plan.rules_data)
+        return RuleSet(id=rule_set_id, fingerprint=rules_fingerprint, rule_count=len(rules), created_date=created_date)
+
+    def get(self, reference: Union[int, str]) -> Optional[RuleSet]:
+        """
+        Retrieves a registered rule set with its rules.
+
+        Args:
+            reference (int or str): Id of the rule set, or its fingerprint.
+
+        Returns:
+            RuleSet or None: The rule set if found, else None.
+        """
+        row = self.__rule_set_repository.fetch(reference)
+        return RuleSet.from_row(row) if row is not None else None
+
+    def get_plan(self, reference: Union[int, str]) -> Optional[RuleSetPlan]:
+        """
+        Returns the plan of a registered rule set, from the plan cache when it holds it.
+
+        Args:
+            reference (int or str): Id of the rule set, or its fingerprint.
+
+        Returns:
+            RuleSetPlan or None: The plan if the rule set is registered, else None.
+        """
+        plan = self.__plan_cache.get(reference) if self.__plan_cache is not None else None
+        if plan is None:
+            row = self.__rule_set_repository.fetch(reference)
+            if row is None:
+                return None
+            plan = build_plan(row)
+            if self.__plan_cache is not None:
+                plan = self.__plan_cache.put(plan)
+        return plan
+
+
+def build_plan(row: tuple) -> RuleSetPlan:
+    """
+    Builds the plan of a registered rule set from its company.rule_set row.
+
+    Args:
+        row (tuple): (id, fingerprint, rules, created_date)
+
+    Returns:
+        RuleSetPlan: The plan, with its evaluator compiled.
+    """
+    return RuleSetPlan([Rule.model_validate(rule) for rule in row[2]], row[0], precompile=True)
@@ -1,7 +1,27 @@
-from typing import Any
+from datetime import date
+from itertools import repeat
+import operator
+from typing import Any, Callable, Optional
 
+import numpy as np
+
+from src.commons.config import RULES_VECTORIZE_MIN_BATCH, RULES_VECTORIZE_MIN_RULES
+from src.commons.hash_utils import fingerprint
 from src.models.rules import Rule, Operation
 
+NUMERIC_TYPES = (int, float)
+NUMERIC_OR_NONE_TYPES = {int, float, bool, type(None)}
+# Integers beyond this magnitude cannot be compared exactly once converted to float64
+FLOAT_EXACT_INT_LIMIT = 2 ** 53
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+# Numeric value of a company_data.content key, NULL when it is not a JSON number or boolean
+SQL_NUMERIC_VALUE = """CASE jsonb_typeof(company.content -> %s::text)
+                           WHEN 'number' THEN (company.content ->> %s::text)::numeric
+                           WHEN 'boolean' THEN (company.content ->> %s::text)::boolean::int
+                       END"""
+# PostgreSQL functions take at most 100 arguments, so jsonb_build_object is split in groups
+SQL_MAX_OBJECT_PAIRS = 50
+
 
 class RulesProcessorService:
     """
@@ -27,6 +47,264 @@ class RulesProcessorService:
             results[rule.feature_name] = result
         return results
 
+    def process_batch(self, companies_data: list[dict[str, Any]], rules: list[Rule],
+                      evaluate: Callable[[dict[str, Any]], dict[str, int]] = None) -> list[dict[str, int]]:
+        """
+        Applies the rules to a batch of companies, picking the fastest strategy for its shape:
+        columnar vectorized evaluation for batches of at least RULES_VECTORIZE_MIN_BATCH
+        companies and RULES_VECTORIZE_MIN_RULES rules, the compiled evaluator otherwise.
+
+        Args:
+            companies_data (list of dict): Company attribute dictionaries.
+            rules (list of Rule): List of rules to apply.
+            evaluate (Callable, optional): Evaluator already compiled from the same rules.
+
+        Returns:
+            list of dict: Feature results for each company, in the same order.
+        """
+        if len(companies_data) >= RULES_VECTORIZE_MIN_BATCH and len(rules) >= RULES_VECTORIZE_MIN_RULES:
+            return self.evaluate_vectorized(companies_data, rules)
+        evaluate = evaluate or self.compile_rules(rules)
+        return [evaluate(company_data) for company_data in companies_data]
+
+    def evaluate_vectorized(self, companies_data: list[dict[str, Any]], rules: list[Rule]) -> list[dict[str, int]]:
+        """
+        Evaluates the rules over a whole batch at once. Each distinct rule input becomes
+        a NumPy column with presence and numeric masks, each rule becomes one vectorized
+        comparison producing a column of the features matrix, and the matrix is finally
+        split back into one dictionary per company. Results match `process_rules`.
+
+        Args:
+            companies_data (list of dict): Company attribute dictionaries.
+            rules (list of Rule): List of rules to apply.
+
+        Returns:
+            list of dict: Feature results for each company, in the same order.
+
+        Raises:
+            ValueError: If a rule has no operation and its input is present for some company.
+        """
+        if not rules:
+            return [{} for _ in companies_data]
+
+        columns = {}
+        integer_results = all(INT64_MIN <= value <= INT64_MAX for rule in rules for value in (rule.match, rule.default))
+        features = np.empty((len(companies_data), len(rules)), dtype=np.int64 if integer_results else object)
+        for index, rule in enumerate(rules):
+            if rule.input not in columns:
+                columns[rule.input] = self.__build_column(list(map(dict.get, companies_data, repeat(rule.input))))
+            present, condition = self.__evaluate_column(columns[rule.input], rule.operation)
+            features[:, index] = np.where(present & condition, rule.match, rule.default)
+
+        feature_names = [rule.feature_name for rule in rules]
+        return [dict(zip(feature_names, row)) for row in features.tolist()]
+
+    @staticmethod
+    def __build_column(values: list[Any]) -> tuple:
+        """
+        Converts the values of one input into columnar arrays. Non-numeric values become NaN,
+        which compares false against any threshold, exactly like the interpreted type check.
+
+        Returns:
+            tuple: (values, present mask, float64 numbers or None when float64 could not
+                    represent every numeric value exactly)
+        """
+        present = np.fromiter(map(operator.is_not, values, repeat(None)), dtype=bool, count=len(values))
+        if not set(map(type, values)) <= NUMERIC_OR_NONE_TYPES:
+            values_to_convert = [value if isinstance(value, NUMERIC_TYPES) else None for value in values]
+        else:
+            values_to_convert = values
+        try:
+            # None converts to NaN
+            numbers = np.array(values_to_convert, dtype=np.float64)
+        except OverflowError:
+            return values, present, None
+        if np.any(np.abs(numbers) >= FLOAT_EXACT_INT_LIMIT):
+            numbers = None
+        return values, present, numbers
+
+    @staticmethod
+    def __evaluate_column(column: tuple, operation: Operation) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluates one operation over a whole column, with the same semantics as `__evaluate_condition`.
+        Falls back to exact Python comparisons when float64 could lose integer precision.
+
+        Returns:
+            tuple: (present mask, condition mask)
+        """
+        values, present, numbers = column
+        if operation.greater_than is not None:
+            threshold, compare, exact_compare = operation.greater_than, np.greater, operator.gt
+        elif operation.less_than is not None:
+            threshold, compare, exact_compare = operation.less_than, np.less, operator.lt
+        elif operation.equal is not None:
+            threshold, compare, exact_compare = operation.equal, np.equal, operator.eq
+        else:
+            if present.any():
+                raise ValueError("No valid operation defined")
+            return present, present
+
+        if numbers is not None and abs(threshold) < FLOAT_EXACT_INT_LIMIT:
+            return present, compare(numbers, float(threshold))
+
+        if exact_compare is operator.eq:
+            condition = [value == threshold for value in values]
+        else:
+            condition = [isinstance(value, NUMERIC_TYPES) and exact_compare(value, threshold) for value in values]
+        return present, np.array(condition, dtype=bool)
+
+    def compile_rules(self, rules: list[Rule]) -> Callable[[dict[str, Any]], dict[str, int]]:
+        """
+        Compiles a list of rules once into a single evaluator function, so applying
+        them to many companies does not re-interpret every rule for every company.
+
+        The generated function reads each distinct input once, binds thresholds and
+        match/default values as constants, and returns the same mapping `process_rules` would.
+
+        Args:
+            rules (list of Rule): List of rules to compile.
+
+        Returns:
+            Callable: Function mapping a company data dictionary to its feature results.
+        """
+        inputs = {}
+        lines = ["def evaluate(company_data):", "    get = company_data.get"]
+        for rule in rules:
+            if rule.input not in inputs:
+                inputs[rule.input] = f"value_{len(inputs)}"
+                lines.append(f"    {inputs[rule.input]} = get({rule.input!r})")
+
+        entries = [f"        {rule.feature_name!r}: {self.__compile_rule(rule, inputs[rule.input])}," for rule in rules]
+        lines += ["    return {", *entries, "    }"]
+
+        namespace = {"NUMERIC_TYPES": NUMERIC_TYPES, "isinstance": isinstance,
+                     "no_valid_operation": self.__no_valid_operation}
+        exec(compile("\n".join(lines), "<compiled rules>", "exec"), namespace)
+        return namespace["evaluate"]
+
+    @staticmethod
+    def __compile_rule(rule: Rule, value: str) -> str:
+        """
+        Generates the expression evaluating a single rule, with the same semantics as `__evaluate_rule`.
+
+        Args:
+            rule (Rule): Rule to compile.
+            value (str): Name of the local variable holding the rule input value.
+
+        Returns:
+            str: A Python expression evaluating to rule.match or rule.default.
+        """
+        operation = rule.operation
+        match, default = repr(rule.match), repr(rule.default)
+        if operation.greater_than is not None:
+            condition = f"isinstance({value}, NUMERIC_TYPES) and {value} > {operation.greater_than!r}"
+        elif operation.less_than is not None:
+            condition = f"isinstance({value}, NUMERIC_TYPES) and {value} < {operation.less_than!r}"
+        elif operation.equal is not None:
+            condition = f"{value} == {operation.equal!r}"
+        else:
+            return f"{default} if {value} is None else no_valid_operation()"
+        return f"{default} if {value} is None else ({match} if {condition} else {default})"
+
+    @staticmethod
+    def fingerprint_rules(rules: list[Rule], as_of: Optional[date] = None) -> str:
+        """
+        Computes the fingerprint of a rule set, recorded with the processed variables it computes
+        so they can be reused while the company content does not change.
+
+        Args:
+            rules (list of Rule): List of rules, in evaluation order.
+            as_of (date, optional): As-of date of the run, for rule sets using features that depend
+                                    on the clock, whose results are only reused for the same date.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest of the canonical rule set.
+        """
+        return RulesProcessorService.fingerprint_rule_data([rule.model_dump() for rule in rules], as_of)
+
+    @staticmethod
+    def fingerprint_rule_data(rules_data: list[dict[str, Any]], as_of: Optional[date] = None) -> str:
+        """
+        Computes the fingerprint of a rule set already dumped from its Rule models, see `fingerprint_rules`.
+
+        Args:
+            rules_data (list of dict): The rules, as dumped by `Rule.model_dump`.
+            as_of (date, optional): As-of date of the run, for rule sets using features that depend on the clock.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest of the canonical rule set.
+        """
+        if as_of is None:
+            return fingerprint(rules_data)
+        return fingerprint({"rules": rules_data, "as_of": as_of.isoformat()})
+
+    @staticmethod
+    def compile_rules_to_sql(rules: list[Rule],
+                             derived_inputs: Optional[dict[str, tuple[str, list]]] = None) -> tuple[str, list[Any]]:
+        """
+        Translates a list of rules into a single SQL expression building the processed
+        variables from `company.content`, so they can be computed inside PostgreSQL.
+
+        Each distinct input is read once as a number (JSON booleans count as 0/1, like
+        Python's bool) and every rule becomes a `CASE WHEN ... THEN match ELSE default END`
+        entry of a `jsonb_build_object`. Inputs, feature names and values are bound as
+        parameters, never inlined. Results match `process_rules`.
+
+        Args:
+            rules (list of Rule): List of rules to translate.
+            derived_inputs (dict, optional): Mapping from input name to (SQL expression, parameters)
+                                             for inputs computed instead of read from the content,
+                                             see PreGenerateService.database_features.
+
+        Returns:
+            tuple: (SQL expression, list of parameters in placeholder order)
+
+        Raises:
+            ValueError: If a rule has no operation, since it cannot be decided without the data.
+        """
+        if not rules:
+            return "'{}'::jsonb", []
+
+        derived_inputs = derived_inputs or {}
+        inputs = {}
+        value_columns, value_params = [], []
+        for rule in rules:
+            if rule.input not in inputs:
+                inputs[rule.input] = f"value_{len(inputs)}"
+                if rule.input in derived_inputs:
+                    expression, params = derived_inputs[rule.input]
+                    value_columns.append(f"({expression}) AS {inputs[rule.input]}")
+                    value_params += params
+                else:
+                    value_columns.append(f"{SQL_NUMERIC_VALUE} AS {inputs[rule.input]}")
+                    value_params += [rule.input] * 3
+
+        objects, object_params = [], []
+        for start in range(0, len(rules), SQL_MAX_OBJECT_PAIRS):
+            entries = []
+            for rule in rules[start:start + SQL_MAX_OBJECT_PAIRS]:
+                operation = rule.operation
+                if operation.greater_than is not None:
+                    operator, threshold = ">", operation.greater_than
+                elif operation.less_than is not None:
+                    operator, threshold = "<", operation.less_than
+                elif operation.equal is not None:
+                    operator, threshold = "=", int(operation.equal)
+                else:
+                    raise ValueError(f"No valid operation defined for feature {rule.feature_name}")
+                entries.append(f"%s::text, CASE WHEN {inputs[rule.input]} {operator} %s::numeric "
+                               f"THEN %s::numeric ELSE %s::numeric END")
+                object_params += [rule.feature_name, threshold, rule.match, rule.default]
+            objects.append(f"jsonb_build_object({', '.join(entries)})")
+
+        expression = (f"(SELECT {' || '.join(objects)} "
+                      f"FROM (SELECT {', '.join(value_columns)}) AS company_values)")
+        return expression, object_params + value_params
+
+    @staticmethod
+    def __no_valid_operation():
+        raise ValueError("No valid operation defined")
+
     def __evaluate_rule(self, company_data: dict[str, Any], rule: Rule) -> int:
         """
         Evaluates a single rule against the company data.
@@ -71,7 +349,7 @@ class RulesProcessorService:
             ValueError: If the operation_type is unsupported.
         """
         if operation_type in ("greater_than", "less_than"):
-            if not isinstance(input_value, (int, float)):
+            if not isinstance(input_value, NUMERIC_TYPES):
                 return False
 
         if operation_type == "greater_than":
@@ -0,0 +1,50 @@
+"""
+Entry points executed inside the process pool workers that evaluate rules in parallel.
+
+A rule set is sent as canonical JSON together with its fingerprint. Each worker parses
+and compiles a rule set the first time it sees its fingerprint and keeps it for the
+following chunks, so rules are not re-validated and re-compiled for every chunk.
+"""
+import json
+from collections import OrderedDict
+from typing import Any, Callable
+
+from src.models.rules import Rule
+from src.services.rules_processor_service import RulesProcessorService
+
+# Rule sets kept compiled by each worker process
+WORKER_RULE_SETS_CACHE_SIZE = 16
+
+_rules_processor_service = RulesProcessorService()
+_rule_sets: OrderedDict[str, tuple[list[Rule], Callable[[dict[str, Any]], dict[str, int]]]] = OrderedDict()
+
+
+def evaluate_chunk(rules_fingerprint: str, rules_payload: str,
+                   companies_data: list[dict[str, Any]]) -> list[dict[str, int]]:
+    """
+    Applies a rule set to a chunk of companies inside a worker process.
+
+    Args:
+        rules_fingerprint (str): Fingerprint of the rule set, as returned by `RuleSetPlan.serialize`.
+        rules_payload (str): Serialized rule set, only parsed the first time the worker sees it.
+        companies_data (list of dict): Company attribute dictionaries.
+
+    Returns:
+        list of dict: Feature results for each company, in the same order.
+    """
+    rules, evaluate = __get_rule_set(rules_fingerprint, rules_payload)
+    return _rules_processor_service.process_batch(companies_data, rules, evaluate)
+
+
+def __get_rule_set(rules_fingerprint: str, rules_payload: str):
+    """Returns the parsed and compiled rule set, compiling it on first use."""
+    rule_set = _rule_sets.get(rules_fingerprint)
+    if rule_set is None:
+        rules = [Rule.model_validate(rule) for rule in json.loads(rules_payload)]
+        rule_set = rules, _rules_processor_service.compile_rules(rules)
+        _rule_sets[rules_fingerprint] = rule_set
+        if len(_rule_sets) > WORKER_RULE_SETS_CACHE_SIZE:
+            _rule_sets.popitem(last=False)
+    else:
+        _rule_sets.move_to_end(rules_fingerprint)
+    return rule_set
@@ -0,0 +1,100 @@
+import json
+import math
+import re
+from typing import Any, Iterable, Mapping, MutableMapping, Optional
+
+from src.commons.config import IMPORT_NULL_MARKERS
+from src.models.company_schema import COMPANY_SCHEMA, ColumnType
+
+_INTEGER = re.compile(r"[-+]?[0-9]+")
+_DECIMAL = re.compile(r"[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?")
+
+
+class TypeCoercionService:
+    """
+    Service converting the text values of imported companies to the types declared by a schema,
+    once on import, so the stored content holds numbers and objects and rules never parse text.
+
+    CSV rows hold every value as text, so numeric rules would otherwise never match them. Columns
+    are converted one at a time over the whole batch. Null markers such as "N/A" become null, and
+    values that do not parse as the column type are kept as imported.
+    """
+
+    def __init__(self, schema: Optional[Mapping[str, ColumnType]] = None,
+                 null_markers: Optional[Iterable[str]] = None):
+        """
+        Args:
+            schema (Mapping, optional): Mapping from column name to type. Defaults to COMPANY_SCHEMA.
+            null_markers (Iterable of str, optional): Values stored as null in typed columns, compared
+                                                      case-insensitively. Defaults to IMPORT_NULL_MARKERS.
+                                                      Empty values are always null.
+        """
+        if null_markers is None:
+            null_markers = IMPORT_NULL_MARKERS.split(",")
+        self.__schema = dict(COMPANY_SCHEMA if schema is None else schema)
+        self.__null_markers = frozenset(marker.strip().lower() for marker in null_markers) | {""}
+
+    def coerce(self, data: list[MutableMapping[str, Any]]) -> list[MutableMapping[str, Any]]:
+        """
+        Converts the text values of the typed columns of a batch, in place. Values that are not text,
+        such as numbers of JSON imports, and missing columns are left untouched.
+
+        Args:
+            data (list of dict): Company data of an imported batch.
+
+        Returns:
+            list of dict: The same companies, with typed values.
+        """
+        null_markers = self.__null_markers
+        for column, column_type in self.__schema.items():
+            parse = parse_number if column_type == ColumnType.NUMBER else parse_json
+            for company in data:
+                value = company.get(column)
+                if isinstance(value, str):
+                    company[column] = None if value.strip().lower() in null_markers else parse(value)
+        return data
+
+
+def parse_number(text: str) -> Any:
+    """
+    Parses integer or decimal text, surrounded by optional whitespace.
+
+    Args:
+        text (str): The text to parse.
+
+    Returns:
+        Any: An int for integer text, a float for other finite decimals, the text itself otherwise.
+    """
+    text = text.strip()
+    try:
+        if _INTEGER.fullmatch(text):
+            return int(text)
+        if _DECIMAL.fullmatch(text):
+            number = float(text)
+            if math.isfinite(number):
+                return number
+    except ValueError:
+        pass
+    return text
+
+
+def parse_json(text: str) -> Any:
+    """
+    Parses the text of a JSON object or array, like the employee_locations column.
+
+    Args:
+        text (str): The text to parse.
+
+    Returns:
+        Any: The parsed object or array, or the text itself when it is not one.
+    """
+    try:
+        value = json.loads(text, parse_constant=_reject_constant)
+    except (ValueError, RecursionError):
+        return text
+    return value if isinstance(value, (dict, list)) else text
+
+
+def _reject_constant(constant: str):
+    """Rejects NaN and Infinity, which are not valid in PostgreSQL jsonb."""
+    raise ValueError(f"Invalid JSON constant {constant}")
@@ -0,0 +1,142 @@
+"""
+Benchmark of concurrent-request throughput on POST /v1/company/process-company.
+
+Compares the previous behaviour (async handlers calling the synchronous CompanyService
+inline, blocking the event loop) against the AsyncCompanyService backed by the async pool.
+
+Requires a reachable PostgreSQL configured through the DB_* environment variables.
+Use --latency-ms to route database traffic through a local proxy that delays every
+packet, approximating a database on another host:
+
+    python -m tests.benchmarks.bench_concurrent_requests --requests 500 --concurrency 50 --latency-ms 2
+"""
+import argparse
+import asyncio
+import csv
+import json
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from src.app import app
+from src.core import context
+from src.core.context import database_session, get_async_company_service
+from src.repositories.company_repository import CompanyRepository
+from src.services.company_service import CompanyService
+
+ASSETS = Path(__file__).resolve().parents[2] / "assets"
+
+
+class BlockingCompanyService:
+    """
+    Exposes the synchronous CompanyService behind awaitable methods without yielding
+    to the event loop, reproducing how the handlers behaved before the async layer.
+    """
+
+    def __init__(self, company_service: CompanyService):
+        self.__company_service = company_service
+
+    async def process_company(self, *args, **kwargs):
+        return self.__company_service.process_company(*args, **kwargs)
+
+
+def get_blocking_company_service():
+    with database_session() as db:
+        yield BlockingCompanyService(CompanyService(company_repository=CompanyRepository(db=db)))
+
+
+def start_latency_proxy(latency: float) -> int:
+    """
+    Starts a TCP proxy in front of the database on its own thread and event loop,
+    so that a blocked application loop cannot slow the proxy down.
+
+    Returns:
+        int: The local port the proxy listens on.
+    """
+    ready = threading.Event()
+    port = {}
+    upstream = (context.DB_HOST, context.DB_PORT)
+
+    async def pump(reader, writer):
+        try:
+            while data := await reader.read(65536):
+                await asyncio.sleep(latency)
+                writer.write(data)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection(*upstream)
+        await asyncio.gather(pump(client_reader, upstream_writer), pump(upstream_reader, client_writer),
+                             return_exceptions=True)
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port["value"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        await server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return port["value"]
+
+
+def load_dataset() -> list[str]:
+    with open(ASSETS / "company-dataset.csv", newline="", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    with database_session() as db:
+        CompanyService(company_repository=CompanyRepository(db=db)).import_data(rows)
+    return [row["url"] for row in rows]
+
+
+async def run(label: str, urls: list[str], rules: list[dict], requests: int, concurrency: int, batch: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def call(index: int):
+            start = (index * batch) % len(urls)
+            payload = {"urls": urls[start:start + batch], "rules": rules}
+            async with semaphore:
+                response = await client.post("/v1/company/process-company", json=payload)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call(index) for index in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    print(f"{label:<10} {requests} requests, concurrency {concurrency}: "
+          f"{elapsed:.2f}s, {requests / elapsed:.1f} req/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=10, help="URLs sent per request")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every database packet")
+    args = parser.parse_args()
+
+    if args.latency_ms:
+        context.DB_PORT = start_latency_proxy(args.latency_ms / 1000)
+        context.DB_HOST = "127.0.0.1"
+
+    await app.router.startup()
+    try:
+        urls = load_dataset()
+        rules = json.loads((ASSETS / "rules.json").read_text())
+
+        app.dependency_overrides[get_async_company_service] = get_blocking_company_service
+        await run("blocking", urls, rules, args.requests, args.concurrency, args.batch)
+
+        app.dependency_overrides.clear()
+        await run("async", urls, rules, args.requests, args.concurrency, args.batch)
+    finally:
+        await app.router.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
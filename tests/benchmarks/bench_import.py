@@ -0,0 +1,92 @@
+"""
+Benchmark of CompanyRepository.upsert_data (COPY into a staging table + one merge)
+against the previous executemany path over UPSERT_DATA_IN_BATCH.
+
+Requires a reachable PostgreSQL configured through the DB_* environment variables.
+Rows are synthesized from assets/company-dataset.csv with unique URLs and written
+to company.company_data, then removed:
+
+    python -m tests.benchmarks.bench_import --sizes 10000 100000 1000000
+"""
+import argparse
+import csv
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.core.context import database_session, open_database_pool
+from src.core.database.database import Database
+from src.core.database.migrations import MigrationRunner
+from src.repositories.company_repository import CompanyRepository
+
+ASSETS = Path(__file__).resolve().parents[2] / "assets"
+DELETE_BENCHMARK_ROWS = "DELETE FROM company.company_data WHERE url LIKE 'https://bench-%';"
+# Row-by-row upsert the import used before COPY + merge, kept here as the baseline
+UPSERT_DATA_IN_BATCH = """
+                       INSERT INTO company.company_data (url, name, content, processed_variables, imported_date, last_processed_date)
+                       VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT (url) DO
+                       UPDATE
+                           SET
+                               name = EXCLUDED.name,
+                               content = EXCLUDED.content,
+                               processed_variables = EXCLUDED.processed_variables,
+                               imported_date = EXCLUDED.imported_date,
+                               last_processed_date = EXCLUDED.last_processed_date,
+                               content_hash = NULL;
+                       """
+
+
+def synthesize(size: int) -> list[dict]:
+    with open(ASSETS / "company-dataset.csv", newline="", encoding="utf-8") as file:
+        templates = list(csv.DictReader(file))
+    return [{**templates[index % len(templates)], "url": f"https://bench-{index}.example"} for index in range(size)]
+
+
+def build_upsert_values(data: list[dict]) -> list[tuple]:
+    imported_date = datetime.now()
+    return [(row["url"], row["company_name"], json.dumps(row), None, imported_date, None) for row in data]
+
+
+def executemany_upsert(connection, data: list[dict]) -> int:
+    with connection.cursor() as cursor:
+        cursor.executemany(UPSERT_DATA_IN_BATCH, build_upsert_values(data))
+        rows = cursor.rowcount
+    connection.commit()
+    return rows
+
+
+def copy_upsert(connection, data: list[dict]) -> int:
+    return CompanyRepository(db=Database(connection)).upsert_data(data)
+
+
+def measure(label: str, upsert, data: list[dict]):
+    with open_database_pool().connection() as connection:
+        db = Database(connection)
+        db.execute(DELETE_BENCHMARK_ROWS)
+        started = time.perf_counter()
+        rows = upsert(connection, data)
+        elapsed = time.perf_counter() - started
+        db.execute(DELETE_BENCHMARK_ROWS)
+    print(f"{label:<12} {len(data):>9} rows: {elapsed:8.2f}s, {len(data) / elapsed:10.0f} rows/s ({rows} affected)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--skip-executemany-above", type=int, default=None,
+                        help="Skip the executemany run for sizes above this value")
+    args = parser.parse_args()
+
+    with database_session() as db:
+        MigrationRunner(db).migrate()
+
+    for size in args.sizes:
+        data = synthesize(size)
+        if args.skip_executemany_above is None or size <= args.skip_executemany_above:
+            measure("executemany", executemany_upsert, data)
+        measure("copy", copy_upsert, data)
+
+
+if __name__ == "__main__":
+    main()
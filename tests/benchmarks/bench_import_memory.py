@@ -0,0 +1,75 @@
+"""
+Memory benchmark of the rows held by an import batch: the dictionaries built by `csv.DictReader`
+against the CompanyRecord rows built by `iter_csv_batches`, both after PreGenerateService added
+its features. Also times rendering the batch for COPY, and checks both render the same content.
+
+Runs without a database. Rows are synthesized from assets/company-dataset.csv:
+
+    python -m tests.benchmarks.bench_import_memory --rows 10000 100000
+"""
+import argparse
+import csv
+import io
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.models.company_record import CompanyRecord
+from src.repositories.company_repository import CompanyRepository
+from src.services.pre_generate_service import PreGenerateService
+
+ASSETS = Path(__file__).resolve().parents[2] / "assets"
+
+
+def synthesize(size: int) -> str:
+    with open(ASSETS / "company-dataset.csv", newline="", encoding="utf-8") as file:
+        header, *templates = list(csv.reader(file))
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(header)
+    for index in range(size):
+        writer.writerow([f"https://bench-{index}.example" if name == "url" else value
+                         for name, value in zip(header, templates[index % len(templates)])])
+    return output.getvalue()
+
+
+def parse_dicts(text: str) -> list:
+    return list(csv.DictReader(io.StringIO(text, newline="")))
+
+
+def parse_records(text: str) -> list:
+    reader = csv.reader(io.StringIO(text, newline=""))
+    fieldnames = next(reader)
+    return [CompanyRecord.from_row(fieldnames, values) for values in reader if values]
+
+
+def measure(label: str, parse, text: str, size: int) -> list[str]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = PreGenerateService().generate(parse(text))
+    parsed = time.perf_counter() - started
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    chunks = list(CompanyRepository.build_copy_chunks(rows))
+    rendered = time.perf_counter() - started
+    print(f"{label:<8} {size:>9} rows: {held / size:8.0f} bytes/row held, "
+          f"parse {parsed:6.2f}s, render {rendered:6.2f}s")
+    return [line.rsplit(",", 2)[0] + "," + line.rsplit(",", 1)[1] for chunk in chunks for line in chunk.splitlines()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    for size in args.rows:
+        text = synthesize(size)
+        from_dicts = measure("dict", parse_dicts, text, size)
+        from_records = measure("record", parse_records, text, size)
+        print(f"{'':<8} same COPY content: {from_dicts == from_records}")
+
+
+if __name__ == "__main__":
+    main()
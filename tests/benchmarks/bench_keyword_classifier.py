@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of keyword detection on import: the previous `any(keyword in text ...)` scan,
+one substring search per keyword, against KeywordClassifier, which scans each text once
+per keyword set through a regular expression compiled from the keywords' prefix tree.
+
+Runs without a database. Companies come from assets/company-dataset.csv, and keyword lists
+are the SaaS keywords padded with synthetic industry categories:
+
+    python -m tests.benchmarks.bench_keyword_classifier --companies 10000 --keywords 5 100 1000 5000
+"""
+import argparse
+import csv
+import random
+import time
+from pathlib import Path
+
+from src.models.keyword_set import KeywordSet
+from src.services.keyword_classifier import KeywordClassifier
+from src.services.pre_generate_service import SAAS_KEYWORDS
+
+ASSETS = Path(__file__).resolve().parents[2] / "assets"
+FIELDS = ["description", "industry"]
+WORDS = ["cloud", "data", "platform", "analytics", "payments", "health", "logistics", "retail", "security",
+         "energy", "marketing", "learning", "robotics", "insurance", "media", "travel", "gaming", "legal"]
+
+
+def load_companies(count: int) -> list[dict]:
+    with open(ASSETS / "company-dataset.csv", newline="", encoding="utf-8") as file:
+        templates = list(csv.DictReader(file))
+    return [templates[index % len(templates)] for index in range(count)]
+
+
+def make_keywords(count: int, seed: int = 5) -> list[str]:
+    generator = random.Random(seed)
+    keywords = list(SAAS_KEYWORDS)
+    while len(keywords) < count:
+        keywords.append(" ".join(generator.sample(WORDS, 2)) + f" {generator.randint(0, 10 ** 6)}")
+    return keywords[:count]
+
+
+def scan_each_keyword(companies: list[dict], keywords: list[str]) -> list[bool]:
+    results = []
+    for company in companies:
+        text = " ".join(str(company.get(field) or "").lower() for field in FIELDS)
+        results.append(any(keyword in text for keyword in keywords))
+    return results
+
+
+def classify(companies: list[dict], classifier: KeywordClassifier) -> list[bool]:
+    return [classifier.classify(company)["matched"] for company in companies]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=10_000)
+    parser.add_argument("--keywords", type=int, nargs="+", default=[5, 100, 1000, 5000])
+    args = parser.parse_args()
+
+    companies = load_companies(args.companies)
+    for count in args.keywords:
+        keywords = make_keywords(count)
+
+        started = time.perf_counter()
+        expected = scan_each_keyword(companies, keywords)
+        scanned = time.perf_counter() - started
+
+        started = time.perf_counter()
+        classifier = KeywordClassifier([KeywordSet(feature_name="matched", fields=FIELDS, keywords=keywords)])
+        compiled = time.perf_counter() - started
+        started = time.perf_counter()
+        results = classify(companies, classifier)
+        classified = time.perf_counter() - started
+
+        assert results == expected
+        print(f"{count:>6} keywords: per keyword {scanned / len(companies) * 1e6:8.2f} us/row, "
+              f"classifier {classified / len(companies) * 1e6:6.2f} us/row (compiled in {compiled * 1000:6.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi import UploadFile
+
+from src.commons.file_utils import iter_csv_batches, parse_csv_to_dict, IteratorReader, iter_json_array_batches, \
+    iter_ndjson_batches, MalformedPayloadError
+
+CSV_CONTENT = ('company_name,url,headquarters_city,description\r\n'
+               'São Paulo Tech,https://www.saopaulotech.br,São Paulo (Brazil),"Multi-line\n""quoted"", text"\r\n'
+               'CloudLogic Labs,https://www.cloudlogiclabs.com,Boston (USA),Software\r\n'
+               '\r\n'
+               'Zürich AG,https://www.zurich.ch,Zürich (Switzerland),"Ends, without newline"')
+
+
+def make_file(content: str) -> UploadFile:
+    return UploadFile(file=io.BytesIO(content.encode("utf-8")), filename="companies.csv")
+
+
+async def collect(file: UploadFile, batch_size: int, chunk_size: int) -> list[list[dict]]:
+    return [batch async for batch in iter_csv_batches(file, batch_size, chunk_size=chunk_size)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1024])
+async def test_iter_csv_batches_should_match_dict_reader(chunk_size):
+    expected = list(csv.DictReader(io.StringIO(CSV_CONTENT, newline="")))
+
+    batches = await collect(make_file(CSV_CONTENT), batch_size=10, chunk_size=chunk_size)
+
+    assert batches == [expected]
+    assert batches[0][0]["description"] == 'Multi-line\n"quoted", text'
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_batches_should_yield_fixed_size_batches():
+    batches = await collect(make_file(CSV_CONTENT), batch_size=2, chunk_size=16)
+
+    assert [len(batch) for batch in batches] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_batches_should_keep_streaming_after_a_quote_in_an_unquoted_field():
+    content = 'company_name,url\r\nAcme 5" Displays,https://acme.com\r\n' + "".join(
+        f"Company {index},https://{index}.com\r\n" for index in range(1000))
+    file = make_file(content)
+    read = file.read
+    reads = []
+
+    async def counting_read(size=-1):
+        reads.append(size)
+        return await read(size)
+
+    file.read = counting_read
+    batches = iter_csv_batches(file, batch_size=2, chunk_size=64)
+
+    first = await anext(batches)
+    reads_for_first_batch = len(reads)
+    rest = [batch async for batch in batches]
+
+    assert first[0]["company_name"] == 'Acme 5" Displays'
+    assert reads_for_first_batch <= 2
+    assert [dict(row) for batch in [first, *rest] for row in batch] == list(csv.DictReader(io.StringIO(content)))
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_batches_should_handle_empty_file():
+    assert await collect(make_file(""), batch_size=2, chunk_size=16) == []
+
+
+@pytest.mark.asyncio
+async def test_parse_csv_to_dict_should_return_all_rows():
+    rows = await parse_csv_to_dict(make_file(CSV_CONTENT))
+
+    assert [row["url"] for row in rows] == ["https://www.saopaulotech.br", "https://www.cloudlogiclabs.com",
+                                            "https://www.zurich.ch"]
+
+
+def test_iterator_reader_should_serve_requested_sizes():
+    reader = IteratorReader(iter(["abc", "de", "", "fghij"]))
+
+    assert reader.read(4) == "abcd"
+    assert reader.read(2) == "ef"
+    assert reader.read() == "ghij"
+    assert reader.read(3) == ""
+
+
+async def stream_of(content: str, chunk_size: int):
+    data = content.encode("utf-8")
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+async def collect_stream(batches) -> list[list]:
+    return [batch async for batch in batches]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+async def test_iter_json_array_batches_should_yield_elements_in_batches(chunk_size):
+    items = [{"url": f"https://{index}.com", "name": "Zürich \"AG\"", "employees": index * 10.5, "tags": [1, [2]]}
+             for index in range(5)]
+    content = " \n" + json.dumps(items, indent=2) + "\n"
+
+    batches = await collect_stream(iter_json_array_batches(stream_of(content, chunk_size), batch_size=2))
+
+    assert batches == [items[:2], items[2:4], items[4:]]
+
+
+@pytest.mark.asyncio
+async def test_iter_json_array_batches_should_handle_empty_array():
+    assert await collect_stream(iter_json_array_batches(stream_of("[ ]", 1), batch_size=2)) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content", ['{"url": "a"}', '[{"url": "a"}', '[{"url": "a"} {"url": "b"}]', '[1] 2'])
+async def test_iter_json_array_batches_should_reject_malformed_body(content):
+    with pytest.raises(MalformedPayloadError):
+        await collect_stream(iter_json_array_batches(stream_of(content, 2), batch_size=2))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+async def test_iter_ndjson_batches_should_yield_lines_in_batches(chunk_size):
+    content = '{"url": "a", "name": "São"}\n\n{"url": "b"}\r\n{"url": "c"}'
+
+    batches = await collect_stream(iter_ndjson_batches(stream_of(content, chunk_size), batch_size=2))
+
+    assert batches == [[{"url": "a", "name": "São"}, {"url": "b"}], [{"url": "c"}]]
+
+
+@pytest.mark.asyncio
+async def test_iter_ndjson_batches_should_report_invalid_line():
+    with pytest.raises(MalformedPayloadError, match="line 2"):
+        await collect_stream(iter_ndjson_batches(stream_of('{"url": "a"}\n{"url":\n', 4), batch_size=2))
@@ -1,28 +1,49 @@
+from contextlib import asynccontextmanager
+from datetime import date
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from src.controllers.company_controller import router
-from src.core.context import get_company_service
+from src.commons.config import COMPANIES_PAGE_SIZE
+from src.controllers.company_controller import router, router_v2
+from src.core.context import get_async_company_service, get_async_company_service_session, \
+    get_async_rule_set_service
+from src.models.process_response import ProcessResponse, ProcessFailure
+from src.models.rules import ExecutionMode
 
 
 @pytest.fixture
 def mock_company_service():
     service = MagicMock()
-    service.import_data.return_value = {"imported": 3, "failed": 0}
+    service.import_data = AsyncMock(return_value={"imported": 3, "failed": 0})
     service.import_file = AsyncMock(return_value={"imported": 2, "failed": 1})
-    service.process_company.return_value = [{"url": "https://example.com", "status": "processed"}]
-    service.get_companies_previously_processed.return_value = {"companies": []}
+    service.process_company = AsyncMock(return_value=ProcessResponse(
+        companies=[{"url": "https://example.com", "status": "processed"}], recomputed=["https://example.com"]))
+    service.get_companies_previously_processed = AsyncMock(return_value={"companies": []})
     return service
 
 
 @pytest.fixture
-def test_app(mock_company_service):
+def mock_rule_set_service():
+    service = MagicMock()
+    service.get_plan = AsyncMock(return_value=None)
+    return service
+
+
+@pytest.fixture
+def test_app(mock_company_service, mock_rule_set_service):
+    @asynccontextmanager
+    async def session():
+        yield mock_company_service
+
     app = FastAPI()
-    app.dependency_overrides[get_company_service] = lambda: mock_company_service
+    app.dependency_overrides[get_async_company_service] = lambda: mock_company_service
+    app.dependency_overrides[get_async_company_service_session] = lambda: session
+    app.dependency_overrides[get_async_rule_set_service] = lambda: mock_rule_set_service
     app.include_router(router)
+    app.include_router(router_v2)
     return app
 
 
@@ -35,6 +56,49 @@ def test_import_company_data_invalid_content_type(test_app):
     assert response.status_code == 415
 
 
+@pytest.fixture
+def received_batches(mock_company_service):
+    batches = []
+
+    async def import_batches(stream):
+        async for batch in stream:
+            batches.append(batch)
+        return {"rows_inserted": sum(map(len, batches)), "rows_read": sum(map(len, batches))}
+
+    mock_company_service.import_batches = AsyncMock(side_effect=import_batches)
+    return batches
+
+
+def test_import_company_data_json_array(test_app, received_batches):
+    client = TestClient(test_app)
+
+    response = client.post("/v1/company/import-company-data", json=[{"url": "https://a.com"}, {"url": "https://b.com"}])
+
+    assert response.status_code == 200
+    assert response.json() == {"rows_inserted": 2, "rows_read": 2, "rows_updated": 0, "rows_unchanged": 0}
+    assert received_batches == [[{"url": "https://a.com"}, {"url": "https://b.com"}]]
+
+
+def test_import_company_data_ndjson(test_app, received_batches):
+    client = TestClient(test_app)
+
+    headers = {"content-type": "application/x-ndjson"}
+    response = client.post("/v1/company/import-company-data", content='{"url": "https://a.com"}\n{"url": "https://b.com"}\n',
+                           headers=headers)
+
+    assert response.status_code == 200
+    assert received_batches == [[{"url": "https://a.com"}, {"url": "https://b.com"}]]
+
+
+def test_import_company_data_malformed_json(test_app, received_batches):
+    client = TestClient(test_app)
+
+    headers = {"content-type": "application/json"}
+    response = client.post("/v1/company/import-company-data", content='[{"url": "https://a.com"}', headers=headers)
+
+    assert response.status_code == 400
+
+
 def test_process_company(test_app):
     client = TestClient(test_app)
 
@@ -47,12 +111,135 @@ def test_process_company(test_app):
 
     assert response.status_code == 200
     assert response.json() == [{"url": "https://example.com", "status": "processed"}]
+    assert response.headers["X-Failed-Count"] == "0"
+    assert response.headers["X-Recomputed-Count"] == "1"
+
+
+def test_process_company_should_answer_multi_status_on_partial_failure(test_app, mock_company_service):
+    mock_company_service.process_company.return_value = ProcessResponse(
+        companies=[{"url": "https://a.com"}], failures=[ProcessFailure(url="https://b.com", error="invalid")])
+    client = TestClient(test_app)
+
+    response = client.post("/v1/company/process-company", json={"urls": ["https://a.com", "https://b.com"],
+                                                                 "rules": []})
+
+    assert response.status_code == 207
+    assert response.json() == [{"url": "https://a.com"}]
+    assert response.headers["X-Failed-Count"] == "1"
 
 
-def test_get_companies(test_app):
+def test_process_company_v2_should_report_failures_and_recomputed_urls(test_app, mock_company_service):
+    mock_company_service.process_company.return_value = ProcessResponse(
+        companies=[{"url": "https://a.com"}], failures=[ProcessFailure(url="https://b.com", error="invalid")],
+        recomputed=["https://a.com"])
+    client = TestClient(test_app)
+
+    response = client.post("/v2/company/process-company?execution=database",
+                           json={"urls": ["https://a.com", "https://b.com"], "rules": []})
+
+    assert response.status_code == 200
+    assert response.json() == {"companies": [{"url": "https://a.com"}],
+                               "failures": [{"url": "https://b.com", "error": "invalid"}],
+                               "recomputed": ["https://a.com"]}
+    assert mock_company_service.process_company.await_args.args[2] == ExecutionMode.DATABASE
+
+
+def test_process_company_should_forward_execution_mode(test_app, mock_company_service):
+    client = TestClient(test_app)
+
+    response = client.post("/v1/company/process-company?execution=database",
+                           json={"urls": ["https://example.com"], "rules": []})
+
+    assert response.status_code == 200
+    assert mock_company_service.process_company.await_args.args[2] == ExecutionMode.DATABASE
+
+
+def test_process_company_should_forward_as_of_date(test_app, mock_company_service):
+    client = TestClient(test_app)
+
+    response = client.post("/v1/company/process-company?as_of=2025-05-22",
+                           json={"urls": ["https://example.com"], "rules": []})
+
+    assert response.status_code == 200
+    assert mock_company_service.process_company.await_args.kwargs["as_of"] == date(2025, 5, 22)
+
+
+def test_process_company_should_apply_registered_rule_set(test_app, mock_company_service, mock_rule_set_service):
+    plan = MagicMock()
+    mock_rule_set_service.get_plan.return_value = plan
+    client = TestClient(test_app)
+
+    response = client.post("/v1/company/process-company", json={"urls": ["https://example.com"], "rule_set_id": 3})
+
+    assert response.status_code == 200
+    mock_rule_set_service.get_plan.assert_awaited_once_with(3)
+    assert mock_company_service.process_company.await_args.args[1] is plan
+
+
+def test_process_company_should_reject_unknown_rule_set(test_app, mock_company_service):
+    client = TestClient(test_app)
+
+    response = client.post("/v1/company/process-company", json={"urls": ["https://example.com"], "rule_set_id": "f00"})
+
+    assert response.status_code == 404
+    mock_company_service.process_company.assert_not_awaited()
+
+
+def test_process_company_should_require_rules_or_rule_set(test_app):
+    client = TestClient(test_app)
+
+    assert client.post("/v1/company/process-company", json={"urls": []}).status_code == 400
+    assert client.post("/v1/company/process-company",
+                       json={"urls": [], "rules": [], "rule_set_id": 3}).status_code == 400
+
+def test_get_companies_should_stream_every_company_without_a_limit(test_app, mock_company_service):
+    async def stream():
+        yield '{"companies":['
+        yield '{"url":"https://a.com"}'
+        yield '],"next_cursor":null}'
+
+    mock_company_service.stream_companies_response = stream
     client = TestClient(test_app)
 
     response = client.get("/v1/company/get-companies")
 
     assert response.status_code == 200
-    assert response.json() == {"companies": []}
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"companies": [{"url": "https://a.com"}], "next_cursor": None}
+    mock_company_service.get_companies_previously_processed.assert_not_awaited()
+
+
+def test_get_companies_should_forward_page_parameters(test_app, mock_company_service):
+    client = TestClient(test_app)
+
+    response = client.get("/v1/company/get-companies?limit=2&after=https://a.com")
+
+    assert response.status_code == 200
+    assert response.json() == {"companies": [], "next_cursor": None}
+    mock_company_service.get_companies_previously_processed.assert_awaited_once_with(2, "https://a.com")
+    assert client.get("/v1/company/get-companies?limit=0").status_code == 422
+
+
+def test_get_companies_should_page_by_default_after_a_cursor(test_app, mock_company_service):
+    client = TestClient(test_app)
+
+    response = client.get("/v1/company/get-companies?after=https://a.com")
+
+    assert response.status_code == 200
+    mock_company_service.get_companies_previously_processed.assert_awaited_once_with(COMPANIES_PAGE_SIZE,
+                                                                                     "https://a.com")
+
+
+def test_stream_companies_should_return_ndjson(test_app, mock_company_service):
+    async def stream():
+        yield '{"url": "https://a.com"}\n'
+        yield '{"url": "https://b.com"}\n'
+
+    mock_company_service.stream_companies_previously_processed = stream
+    client = TestClient(test_app)
+
+    response = client.get("/v1/company/get-companies/stream")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.splitlines() == ['{"url": "https://a.com"}', '{"url": "https://b.com"}']
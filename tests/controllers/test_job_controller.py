@@ -0,0 +1,101 @@
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.controllers.job_controller import router
+from src.core.context import get_job_service, get_rule_set_service
+from src.models.import_response import ImportSummary
+from src.models.job import Job, JobKind, ImportFormat
+from src.services.job_service import JobQueueFullError, JobNotFinishedError
+
+job = Job(id="job-1", kind="import", status="queued", rows_done=0, created_date="2025-05-22 10:00:00")
+
+
+@pytest.fixture
+def mock_job_service():
+    service = MagicMock()
+    service.submit_import.return_value = job
+    service.submit_process.return_value = job.model_copy(update={"kind": JobKind.PROCESS})
+    service.get_job.return_value = job
+    return service
+
+
+@pytest.fixture
+def mock_rule_set_service():
+    return MagicMock()
+
+
+@pytest.fixture
+def client(mock_job_service, mock_rule_set_service, tmp_path, monkeypatch):
+    monkeypatch.setattr("src.controllers.job_controller.JOB_SPOOL_DIR", str(tmp_path))
+    app = FastAPI()
+    app.dependency_overrides[get_job_service] = lambda: mock_job_service
+    app.dependency_overrides[get_rule_set_service] = lambda: mock_rule_set_service
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_submit_import_should_spool_body_and_return_job(client, mock_job_service):
+    body = b'{"url": "https://a.com"}\n{"url": "https://b.com"}\n'
+
+    response = client.post("/v1/jobs/import-company-data", content=body,
+                           headers={"content-type": "application/x-ndjson"})
+
+    assert response.status_code == 202
+    assert response.json()["id"] == "job-1"
+    path, import_format = mock_job_service.submit_import.call_args.args
+    assert import_format == ImportFormat.NDJSON
+    with open(path, "rb") as spooled:
+        assert spooled.read() == body
+
+
+def test_submit_import_should_reject_when_queue_is_full(client, mock_job_service, tmp_path):
+    mock_job_service.submit_import.side_effect = JobQueueFullError("full")
+
+    response = client.post("/v1/jobs/import-company-data", files={"file": ("data.csv", b"url\nhttps://a.com\n")})
+
+    assert response.status_code == 429
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_submit_process_should_return_job(client, mock_job_service):
+    response = client.post("/v1/jobs/process-company", json={"urls": ["https://a.com"], "rules": []})
+
+    assert response.status_code == 202
+    assert response.json()["kind"] == "process"
+    mock_job_service.submit_process.assert_called_once()
+
+
+def test_submit_process_should_submit_registered_rule_set(client, mock_job_service, mock_rule_set_service):
+    response = client.post("/v1/jobs/process-company", json={"urls": ["https://a.com"], "rule_set_id": "3"})
+
+    assert response.status_code == 202
+    mock_rule_set_service.get_plan.assert_called_once_with("3")
+    assert mock_job_service.submit_process.call_args.args[1] is mock_rule_set_service.get_plan.return_value
+
+
+def test_submit_process_should_reject_unknown_rule_set(client, mock_job_service, mock_rule_set_service):
+    mock_rule_set_service.get_plan.return_value = None
+
+    response = client.post("/v1/jobs/process-company", json={"urls": ["https://a.com"], "rule_set_id": 3})
+
+    assert response.status_code == 404
+    mock_job_service.submit_process.assert_not_called()
+
+def test_get_job_should_return_404_for_unknown_job(client, mock_job_service):
+    assert client.get("/v1/jobs/job-1").json()["status"] == "queued"
+
+    mock_job_service.get_job.return_value = None
+    assert client.get("/v1/jobs/unknown").status_code == 404
+
+
+def test_get_job_result(client, mock_job_service):
+    mock_job_service.get_result.side_effect = JobNotFinishedError("Job job-1 is running")
+    assert client.get("/v1/jobs/job-1/result").status_code == 409
+
+    mock_job_service.get_result.side_effect = None
+    mock_job_service.get_result.return_value = ImportSummary(rows_inserted=1, rows_read=2)
+    assert client.get("/v1/jobs/job-1/result").json() == {"rows_inserted": 1, "rows_read": 2, "rows_updated": 0,
+                                                               "rows_unchanged": 0}
@@ -0,0 +1,53 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.controllers.rule_set_controller import router
+from src.core.context import get_async_rule_set_service
+from src.models.rule_set import RuleSet
+from src.models.rules import Rule, Operation
+
+rules = [Rule(input="company_age", feature_name="age_feature", operation=Operation(less_than=10), match=1, default=0)]
+rule_set = RuleSet(id=3, fingerprint="f" * 64, rule_count=1, created_date=datetime(2025, 5, 22), rules=rules)
+
+
+@pytest.fixture
+def mock_rule_set_service():
+    service = MagicMock()
+    service.register = AsyncMock(return_value=rule_set.model_copy(update={"rules": None}))
+    service.get = AsyncMock(return_value=rule_set)
+    return service
+
+
+@pytest.fixture
+def client(mock_rule_set_service):
+    app = FastAPI()
+    app.dependency_overrides[get_async_rule_set_service] = lambda: mock_rule_set_service
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_register_rule_set_should_return_id_and_fingerprint_without_rules(client, mock_rule_set_service):
+    response = client.post("/v1/rule-sets", json=[rule.model_dump() for rule in rules])
+
+    assert response.status_code == 200
+    assert response.json() == {"id": 3, "fingerprint": "f" * 64, "rule_count": 1,
+                               "created_date": "2025-05-22T00:00:00"}
+    assert mock_rule_set_service.register.await_args.args[0] == rules
+
+
+def test_get_rule_set_should_return_rules(client, mock_rule_set_service):
+    response = client.get("/v1/rule-sets/3")
+
+    assert response.status_code == 200
+    assert response.json()["rules"] == [rule.model_dump() for rule in rules]
+    mock_rule_set_service.get.assert_awaited_once_with("3")
+
+
+def test_get_rule_set_should_return_404_for_unknown_rule_set(client, mock_rule_set_service):
+    mock_rule_set_service.get.return_value = None
+
+    assert client.get("/v1/rule-sets/" + "0" * 64).status_code == 404
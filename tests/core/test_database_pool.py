@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from src.core.database.pool import DatabasePool, PoolTimeoutError
+
+
+def make_connection():
+    connection = MagicMock()
+    connection.closed = 0
+    connection.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+    return connection
+
+
+@pytest.fixture
+def mock_connect():
+    with patch("src.core.database.pool.psycopg2.connect", side_effect=lambda **_: make_connection()) as connect:
+        yield connect
+
+
+def test_open_should_create_min_size_connections(mock_connect):
+    pool = DatabasePool(min_size=2, max_size=4, timeout=1, host="localhost")
+    pool.open()
+
+    assert mock_connect.call_count == 2
+    mock_connect.assert_called_with(host="localhost")
+
+
+def test_connection_should_be_reused_after_release(mock_connect):
+    pool = DatabasePool(min_size=0, max_size=2, timeout=1)
+    pool.open()
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert mock_connect.call_count == 1
+
+
+def test_connection_should_time_out_when_pool_exhausted(mock_connect):
+    pool = DatabasePool(min_size=0, max_size=1, timeout=0.01)
+    pool.open()
+
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            with pool.connection():
+                pass
+
+
+def test_broken_connection_should_be_replaced_on_borrow(mock_connect):
+    pool = DatabasePool(min_size=1, max_size=1, timeout=1, check_on_borrow=True)
+    pool.open()
+    broken = pool._DatabasePool__idle[0]
+    broken.cursor.return_value.__enter__.return_value.execute.side_effect = psycopg2.OperationalError()
+
+    with pool.connection() as connection:
+        assert connection is not broken
+
+    broken.close.assert_called_once()
+
+
+def test_unfinished_transaction_should_be_rolled_back_on_release(mock_connect):
+    pool = DatabasePool(min_size=0, max_size=1, timeout=1, check_on_borrow=False)
+    pool.open()
+
+    with pool.connection() as connection:
+        connection.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+    connection.rollback.assert_called_once()
+
+
+def test_connection_should_be_released_when_body_raises(mock_connect):
+    pool = DatabasePool(min_size=0, max_size=1, timeout=0.01)
+    pool.open()
+
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("boom")
+
+    with pool.connection():
+        pass
+
+
+def test_close_should_close_idle_connections(mock_connect):
+    pool = DatabasePool(min_size=2, max_size=2, timeout=1)
+    pool.open()
+    idle = list(pool._DatabasePool__idle)
+
+    pool.close()
+
+    for connection in idle:
+        connection.close.assert_called_once()
+    assert pool.closed
@@ -0,0 +1,135 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.core.database.migrations import Migration, IndexMigration, MigrationRunner, MIGRATIONS, company_data_table
+from src.core.database.schema import SELECT_MIGRATION_TABLE, SELECT_MIGRATION_VERSION, SELECT_APPLIED_MIGRATIONS, \
+    TRY_ACQUIRE_MIGRATION_LOCK, RELEASE_MIGRATION_LOCK, INSERT_MIGRATION, SELECT_INVALID_INDEXES, SELECT_PARTITIONS, \
+    CREATE_PARENT_INDEX, COMPANY_DATA_TABLE, PARTITIONED_COMPANY_DATA_TABLE
+
+
+def make_db(current_version, applied=()):
+    db = MagicMock()
+    queries = {SELECT_MIGRATION_TABLE: ("company.schema_migration",) if current_version else (None,),
+               SELECT_MIGRATION_VERSION: (current_version,)}
+    db.fetch_one.side_effect = lambda command, values=None: queries.get(command, (True,))
+    db.fetch_all.side_effect = lambda command, values=None: ([(version,) for version in applied]
+                                                             if command == SELECT_APPLIED_MIGRATIONS else [])
+    return db
+
+
+@pytest.fixture
+def migrations():
+    return [Migration(2, "second", ["CREATE second"]),
+            Migration(1, "first", ["CREATE first"]),
+            Migration(3, "index", ["CREATE INDEX CONCURRENTLY third"], concurrent=True)]
+
+
+def executed(db):
+    return [call.args[0] for call in db.execute.call_args_list]
+
+
+def test_migrate_should_skip_lock_and_ddl_when_up_to_date(migrations):
+    db = make_db(current_version=3)
+
+    assert MigrationRunner(db, migrations).migrate() == []
+
+    assert [call.args[0] for call in db.fetch_one.call_args_list] == [SELECT_MIGRATION_TABLE, SELECT_MIGRATION_VERSION]
+    db.execute.assert_not_called()
+
+
+def test_migrate_should_apply_pending_migrations_in_order_under_lock(migrations):
+    db = make_db(current_version=1, applied=[1])
+
+    assert MigrationRunner(db, migrations).migrate() == [2, 3]
+
+    fetched = [call.args[0] for call in db.fetch_one.call_args_list]
+    assert fetched[2:] == [TRY_ACQUIRE_MIGRATION_LOCK, RELEASE_MIGRATION_LOCK]
+    assert "CREATE first" not in executed(db)
+    assert executed(db)[2:] == ["CREATE second", INSERT_MIGRATION, "CREATE INDEX CONCURRENTLY third", INSERT_MIGRATION]
+    assert [call.args[1][:2] for call in db.execute.call_args_list if call.args[0] == INSERT_MIGRATION] == [
+        (2, "second"), (3, "index")]
+
+
+@patch("src.core.database.migrations.time.sleep")
+def test_migrate_should_poll_lock_held_by_another_worker(sleep, migrations):
+    db = make_db(current_version=0, applied=[1, 2, 3])
+    attempts = iter([(False,), (False,), (True,)])
+    queries = {SELECT_MIGRATION_TABLE: (None,)}
+    db.fetch_one.side_effect = lambda command, values=None: next(attempts) \
+        if command == TRY_ACQUIRE_MIGRATION_LOCK else queries.get(command, (True,))
+
+    assert MigrationRunner(db, migrations).migrate() == []
+
+    assert sleep.call_count == 2
+
+
+def test_migrate_should_run_concurrent_migrations_outside_transaction(migrations):
+    db = make_db(current_version=2, applied=[1, 2])
+    db.fetch_all.side_effect = lambda command, values=None: {
+        SELECT_APPLIED_MIGRATIONS: [(1,), (2,)],
+        SELECT_INVALID_INDEXES: [("company.third",)]}[command]
+
+    MigrationRunner(db, migrations).migrate()
+
+    assert db.autocommit.call_count == 2
+    db.transaction.assert_not_called()
+    assert executed(db)[2:4] == ["DROP INDEX CONCURRENTLY IF EXISTS company.third;", "CREATE INDEX CONCURRENTLY third"]
+
+
+def test_migrate_should_release_lock_when_migration_fails(migrations):
+    def execute(command, values=None):
+        if command == "CREATE first":
+            raise RuntimeError("boom")
+
+    db = make_db(current_version=0)
+    db.execute.side_effect = execute
+
+    with pytest.raises(RuntimeError):
+        MigrationRunner(db, migrations).migrate()
+
+    assert db.fetch_one.call_args.args[0] == RELEASE_MIGRATION_LOCK
+
+
+def test_migrations_should_have_unique_increasing_versions():
+    versions = [migration.version for migration in MIGRATIONS]
+
+    assert versions == sorted(set(versions))
+
+
+def test_index_migration_should_build_plain_table_index_concurrently():
+    db = MagicMock()
+    db.fetch_all.return_value = []
+    migration = IndexMigration(4, "index", "company_data_run_id_url_idx", "company.company_data", "run_id, url")
+
+    assert migration.build_statements(db) == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS company_data_run_id_url_idx ON company.company_data (run_id, url);"]
+    db.fetch_all.assert_called_once_with(SELECT_PARTITIONS, ("company.company_data",))
+
+
+def test_index_migration_should_index_partitions_and_attach_them():
+    db = MagicMock()
+    db.fetch_all.return_value = [("company.company_data_p0", "company_data_p0"),
+                                 ("company.company_data_p1", "company_data_p1")]
+    migration = IndexMigration(4, "index", "company_data_run_id_url_idx", "company.company_data", "run_id, url")
+
+    statements = migration.build_statements(db)
+
+    assert statements[0] == CREATE_PARENT_INDEX.format(index="company_data_run_id_url_idx",
+                                                       table="company.company_data", columns="run_id, url")
+    assert statements[1:3] == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS company_data_p0_run_id_url_idx ON company.company_data_p0 "
+        "(run_id, url);",
+        "ALTER INDEX company.company_data_run_id_url_idx ATTACH PARTITION company.company_data_p0_run_id_url_idx;"]
+    assert len(statements) == 5
+
+
+def test_company_data_table_should_create_hash_partitions_when_configured():
+    assert company_data_table(0) == [COMPANY_DATA_TABLE]
+
+    statements = company_data_table(4)
+
+    assert statements[0] == PARTITIONED_COMPANY_DATA_TABLE
+    assert len(statements) == 5
+    assert "company.company_data_p3 PARTITION OF company.company_data" in statements[4]
+    assert "MODULUS 4, REMAINDER 3" in statements[4]
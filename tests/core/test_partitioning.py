@@ -0,0 +1,67 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.core.database.partitioning import CompanyDataPartitioner
+from src.core.database.schema import COPY_PARTITIONED_BATCH, SYNC_PARTITIONED_COPY_TRIGGER, LOCK_COMPANY_DATA, \
+    DROP_SYNC_PARTITIONED_COPY, SELECT_TABLE_RELATIONS
+
+
+@pytest.fixture
+def mock_db():
+    return MagicMock()
+
+
+def executed(db):
+    return [call.args[0] for call in db.execute.call_args_list]
+
+
+def test_prepare_should_create_partitions_and_start_mirroring(mock_db):
+    CompanyDataPartitioner(mock_db).prepare(3)
+
+    statements = executed(mock_db)
+    assert len([statement for statement in statements if "PARTITION OF" in statement]) == 3
+    assert "company.company_data_partitioned_p2 PARTITION OF company.company_data_partitioned" in statements[3]
+    assert statements[-1] == SYNC_PARTITIONED_COPY_TRIGGER
+    mock_db.transaction.assert_called_once()
+
+
+def test_copy_should_resume_after_last_url_of_each_batch(mock_db):
+    mock_db.fetch_one.side_effect = [("https://b.com", 2), ("https://c.com", 1), (None, 0)]
+
+    assert list(CompanyDataPartitioner(mock_db).copy(batch_size=2)) == [2, 3]
+
+    assert [call.args for call in mock_db.fetch_one.call_args_list] == [
+        (COPY_PARTITIONED_BATCH, (None, None, 2)),
+        (COPY_PARTITIONED_BATCH, ("https://b.com", "https://b.com", 2)),
+        (COPY_PARTITIONED_BATCH, ("https://c.com", "https://c.com", 2))]
+    assert mock_db.transaction.call_count == 3
+
+
+def test_swap_should_rename_previous_and_partitioned_tables_under_lock(mock_db):
+    relations = {"company.company_data": [("company_data", False), ("company_data_pkey", True)],
+                 "company.company_data_partitioned": [("company_data_partitioned", False),
+                                                      ("company_data_partitioned_p0", False),
+                                                      ("company_data_partitioned_p0_pkey", True)]}
+    mock_db.fetch_all.side_effect = lambda command, values: relations[values[0]]
+
+    CompanyDataPartitioner(mock_db).swap()
+
+    assert mock_db.fetch_all.call_args_list[0].args[0] == SELECT_TABLE_RELATIONS
+    assert executed(mock_db) == [
+        LOCK_COMPANY_DATA,
+        DROP_SYNC_PARTITIONED_COPY,
+        "ALTER TABLE company.company_data RENAME TO company_data_unpartitioned;",
+        "ALTER INDEX company.company_data_pkey RENAME TO company_data_unpartitioned_pkey;",
+        "ALTER TABLE company.company_data_partitioned RENAME TO company_data;",
+        "ALTER TABLE company.company_data_partitioned_p0 RENAME TO company_data_p0;",
+        "ALTER INDEX company.company_data_partitioned_p0_pkey RENAME TO company_data_p0_pkey;"]
+    mock_db.transaction.assert_called_once()
+
+
+def test_migrate_should_skip_partitioned_table(mock_db):
+    mock_db.fetch_one.return_value = ("p",)
+
+    CompanyDataPartitioner(mock_db).migrate(4)
+
+    mock_db.execute.assert_not_called()
@@ -0,0 +1,64 @@
+import csv
+import io
+
+import pytest
+
+from src.commons.hash_utils import canonical_json
+from src.models.company_record import CompanyRecord
+
+HEADER = ["company_name", "url", "founded_year", "employee_locations", "ticker"]
+
+
+def test_from_row_should_match_dict_reader_for_short_and_long_rows():
+    content = "\n".join([",".join(HEADER), "A,https://a.com,2020", "B,https://b.com,2019,{},BBB,extra,more"])
+    reader = csv.reader(io.StringIO(content))
+    fieldnames = next(reader)
+
+    records = [CompanyRecord.from_row(fieldnames, values) for values in reader]
+
+    assert records == list(csv.DictReader(io.StringIO(content)))
+    assert records[0]["ticker"] is None
+    assert records[1][None] == ["extra", "more"]
+
+
+def test_record_should_behave_like_a_mutable_mapping():
+    record = CompanyRecord.from_row(HEADER[:2], ["A", "https://a.com"])
+    record["company_age"] = 5
+    record["ticker"] = "AAA"
+
+    assert list(record) == ["company_name", "url", "company_age", "ticker"]
+    assert len(record) == 4
+    assert record.get("founded_year") is None
+    assert "founded_year" not in record
+    del record["company_age"]
+    del record["ticker"]
+    assert dict(record) == {"company_name": "A", "url": "https://a.com"}
+    with pytest.raises(KeyError):
+        del record["company_age"]
+
+
+def test_record_should_not_have_an_instance_dictionary():
+    assert not hasattr(CompanyRecord(), "__dict__")
+
+
+@pytest.mark.parametrize("extra", [{}, {"ticker": "ÅÅ\n\"x\"", "alpha": [1, {"b": 2, "a": None}]}])
+def test_to_canonical_json_should_match_canonical_json_of_the_dictionary(extra):
+    record = CompanyRecord.from_row(HEADER[:4], ["Zürich AG", "https://z.ch", "1999", '{"CH": 3}'])
+    record["company_age"] = 27
+    record["is_saas"] = False
+    record["is_usa_based"] = None
+    for key, value in extra.items():
+        record[key] = value
+
+    assert record.to_canonical_json() == canonical_json(dict(record))
+
+
+def test_to_canonical_json_should_keep_values_beyond_the_header_like_canonical_json():
+    content = "\n".join([",".join(HEADER[:2]), "A,https://a.com,extra,more"])
+    reader = csv.reader(io.StringIO(content))
+    fieldnames = next(reader)
+
+    record = CompanyRecord.from_row(fieldnames, next(reader))
+
+    assert record.to_canonical_json() == canonical_json(next(csv.DictReader(io.StringIO(content))))
+    assert record.to_canonical_json() == '{"company_name":"A","null":["extra","more"],"url":"https://a.com"}'
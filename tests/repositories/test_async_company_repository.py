@@ -0,0 +1,175 @@
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.commons.hash_utils import canonical_json
+from src.core.database.schema import CREATE_IMPORT_STAGING_TABLE, COPY_INTO_IMPORT_STAGING, MERGE_IMPORT_STAGING, \
+    UPDATE_PROCESSED_DATA, SELECT_COMPANY_BY_URL, \
+    SELECT_PREVIOUSLY_PROCESSED, SELECT_PREVIOUSLY_PROCESSED_PAGE, SELECT_PREVIOUSLY_PROCESSED_ORDERED, SELECT_COMPANIES_BY_URLS, UPDATE_PROCESSED_DATA_WITH_RULES, \
+    INSERT_PROCESSING_RUN, SELECT_COMPANIES_TO_PROCESS, NOTIFY_COMPANY_DATA_CHANGED, SELECT_PROCESSING_STATE, \
+    SELECT_COMPANY_CONTENTS_BY_URLS
+from src.repositories.async_company_repository import AsyncCompanyRepository
+from src.repositories.company_cache import CompanyCache
+
+
+@pytest.fixture
+def mock_db():
+    db = AsyncMock()
+    db.transaction = MagicMock()
+    db.transaction.return_value.__aenter__ = AsyncMock()
+    db.transaction.return_value.__aexit__ = AsyncMock(return_value=False)
+    return db
+
+
+@pytest.fixture
+def repo(mock_db):
+    return AsyncCompanyRepository(mock_db)
+
+
+@pytest.mark.asyncio
+async def test_upsert_data(repo, mock_db):
+    data = [{
+        "url": "https://example.com",
+        "company_name": "Example Inc."
+    }]
+
+    mock_db.fetch_one.return_value = (1, 1, 1)
+
+    assert await repo.upsert_data(data) == (0, 1, 0)
+
+    assert [call.args[0] for call in mock_db.execute.await_args_list] == [CREATE_IMPORT_STAGING_TABLE]
+    mock_db.fetch_one.assert_awaited_once_with(MERGE_IMPORT_STAGING)
+    command, chunks = mock_db.copy_from.await_args[0]
+    assert command == COPY_INTO_IMPORT_STAGING
+    assert canonical_json(data[0]).replace('"', '""') in "".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.asyncio
+async def test_upsert_processed_data(repo, mock_db):
+    processed = {"score": 0.95}
+    timestamp = datetime.now()
+    url = "https://example.com"
+
+    await repo.upsert_processed_data(url, timestamp, processed, 7)
+
+    mock_db.execute.assert_awaited_once_with(
+        UPDATE_PROCESSED_DATA,
+        (json.dumps(processed), timestamp, 7, url)
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_run_should_return_run_id(repo, mock_db):
+    processed_date = datetime(2025, 5, 22)
+    mock_db.fetch_one.return_value = (7,)
+
+    assert await repo.create_run(processed_date) == 7
+    mock_db.fetch_one.assert_awaited_once_with(INSERT_PROCESSING_RUN, (processed_date,))
+
+
+@pytest.mark.asyncio
+async def test_process_in_database_should_update_with_rules_expression(repo, mock_db):
+    mock_db.fetch_all.return_value = [("https://example.com", {"feature": 1, "company": "Example Inc."}, False)]
+    last_processed_date = datetime(2025, 5, 22)
+
+    processed, recomputed = await repo.process_in_database(["https://example.com"], "jsonb_build_object(%s::text, 1)",
+                                                           ["feature"], last_processed_date, 7, "rules")
+
+    assert processed == {"https://example.com": {"feature": 1, "company": "Example Inc."}}
+    assert recomputed == set()
+    mock_db.fetch_all.assert_awaited_once_with(
+        UPDATE_PROCESSED_DATA_WITH_RULES.format(processed_variables="jsonb_build_object(%s::text, 1)"),
+        ("feature", last_processed_date, 7, "rules", "rules", ["https://example.com"]))
+
+
+@pytest.mark.asyncio
+async def test_fetch_for_processing_should_pass_rules_fingerprint(repo, mock_db):
+    row = ("https://example.com", "Example Inc.", {"company_age": 3}, None, "hash")
+    mock_db.fetch_all.return_value = [row]
+
+    assert await repo.fetch_for_processing(["https://example.com"], "rules") == {"https://example.com": row}
+    mock_db.fetch_all.assert_awaited_once_with(SELECT_COMPANIES_TO_PROCESS, ("rules", ["https://example.com"]))
+
+
+@pytest.mark.asyncio
+async def test_fetch_by_url(repo, mock_db):
+    url = "https://example.com"
+    await repo.fetch_by_url(url)
+    mock_db.fetch_one.assert_awaited_once_with(SELECT_COMPANY_BY_URL, (url,))
+
+
+@pytest.mark.asyncio
+async def test_fetch_by_urls_should_map_rows_by_url(repo, mock_db):
+    row = ("https://example.com", "Example Inc.", {}, None, None, None)
+    mock_db.fetch_all.return_value = [row]
+
+    result = await repo.fetch_by_urls(["https://example.com", "https://missing.com"])
+
+    assert result == {"https://example.com": row}
+    mock_db.fetch_all.assert_awaited_once_with(SELECT_COMPANIES_BY_URLS,
+                                               (["https://example.com", "https://missing.com"],))
+
+
+@pytest.mark.asyncio
+async def test_fetch_for_processing_should_serve_cached_imported_columns(mock_db):
+    queries = {SELECT_PROCESSING_STATE: [("https://a.com", None, "hash")],
+               SELECT_COMPANY_CONTENTS_BY_URLS: [("https://a.com", "A", {"c": 1}, "hash")]}
+    mock_db.fetch_all.side_effect = lambda query, params: queries[query]
+    cache = CompanyCache(max_entries=10, max_bytes=1_000_000, ttl=60)
+    repo = AsyncCompanyRepository(mock_db, cache)
+
+    for _ in range(2):
+        assert await repo.fetch_for_processing(["https://a.com"], "rules") == {
+            "https://a.com": ("https://a.com", "A", {"c": 1}, None, "hash")}
+
+    assert [call.args[0] for call in mock_db.fetch_all.await_args_list] == [
+        SELECT_PROCESSING_STATE, SELECT_COMPANY_CONTENTS_BY_URLS, SELECT_PROCESSING_STATE]
+    assert cache.metrics()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_upsert_processed_data_should_keep_the_cache(mock_db):
+    cache = CompanyCache(max_entries=10, max_bytes=1_000_000, ttl=60)
+    cache.put_many({"https://a.com": ("https://a.com",)}, cache.generation)
+
+    await AsyncCompanyRepository(mock_db, cache).upsert_processed_data("https://a.com", datetime.now(), {})
+
+    assert NOTIFY_COMPANY_DATA_CHANGED not in [call.args[0] for call in mock_db.execute.await_args_list]
+    assert cache.get_many(["https://a.com"]) == {"https://a.com": ("https://a.com",)}
+
+
+@pytest.mark.asyncio
+async def test_upsert_data_should_invalidate_and_notify_imported_urls(mock_db):
+    cache = CompanyCache(max_entries=10, max_bytes=1_000_000, ttl=60)
+    cache.put_many({"https://a.com": ("https://a.com",)}, cache.generation)
+    mock_db.fetch_one.return_value = (1, 1, 1)
+
+    await AsyncCompanyRepository(mock_db, cache).upsert_data([{"url": "https://a.com", "company_name": "A"}])
+
+    mock_db.execute.assert_awaited_with(NOTIFY_COMPANY_DATA_CHANGED, (["https://a.com"],))
+    assert cache.get_many(["https://a.com"]) == {}
+
+
+@pytest.mark.asyncio
+async def test_get_companies_previously_processed(repo, mock_db):
+    await repo.get_companies_previously_processed()
+    mock_db.fetch_all.assert_awaited_once_with(SELECT_PREVIOUSLY_PROCESSED)
+
+
+@pytest.mark.asyncio
+async def test_get_companies_previously_processed_page(repo, mock_db):
+    await repo.get_companies_previously_processed(10, "https://a.com")
+    mock_db.fetch_all.assert_awaited_once_with(SELECT_PREVIOUSLY_PROCESSED_PAGE, ("https://a.com", "https://a.com", 10))
+
+
+@pytest.mark.asyncio
+async def test_iter_companies_previously_processed_should_use_server_side_cursor(repo, mock_db):
+    async def batches(*args, **kwargs):
+        yield [("https://a.com",)]
+
+    mock_db.fetch_batches = MagicMock(side_effect=batches)
+
+    assert [rows async for rows in repo.iter_companies_previously_processed()] == [[("https://a.com",)]]
+    assert mock_db.fetch_batches.call_args.args == (SELECT_PREVIOUSLY_PROCESSED_ORDERED,)
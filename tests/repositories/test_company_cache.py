@@ -0,0 +1,122 @@
+import pytest
+
+from src.repositories.company_cache import CompanyCache, build_invalidation_payloads, estimate_size, INVALIDATE_ALL, \
+    NOTIFY_PAYLOAD_MAX_BYTES
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return CompanyCache(max_entries=2, max_bytes=1_000_000, ttl=60, clock=clock)
+
+
+def row(url, content="x"):
+    return url, "Name", {"content": content}
+
+
+def test_get_many_should_return_stored_rows_and_count_hits_and_misses(cache):
+    cache.put_many({"a": row("a")}, cache.generation)
+
+    assert cache.get_many(["a", "b"]) == {"a": row("a")}
+    assert cache.metrics()["hits"] == 1
+    assert cache.metrics()["misses"] == 1
+
+
+def test_put_many_should_evict_least_recently_used_rows(cache):
+    cache.put_many({"a": row("a"), "b": row("b")}, cache.generation)
+    cache.get_many(["a"])
+
+    cache.put_many({"c": row("c")}, cache.generation)
+
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_put_many_should_keep_estimated_bytes_within_bound(clock):
+    size = estimate_size(row("a"))
+    cache = CompanyCache(max_entries=100, max_bytes=size * 2, ttl=60, clock=clock)
+
+    cache.put_many({"a": row("a"), "b": row("b"), "c": row("c"), "large": row("large", "x" * size * 2)},
+                   cache.generation)
+
+    assert set(cache.get_many(["a", "b", "c", "large"])) == {"b", "c"}
+    assert cache.metrics()["bytes"] <= size * 2
+
+
+def test_get_many_should_expire_rows_after_ttl(cache, clock):
+    cache.put_many({"a": row("a")}, cache.generation)
+    clock.now = 60
+
+    assert cache.get_many(["a"]) == {}
+    assert cache.metrics()["expirations"] == 1
+    assert cache.metrics()["entries"] == 0
+
+
+def test_put_many_should_skip_rows_read_before_an_invalidation(cache):
+    generation = cache.generation
+    cache.invalidate(["a"])
+
+    cache.put_many({"a": row("a")}, generation)
+
+    assert cache.get_many(["a"]) == {}
+
+
+def test_invalidate_should_drop_written_rows(cache):
+    cache.put_many({"a": row("a"), "b": row("b")}, cache.generation)
+
+    cache.invalidate(["a"])
+
+    assert set(cache.get_many(["a", "b"])) == {"b"}
+    assert cache.metrics()["invalidations"] == 1
+
+
+def test_suspend_should_stop_serving_until_resumed(cache):
+    cache.put_many({"a": row("a")}, cache.generation)
+
+    cache.suspend()
+    cache.put_many({"b": row("b")}, cache.generation)
+
+    assert cache.get_many(["a", "b"]) == {}
+    assert cache.metrics()["serving"] is False
+
+    cache.resume()
+    cache.put_many({"b": row("b")}, cache.generation)
+
+    assert set(cache.get_many(["b"])) == {"b"}
+
+
+def test_on_notification_should_invalidate_notified_urls_or_everything(cache):
+    cache.put_many({"a": row("a"), "b": row("b")}, cache.generation)
+
+    cache.on_notification("a\nc")
+    assert set(cache.get_many(["a", "b"])) == {"b"}
+
+    cache.on_notification(INVALIDATE_ALL)
+    assert cache.get_many(["b"]) == {}
+
+
+def test_build_invalidation_payloads_should_split_urls_within_notify_limit():
+    urls = [f"https://{index:04d}.example.com/{'p' * 80}" for index in range(200)]
+
+    payloads = build_invalidation_payloads(urls + urls[:10])
+
+    assert len(payloads) > 1
+    assert all(len(payload.encode("utf-8")) <= NOTIFY_PAYLOAD_MAX_BYTES for payload in payloads)
+    assert [url for payload in payloads for url in payload.split("\n")] == urls
+
+
+def test_build_invalidation_payloads_should_invalidate_all_for_unfit_url():
+    assert build_invalidation_payloads(["https://a.com", "x" * NOTIFY_PAYLOAD_MAX_BYTES]) == [INVALIDATE_ALL]
+    assert build_invalidation_payloads([]) == []
@@ -1,11 +1,21 @@
+import csv
+import hashlib
+import io
 import json
 from datetime import datetime
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+import psycopg2
 import pytest
 
-from src.core.database.schema import UPSERT_DATA_IN_BATCH, UPDATE_PROCESSED_DATA, SELECT_COMPANY_BY_URL, \
-    SELECT_PREVIOUSLY_PROCESSED
+from src.commons.hash_utils import canonical_json
+from src.core.database.schema import CREATE_IMPORT_STAGING_TABLE, COPY_INTO_IMPORT_STAGING, MERGE_IMPORT_STAGING, \
+    UPDATE_PROCESSED_DATA, SELECT_COMPANY_BY_URL, \
+    SELECT_PREVIOUSLY_PROCESSED, SELECT_PREVIOUSLY_PROCESSED_PAGE, SELECT_PREVIOUSLY_PROCESSED_ORDERED, SELECT_COMPANIES_BY_URLS, \
+    UPDATE_PROCESSED_DATA_IN_BATCH, UPDATE_PROCESSED_DATA_WITH_RULES, INSERT_PROCESSING_RUN, UPDATE_PROCESSING_RUN, \
+    SELECT_COMPANIES_TO_PROCESS, NOTIFY_COMPANY_DATA_CHANGED, SELECT_PROCESSING_STATE, SELECT_COMPANY_CONTENTS_BY_URLS
+from src.models.company_record import CompanyRecord
+from src.repositories.company_cache import CompanyCache
 from src.repositories.company_repository import CompanyRepository
 
 
@@ -20,24 +30,84 @@ def repo(mock_db):
 
 
 def test_upsert_data(repo, mock_db):
-    now = datetime.now()
     data = [{
         "url": "https://example.com",
         "company_name": "Example Inc."
     }]
+    mock_db.fetch_one.return_value = (1, 0, 1)
 
-    repo.upsert_data(data)
-    expected_values = [(
-        "https://example.com",
-        "Example Inc.",
-        json.dumps(data[0]),
-        None,
-        mock_db.execute_insert_many.call_args[0][1][0][4],
-        None
-    )]
+    assert repo.upsert_data(data) == (1, 0, 0)
 
-    call_args = mock_db.execute_insert_many.call_args[0]
-    assert call_args[0] == UPSERT_DATA_IN_BATCH
+    assert [call.args[0] for call in mock_db.execute.call_args_list] == [CREATE_IMPORT_STAGING_TABLE]
+    mock_db.fetch_one.assert_called_once_with(MERGE_IMPORT_STAGING)
+    command, chunks = mock_db.copy_from.call_args[0]
+    assert command == COPY_INTO_IMPORT_STAGING
+    mock_db.transaction.assert_called_once()
+
+
+def test_upsert_data_should_skip_empty_batch(repo, mock_db):
+    assert repo.upsert_data([]) == (0, 0, 0)
+    mock_db.copy_from.assert_not_called()
+
+
+def test_build_copy_chunks_should_quote_fields_and_keep_nulls():
+    data = [{"url": "https://example.com", "company_name": 'Say "hi", Inc.'},
+            {"url": "https://other.com", "company_name": None}]
+
+    chunks = list(CompanyRepository.build_copy_chunks(data, rows_per_chunk=1))
+
+    assert len(chunks) == 2
+    row = next(csv.reader(io.StringIO(chunks[0])))
+    assert row[:3] == ["https://example.com", 'Say "hi", Inc.', canonical_json(data[0])]
+    assert row[4] == hashlib.sha256(canonical_json(data[0]).encode("utf-8")).hexdigest()
+    assert chunks[1].split(",")[1] == ""
+
+
+def test_build_copy_chunks_should_hash_content_regardless_of_key_order():
+    first, second = ({"url": "https://example.com", "company_name": "Example Inc."},
+                     {"company_name": "Example Inc.", "url": "https://example.com"})
+
+    rows = list(csv.reader(io.StringIO("".join(CompanyRepository.build_copy_chunks([first, second])))))
+
+    assert rows[0][4] == rows[1][4]
+
+
+def test_build_copy_chunks_should_keep_values_beyond_the_csv_header():
+    content = "url,company_name\nhttps://example.com,Example Inc.,extra,more\n"
+    data = list(csv.DictReader(io.StringIO(content)))
+
+    row = next(csv.reader(io.StringIO("".join(CompanyRepository.build_copy_chunks(data)))))
+
+    assert json.loads(row[2]) == json.loads(json.dumps(data[0]))
+    assert row[2] == '{"company_name":"Example Inc.","null":["extra","more"],"url":"https://example.com"}'
+
+
+def test_build_copy_chunks_should_render_records_like_dictionaries():
+    data = {"url": "https://example.com", "company_name": "Example Inc.", "ticker": "EX"}
+    record = CompanyRecord.from_row(list(data), list(data.values()))
+
+    rows = list(csv.reader(io.StringIO("".join(CompanyRepository.build_copy_chunks([data, record])))))
+
+    assert rows[0][2:] == rows[1][2:]
+    assert rows[1][2] == canonical_json(data)
+
+
+def test_build_copy_chunks_should_render_records_with_values_beyond_the_header_like_dictionaries():
+    content = "url,company_name\nhttps://example.com,Example Inc.,extra\n"
+    reader = csv.reader(io.StringIO(content))
+    fieldnames = next(reader)
+    data = [next(csv.DictReader(io.StringIO(content))), CompanyRecord.from_row(fieldnames, next(reader))]
+
+    rows = list(csv.reader(io.StringIO("".join(CompanyRepository.build_copy_chunks(data)))))
+
+    assert rows[0][2:] == rows[1][2:]
+
+
+@pytest.mark.parametrize("merged, counts", [((3, 0, 3), (3, 0, 0)),
+                                            ((3, 3, 0), (0, 0, 3)),
+                                            ((3, 2, 2), (1, 1, 1))])
+def test_build_import_counts_should_split_inserted_updated_and_unchanged(merged, counts):
+    assert CompanyRepository.build_import_counts(merged) == counts
 
 
 def test_upsert_processed_data(repo, mock_db):
@@ -45,20 +115,200 @@ def test_upsert_processed_data(repo, mock_db):
     timestamp = datetime.now()
     url = "https://example.com"
 
-    repo.upsert_processed_data(url, timestamp, processed)
+    repo.upsert_processed_data(url, timestamp, processed, 7)
 
     mock_db.execute.assert_called_once_with(
         UPDATE_PROCESSED_DATA,
-        (json.dumps(processed), timestamp, url)
+        (json.dumps(processed), timestamp, 7, url)
     )
 
 
+def test_create_run_should_return_run_id(repo, mock_db):
+    processed_date = datetime(2025, 5, 22)
+    mock_db.fetch_one.return_value = (7,)
+
+    assert repo.create_run(processed_date) == 7
+    mock_db.fetch_one.assert_called_once_with(INSERT_PROCESSING_RUN, (processed_date,))
+    mock_db.transaction.assert_called_once()
+
+
+def test_upsert_processed_data_in_batch_should_write_chunk_in_one_statement(repo, mock_db):
+    timestamp = datetime.now()
+    mock_db.fetch_all.return_value = [("https://a.com",)]
+
+    failures = repo.upsert_processed_data_in_batch({"https://a.com": {"f": 1}, "https://b.com": {"f": 0}}, timestamp,
+                                                   7, "rules", {"https://a.com": "hash-a"})
+
+    mock_db.fetch_all.assert_called_once_with(UPDATE_PROCESSED_DATA_IN_BATCH,
+                                              (timestamp, 7, "rules", ["https://a.com", "https://b.com"],
+                                               [json.dumps({"f": 1}), json.dumps({"f": 0})], ["hash-a", None]))
+    assert failures == {"https://b.com": "Company not found"}
+
+
+def test_upsert_processed_data_in_batch_should_retry_failed_chunk_row_by_row(repo, mock_db):
+    def fetch_all(command, values):
+        if values[3] == ["https://bad.com"] or len(values[3]) > 1:
+            raise psycopg2.DataError("invalid input syntax for type json")
+        return [(values[3][0],)]
+
+    mock_db.fetch_all.side_effect = fetch_all
+
+    failures = repo.upsert_processed_data_in_batch({"https://a.com": {"f": 1}, "https://bad.com": {"f": 0}},
+                                                   datetime.now(), 7)
+
+    assert failures == {"https://bad.com": "invalid input syntax for type json"}
+    assert mock_db.transaction.call_count == 4
+
+
+def test_process_in_database_should_update_with_rules_expression(repo, mock_db):
+    mock_db.fetch_all.return_value = [("https://example.com", {"feature": 1, "company": "Example Inc."}, True),
+                                      ("https://other.com", {"feature": 0, "company": "Other"}, False)]
+    last_processed_date = datetime(2025, 5, 22)
+
+    processed, recomputed = repo.process_in_database(
+        ["https://example.com", "https://example.com", "https://other.com", "https://missing.com"],
+        "jsonb_build_object(%s::text, 1)", ["feature"], last_processed_date, 7, "rules")
+
+    assert processed == {"https://example.com": {"feature": 1, "company": "Example Inc."},
+                         "https://other.com": {"feature": 0, "company": "Other"}}
+    assert recomputed == {"https://example.com"}
+    mock_db.fetch_all.assert_called_once_with(
+        UPDATE_PROCESSED_DATA_WITH_RULES.format(processed_variables="jsonb_build_object(%s::text, 1)"),
+        ("feature", last_processed_date, 7, "rules", "rules",
+         ["https://example.com", "https://other.com", "https://missing.com"]))
+    mock_db.transaction.assert_called_once()
+
+
+def test_assign_run_should_move_companies_without_rewriting_results(repo, mock_db):
+    last_processed_date = datetime(2025, 5, 22)
+
+    repo.assign_run(["https://a.com"], last_processed_date, 7)
+    repo.assign_run([], last_processed_date, 7)
+
+    mock_db.execute.assert_called_once_with(UPDATE_PROCESSING_RUN, (last_processed_date, 7, ["https://a.com"]))
+
+
+def test_fetch_for_processing_should_pass_rules_fingerprint(repo, mock_db):
+    row = ("https://example.com", "Example Inc.", None, {"feature": 1}, "hash")
+    mock_db.fetch_all.return_value = [row]
+
+    result = repo.fetch_for_processing(["https://example.com", "https://example.com"], "rules")
+
+    assert result == {"https://example.com": row}
+    mock_db.fetch_all.assert_called_once_with(SELECT_COMPANIES_TO_PROCESS, ("rules", ["https://example.com"]))
+
+
 def test_fetch_by_url(repo, mock_db):
     url = "https://example.com"
     repo.fetch_by_url(url)
     mock_db.fetch_one.assert_called_once_with(SELECT_COMPANY_BY_URL, (url,))
 
 
+def test_fetch_by_urls_should_map_rows_by_url(repo, mock_db):
+    row = ("https://example.com", "Example Inc.", {}, None, None, None)
+    mock_db.fetch_all.return_value = [row]
+
+    result = repo.fetch_by_urls(["https://example.com", "https://missing.com", "https://example.com"])
+
+    assert result == {"https://example.com": row}
+    mock_db.fetch_all.assert_called_once_with(SELECT_COMPANIES_BY_URLS,
+                                              (["https://example.com", "https://missing.com"],))
+
+
+@patch("src.repositories.company_repository.DB_FETCH_CHUNK_SIZE", 2)
+def test_fetch_by_urls_should_query_in_chunks(repo, mock_db):
+    mock_db.fetch_all.return_value = []
+
+    repo.fetch_by_urls(["a", "b", "c"])
+
+    assert [call.args[1] for call in mock_db.fetch_all.call_args_list] == [(["a", "b"],), (["c"],)]
+
+
+def test_fetch_by_urls_should_read_the_database_with_a_cache(mock_db):
+    row = ("https://a.com", "A", {}, {"v": 1}, None, None, 7, "hash", "rules", "hash")
+    mock_db.fetch_all.return_value = [row]
+    repo = CompanyRepository(mock_db, CompanyCache(max_entries=10, max_bytes=1_000_000, ttl=60))
+
+    assert repo.fetch_by_urls(["https://a.com"]) == {"https://a.com": row}
+    assert repo.fetch_by_urls(["https://a.com"]) == {"https://a.com": row}
+
+    assert mock_db.fetch_all.call_count == 2
+
+
+def test_upsert_data_should_invalidate_and_notify_imported_urls(mock_db):
+    cache = CompanyCache(max_entries=10, max_bytes=1_000_000, ttl=60)
+    cache.put_many({"https://a.com": ("https://a.com",), "https://b.com": ("https://b.com",)}, cache.generation)
+    mock_db.fetch_one.return_value = (1, 1, 1)
+
+    CompanyRepository(mock_db, cache).upsert_data([{"url": "https://a.com"}])
+
+    mock_db.execute.assert_called_with(NOTIFY_COMPANY_DATA_CHANGED, (["https://a.com"],))
+    assert set(cache.get_many(["https://a.com", "https://b.com"])) == {"https://b.com"}
+
+
+def test_saving_processing_results_should_keep_the_cache(mock_db):
+    cache = CompanyCache(max_entries=10, max_bytes=1_000_000, ttl=60)
+    cache.put_many({"https://a.com": ("https://a.com", "A", {}, "hash")}, cache.generation)
+    mock_db.fetch_all.return_value = [("https://a.com", {"v": 1}, True)]
+    repo = CompanyRepository(mock_db, cache)
+
+    repo.upsert_processed_data("https://a.com", datetime.now(), {"v": 1}, 7)
+    repo.upsert_processed_data_in_batch({"https://a.com": {"v": 1}}, datetime.now(), 7)
+    repo.process_in_database(["https://a.com"], "'{}'::jsonb", [], datetime.now(), 7)
+    repo.assign_run(["https://a.com"], datetime.now(), 7)
+
+    assert NOTIFY_COMPANY_DATA_CHANGED not in [call.args[0] for call in mock_db.execute.call_args_list]
+    assert cache.metrics()["invalidations"] == 0 and cache.metrics()["entries"] == 1
+
+
+def processing_db(mock_db, states, contents):
+    """Answers the processing state and content queries of fetch_for_processing from the given rows."""
+    queries = {SELECT_PROCESSING_STATE: states, SELECT_COMPANY_CONTENTS_BY_URLS: contents}
+    mock_db.fetch_all.side_effect = lambda query, params: [row for row in queries[query] if row[0] in params[-1]]
+    return mock_db
+
+
+def test_fetch_for_processing_should_read_processed_state_and_cache_imported_columns(mock_db):
+    processing_db(mock_db,
+                  states=[("https://a.com", {"v": 1}, "h1"), ("https://b.com", None, "h2")],
+                  contents=[("https://a.com", "A", {"c": 1}, "h1"), ("https://b.com", "B", {"c": 2}, "h2")])
+    cache = CompanyCache(max_entries=10, max_bytes=1_000_000, ttl=60)
+    repo = CompanyRepository(mock_db, cache)
+
+    for _ in range(2):
+        assert repo.fetch_for_processing(["https://a.com", "https://b.com"], "rules") == {
+            "https://a.com": ("https://a.com", "A", None, {"v": 1}, "h1"),
+            "https://b.com": ("https://b.com", "B", {"c": 2}, None, "h2")}
+
+    assert [call.args[0] for call in mock_db.fetch_all.call_args_list] == [
+        SELECT_PROCESSING_STATE, SELECT_COMPANY_CONTENTS_BY_URLS, SELECT_PROCESSING_STATE]
+    assert mock_db.fetch_all.call_args_list[0].args[1] == ("rules", ["https://a.com", "https://b.com"])
+    assert cache.metrics()["hits"] == 2
+
+
+def test_fetch_for_processing_should_refetch_cached_rows_whose_content_hash_changed(mock_db):
+    processing_db(mock_db, states=[("https://a.com", None, "h2")], contents=[("https://a.com", "A", {"c": 2}, "h2")])
+    cache = CompanyCache(max_entries=10, max_bytes=1_000_000, ttl=60)
+    cache.put_many({"https://a.com": ("https://a.com", "A", {"c": 1}, "h1")}, cache.generation)
+
+    rows = CompanyRepository(mock_db, cache).fetch_for_processing(["https://a.com"], "rules")
+
+    assert rows == {"https://a.com": ("https://a.com", "A", {"c": 2}, None, "h2")}
+    assert cache.get_many(["https://a.com"]) == {"https://a.com": ("https://a.com", "A", {"c": 2}, "h2")}
+
+
 def test_get_companies_previously_processed(repo, mock_db):
     repo.get_companies_previously_processed()
     mock_db.fetch_all.assert_called_once_with(SELECT_PREVIOUSLY_PROCESSED)
+
+
+def test_get_companies_previously_processed_page(repo, mock_db):
+    repo.get_companies_previously_processed(10, "https://a.com")
+    mock_db.fetch_all.assert_called_once_with(SELECT_PREVIOUSLY_PROCESSED_PAGE, ("https://a.com", "https://a.com", 10))
+
+
+def test_iter_companies_previously_processed_should_use_server_side_cursor(repo, mock_db):
+    mock_db.fetch_batches.return_value = iter([[("https://a.com",)], [("https://b.com",)]])
+
+    assert list(repo.iter_companies_previously_processed()) == [[("https://a.com",)], [("https://b.com",)]]
+    assert mock_db.fetch_batches.call_args.args == (SELECT_PREVIOUSLY_PROCESSED_ORDERED,)
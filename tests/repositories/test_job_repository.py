@@ -0,0 +1,75 @@
+import json
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.core.database.schema import INSERT_JOB, SELECT_JOB_BY_ID, SELECT_CLAIMABLE_JOBS, CLAIM_JOB, \
+    UPDATE_JOB_STARTED, UPDATE_JOB_PROGRESS, UPDATE_JOB_STATUS
+from src.models.job import JobKind, JobStatus
+from src.repositories.job_repository import JobRepository
+
+
+@pytest.fixture
+def mock_db():
+    return MagicMock()
+
+
+@pytest.fixture
+def repo(mock_db):
+    return JobRepository(mock_db)
+
+
+def test_create_should_insert_queued_job(repo, mock_db):
+    repo.create("job-1", JobKind.PROCESS, {"urls": ["https://example.com"]})
+
+    command, values = mock_db.fetch_one.call_args.args
+    assert command == INSERT_JOB
+    assert values[:4] == ("job-1", "process", "queued", json.dumps({"urls": ["https://example.com"]}))
+    mock_db.transaction.assert_called_once()
+
+
+def test_fetch_and_fetch_claimable(repo, mock_db):
+    expired_before = datetime(2025, 5, 22)
+    repo.fetch("job-1")
+    repo.fetch_claimable(expired_before)
+
+    mock_db.fetch_one.assert_called_once_with(SELECT_JOB_BY_ID, ("job-1",))
+    mock_db.fetch_all.assert_called_once_with(SELECT_CLAIMABLE_JOBS, (expired_before,))
+
+
+def test_claim_should_run_one_conditional_update(repo, mock_db):
+    expired_before = datetime(2025, 5, 22)
+    mock_db.fetch_one.return_value = None
+
+    assert repo.claim("job-1", "worker-1", expired_before) is None
+
+    command, values = mock_db.fetch_one.call_args.args
+    assert command == CLAIM_JOB
+    assert values[0] == "worker-1" and values[3:] == ("job-1", expired_before)
+    mock_db.transaction.assert_called_once()
+
+
+def test_start_and_update_progress(repo, mock_db):
+    mock_db.execute.side_effect = [1, 0]
+
+    assert repo.start("job-1", "worker-1", 10)
+    assert not repo.update_progress("job-1", "worker-1", 5, {"rows_read": 5})
+
+    (start_command, start_values), (progress_command, progress_values) = \
+        [call.args for call in mock_db.execute.call_args_list]
+    assert start_command == UPDATE_JOB_STARTED and start_values[0] == 10
+    assert start_values[-2:] == ("job-1", "worker-1")
+    assert progress_command == UPDATE_JOB_PROGRESS
+    assert progress_values[:3] == (5, None, json.dumps({"rows_read": 5}))
+    assert progress_values[-2:] == ("job-1", "worker-1")
+
+
+def test_update_status_should_only_finish_completed_and_failed_jobs(repo, mock_db):
+    repo.update_status("job-1", "worker-1", JobStatus.QUEUED)
+    repo.update_status("job-1", "worker-1", JobStatus.FAILED, "boom")
+
+    queued, failed = [call.args[1] for call in mock_db.execute.call_args_list]
+    assert mock_db.execute.call_args.args[0] == UPDATE_JOB_STATUS
+    assert queued[0] == "queued" and queued[3] is None
+    assert failed[:2] == ("failed", "boom") and failed[3] is not None
@@ -0,0 +1,63 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.core.database.schema import UPSERT_RULE_SET, SELECT_RULE_SET_BY_ID, SELECT_RULE_SET_BY_FINGERPRINT
+from src.repositories.async_rule_set_repository import AsyncRuleSetRepository
+from src.repositories.rule_set_repository import RuleSetRepository, parse_rule_set_id
+
+rules = [{"input": "company_age", "feature_name": "age_feature",
+          "operation": {"greater_than": None, "less_than": 10, "equal": None}, "match": 1, "default": 0}]
+
+
+def test_register_should_upsert_by_fingerprint():
+    mock_db = MagicMock()
+
+    RuleSetRepository(mock_db).register("abc", rules)
+
+    command, values = mock_db.fetch_one.call_args.args
+    assert command == UPSERT_RULE_SET
+    assert values[:2] == ("abc", json.dumps(rules))
+    mock_db.transaction.assert_called_once()
+
+
+def test_fetch_should_look_up_numbers_by_id_and_other_references_by_fingerprint():
+    mock_db = MagicMock()
+    repo = RuleSetRepository(mock_db)
+
+    repo.fetch(3)
+    repo.fetch("4")
+    repo.fetch("f" * 64)
+
+    assert [call.args for call in mock_db.fetch_one.call_args_list] == [
+        (SELECT_RULE_SET_BY_ID, (3,)), (SELECT_RULE_SET_BY_ID, (4,)), (SELECT_RULE_SET_BY_FINGERPRINT, ("f" * 64,))]
+
+
+def test_fetch_should_not_query_ids_beyond_bigint():
+    mock_db = MagicMock()
+    repo = RuleSetRepository(mock_db)
+
+    assert repo.fetch(2 ** 63) is None
+    assert repo.fetch(str(2 ** 63)) is None
+    repo.fetch(2 ** 63 - 1)
+
+    assert [call.args for call in mock_db.fetch_one.call_args_list] == [(SELECT_RULE_SET_BY_ID, (2 ** 63 - 1,))]
+
+
+def test_parse_rule_set_id_should_keep_digit_only_fingerprints():
+    assert parse_rule_set_id("12") == 12
+    assert parse_rule_set_id("1" * 64) is None
+
+
+@pytest.mark.asyncio
+async def test_async_register_and_fetch_should_run_same_statements():
+    mock_db = MagicMock()
+    mock_db.fetch_one = AsyncMock(return_value=(3, "abc", rules, None))
+    repo = AsyncRuleSetRepository(mock_db)
+
+    await repo.register("abc", rules)
+    assert await repo.fetch("abc") == (3, "abc", rules, None)
+
+    assert mock_db.fetch_one.await_args_list[0].args[0] == UPSERT_RULE_SET
+    assert mock_db.fetch_one.await_args_list[1].args == (SELECT_RULE_SET_BY_FINGERPRINT, ("abc",))
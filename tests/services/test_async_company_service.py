@@ -0,0 +1,243 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.models.import_response import ImportSummary
+from src.models.rules import Rule, Operation, ExecutionMode
+from src.services.async_company_service import AsyncCompanyService
+from src.services.pre_generate_service import COMPANY_AGE_SQL
+from src.services.rules_processor_service import RulesProcessorService
+
+mock_data = [{"url": "https://www.nexuswave.tech", "company_name": "NexusWave Systems", "founded_year": "2019",
+              "headquarters_city": "Toronto (Canada)", "industry": "Software Development"},
+             {"url": "https://www.quantumaicorp.ai", "company_name": "QuantumAI Corp", "founded_year": "2021",
+              "headquarters_city": "Seattle (USA)", "industry": "Artificial Intelligence"}]
+
+
+def repository_mock():
+    mock_repo = AsyncMock()
+    mock_repo.transaction = MagicMock(return_value=nullcontext())
+    return mock_repo
+
+
+@pytest.mark.asyncio
+async def test_import_data_should_return_summary():
+    mock_repo = repository_mock()
+    mock_repo.upsert_data.return_value = (0, 1, 1)
+
+    service = AsyncCompanyService(company_repository=mock_repo)
+    service._AsyncCompanyService__processing.prepare_import = MagicMock(return_value=mock_data)
+
+    result = await service.import_data(mock_data)
+
+    assert result == ImportSummary(rows_inserted=0, rows_read=2, rows_updated=1, rows_unchanged=1)
+    mock_repo.upsert_data.assert_awaited_once_with(mock_data)
+
+
+@pytest.mark.asyncio
+async def test_import_batches_should_save_each_batch_and_sum_summaries():
+    async def batches():
+        yield mock_data[:1]
+        yield mock_data[1:]
+
+    mock_repo = repository_mock()
+    mock_repo.upsert_data.side_effect = [(1, 0, 0), (0, 0, 1)]
+
+    service = AsyncCompanyService(company_repository=mock_repo)
+    service._AsyncCompanyService__processing.prepare_import = MagicMock(side_effect=lambda batch: batch)
+
+    result = await service.import_batches(batches())
+
+    assert result == ImportSummary(rows_inserted=1, rows_read=2, rows_unchanged=1)
+    assert mock_repo.upsert_data.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_process_company_should_process_rules_and_save():
+    url = "https://www.cloudlogiclabs.com"
+    mock_company = (url, 'CloudLogic Labs', {'founded_year': '2021', 'is_usa_based': True}, None, "content-hash")
+
+    mock_repo = repository_mock()
+    mock_repo.fetch_for_processing.return_value = {url: mock_company}
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
+
+    service = AsyncCompanyService(company_repository=mock_repo)
+
+    rules = [Rule(input='company_age', feature_name='age_feature',
+                  operation=Operation(less_than=10), match=1, default=0),
+             Rule(input='is_usa_based', feature_name='usa_based_feature',
+                  operation=Operation(equal=True), match=1, default=0)]
+
+    result = await service.process_company([url, "https://unknown.example"], rules, as_of=date(2025, 5, 22))
+
+    assert result.companies == [{'age_feature': 1, 'usa_based_feature': 1, 'company': 'CloudLogic Labs'}]
+    assert result.recomputed == [url]
+    assert mock_repo.upsert_processed_data_in_batch.await_args.args[4] == {url: "content-hash"}
+    mock_repo.assign_run.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_process_company_should_serve_current_results_without_evaluating_them():
+    url = "https://www.cloudlogiclabs.com"
+    stored = {'age_feature': 1, 'company': 'CloudLogic Labs'}
+    mock_repo = repository_mock()
+    mock_repo.fetch_for_processing.return_value = {url: (url, 'CloudLogic Labs', None, stored, "content-hash")}
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
+    rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1,
+                  default=0)]
+
+    service = AsyncCompanyService(company_repository=mock_repo)
+    result = await service.process_company([url], rules)
+
+    assert result.companies == [stored]
+    assert result.recomputed == []
+    assert mock_repo.upsert_processed_data_in_batch.await_args.args[0] == {}
+    assert mock_repo.assign_run.await_args.args[0] == [url]
+
+
+@pytest.mark.asyncio
+@patch("src.services.company_processing.PROCESS_POOL_CHUNK_SIZE", 2)
+@patch("src.services.company_processing.PROCESS_POOL_MIN_BATCH", 3)
+async def test_process_company_should_evaluate_process_pool_chunks_in_order():
+    companies = {f"https://{index}.com": (f"https://{index}.com", f"C{index}", {'founded_year': 2025 - index}, None,
+                                          None) for index in range(5)}
+    mock_repo = repository_mock()
+    mock_repo.fetch_for_processing.return_value = companies
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
+    rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=2), match=1,
+                  default=0)]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        service = AsyncCompanyService(company_repository=mock_repo, process_pool=pool)
+        result = await service.process_company(list(companies), rules, as_of=date(2025, 5, 22))
+
+    assert result.companies == [{'age_feature': 1 if index < 2 else 0, 'company': f"C{index}"} for index in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_process_company_in_database_should_not_fetch_content():
+    url = "https://www.cloudlogiclabs.com"
+    mock_repo = repository_mock()
+    mock_repo.process_in_database.return_value = ({url: {'age_feature': 1, 'company': 'CloudLogic Labs'}}, {url})
+    rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1,
+                  default=0)]
+
+    service = AsyncCompanyService(company_repository=mock_repo)
+    result = await service.process_company([url, "https://unknown.example"], rules, ExecutionMode.DATABASE,
+                                           as_of=date(2025, 5, 22))
+
+    assert result.companies == [{'age_feature': 1, 'company': 'CloudLogic Labs'}]
+    assert result.failures == []
+    assert result.recomputed == [url]
+    expression, params = RulesProcessorService.compile_rules_to_sql(
+        rules, {"company_age": (COMPANY_AGE_SQL, [date(2025, 5, 22)])})
+    mock_repo.process_in_database.assert_awaited_once()
+    assert mock_repo.process_in_database.await_args.args[:3] == ([url, "https://unknown.example"], expression, params)
+    assert mock_repo.process_in_database.await_args.args[4] == mock_repo.create_run.return_value
+    mock_repo.fetch_for_processing.assert_not_called()
+    mock_repo.upsert_processed_data_in_batch.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_companies_previously_processed_should_return_response():
+    mock_repo = repository_mock()
+    mock_repo.get_companies_previously_processed.return_value = [
+        ('https://www.datasynctech.io', 'DataSync Technologies', {'company_age': 5}, {'age_feature': 1},
+         datetime(2025, 5, 22, 8, 55, 43), datetime(2025, 5, 22, 9, 13, 43))
+    ]
+
+    service = AsyncCompanyService(company_repository=mock_repo)
+
+    result = await service.get_companies_previously_processed()
+
+    assert result.companies[0].url == "https://www.datasynctech.io"
+    assert result.companies[0].last_processed_date == "2025-05-22 09:13:43"
+
+
+def company_row(url):
+    return (url, url, {'company_age': 5}, {'age_feature': 1}, datetime(2025, 5, 22, 8, 55, 43),
+            datetime(2025, 5, 22, 9, 13, 43))
+
+
+@pytest.mark.asyncio
+async def test_get_companies_previously_processed_should_return_page_and_next_cursor():
+    mock_repo = repository_mock()
+    mock_repo.get_companies_previously_processed.return_value = [company_row("https://a.com"),
+                                                                 company_row("https://b.com"),
+                                                                 company_row("https://c.com")]
+    service = AsyncCompanyService(company_repository=mock_repo)
+
+    result = await service.get_companies_previously_processed(2, "https://0.com")
+
+    assert [company.url for company in result.companies] == ["https://a.com", "https://b.com"]
+    assert result.next_cursor == "https://b.com"
+    mock_repo.get_companies_previously_processed.assert_awaited_once_with(3, "https://0.com")
+
+    mock_repo.get_companies_previously_processed.return_value = [company_row("https://c.com")]
+    assert (await service.get_companies_previously_processed(2, "https://b.com")).next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_stream_companies_previously_processed_should_yield_ndjson_per_batch():
+    async def batches():
+        yield [company_row("https://a.com"), company_row("https://b.com")]
+        yield [company_row("https://c.com")]
+
+    mock_repo = MagicMock()
+    mock_repo.iter_companies_previously_processed = batches
+    service = AsyncCompanyService(company_repository=mock_repo)
+
+    chunks = [chunk async for chunk in service.stream_companies_previously_processed()]
+
+    assert len(chunks) == 2
+    lines = "".join(chunks).splitlines()
+    assert [json.loads(line)["url"] for line in lines] == ["https://a.com", "https://b.com", "https://c.com"]
+
+
+@pytest.mark.asyncio
+async def test_stream_companies_response_should_yield_a_companies_response():
+    async def batches():
+        yield [company_row("https://a.com"), company_row("https://b.com")]
+        yield [company_row("https://c.com")]
+
+    mock_repo = MagicMock()
+    mock_repo.iter_companies_previously_processed = batches
+    service = AsyncCompanyService(company_repository=mock_repo)
+
+    body = json.loads("".join([chunk async for chunk in service.stream_companies_response()]))
+
+    assert [company["url"] for company in body["companies"]] == ["https://a.com", "https://b.com", "https://c.com"]
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_cpu_bound_steps_should_run_outside_the_event_loop_thread():
+    url = "https://www.cloudlogiclabs.com"
+    mock_repo = repository_mock()
+    mock_repo.upsert_data.return_value = (1, 0, 0)
+    mock_repo.fetch_for_processing.return_value = {url: (url, 'CloudLogic Labs', {'founded_year': 2021}, None, None)}
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
+    service = AsyncCompanyService(company_repository=mock_repo)
+    processing = service._AsyncCompanyService__processing
+    threads = []
+
+    def recording(step):
+        def record(*args):
+            threads.append(threading.get_ident())
+            return step(*args)
+        return record
+
+    processing.prepare_import = recording(processing.prepare_import)
+    processing.evaluate = recording(processing.evaluate)
+    rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1,
+                  default=0)]
+
+    await service.import_data([dict(mock_data[0])])
+    await service.process_company([url], rules, as_of=date(2025, 5, 22))
+
+    assert len(threads) == 2 and threading.get_ident() not in threads
@@ -0,0 +1,54 @@
+from datetime import date, datetime
+
+import pytest
+
+from src.models.rules import Rule, Operation, ExecutionMode
+from src.services.company_processing import CompanyProcessing
+from src.services.pre_generate_service import COMPANY_AGE_SQL
+from src.services.rules_processor_service import RulesProcessorService
+
+rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1, default=0)]
+
+
+def test_evaluate_should_recompute_stale_companies_only():
+    processing = CompanyProcessing()
+    request = processing.start(["https://b.com", "https://a.com", "https://missing.com", "https://b.com"], rules,
+                               ExecutionMode.PYTHON, date(2025, 5, 22))
+    companies = {"https://a.com": ("https://a.com", "A", None, {"age_feature": 1, "company": "A"}, "hash-a"),
+                 "https://b.com": ("https://b.com", "B", {"founded_year": 2000}, None, "hash-b")}
+
+    recomputed = processing.evaluate(request, companies)
+
+    assert recomputed == {"https://b.com": {"age_feature": 0, "company": "B"}}
+    assert request.rules_fingerprint == RulesProcessorService.fingerprint_rules(rules, date(2025, 5, 22))
+    assert request.content_hashes == {"https://b.com": "hash-b"}
+    assert request.current_urls == ["https://a.com"]
+    response = request.response({})
+    assert response.companies == [{"age_feature": 0, "company": "B"}, {"age_feature": 1, "company": "A"},
+                                  {"age_feature": 0, "company": "B"}]
+    assert response.recomputed == ["https://b.com"]
+    assert request.response({"https://b.com": "Company not found"}).companies == [{"age_feature": 1, "company": "A"}]
+
+
+def test_start_should_compile_rules_to_sql_in_database_mode():
+    request = CompanyProcessing().start(["https://a.com"], rules, ExecutionMode.DATABASE, date(2025, 5, 22))
+
+    assert (request.processed_variables, request.params) == RulesProcessorService.compile_rules_to_sql(
+        rules, {"company_age": (COMPANY_AGE_SQL, [date(2025, 5, 22)])})
+
+
+def test_start_should_reject_rules_without_operation_in_database_mode():
+    invalid_rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(), match=1, default=0)]
+
+    with pytest.raises(ValueError):
+        CompanyProcessing().start(["https://a.com"], invalid_rules, ExecutionMode.DATABASE, None)
+
+
+def test_build_companies_response_should_return_page_and_next_cursor():
+    rows = [(url, url, {}, {}, datetime(2025, 5, 22), datetime(2025, 5, 22)) for url in ("https://a.com",
+                                                                                        "https://b.com")]
+
+    page = CompanyProcessing.build_companies_response(rows, 1)
+
+    assert [company.url for company in page.companies] == ["https://a.com"] and page.next_cursor == "https://a.com"
+    assert CompanyProcessing.build_companies_response(rows).next_cursor is None
@@ -1,10 +1,21 @@
+import json
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 
+from src.core.database.schema import SELECT_PROCESSING_STATE, SELECT_COMPANY_CONTENTS_BY_URLS, \
+    UPDATE_PROCESSED_DATA_IN_BATCH
+from src.repositories.company_cache import CompanyCache
+from src.repositories.company_repository import CompanyRepository
+from src.services.company_processing import CompanyProcessing
 from src.services.company_service import CompanyService
+from src.services.rules_processor_service import RulesProcessorService
+from src.models.companies_response import CompanyProcessed
 from src.models.import_response import ImportSummary
-from src.models.rules import Rule, Operation
+from src.models.keyword_set import KeywordSet
+from src.models.rules import Rule, Operation, ExecutionMode
+from src.services.pre_generate_service import PreGenerateService, build_feature_registry
 
 mock_data = [
     {"url": "https://www.nexuswave.tech", "is_saas": False, "industry": "Software Development", "company_age": 6,
@@ -22,38 +33,55 @@ mock_data = [
      "employee_locations": "{\"USA\": 29, \"Canada\": 3, \"France\": 1, \"Japan\": 1}"}]
 
 
+async def batches_of(*batches):
+    for batch in batches:
+        yield batch
+
+
 @pytest.mark.asyncio
-@patch("src.services.company_service.parse_csv_to_dict", new_callable=AsyncMock)
-async def test_import_file_should_return_summary(mock_parse_csv):
-    mock_parse_csv.return_value = mock_data
+@patch("src.services.company_service.iter_csv_batches")
+async def test_import_file_should_return_summary(mock_iter_csv_batches):
+    mock_iter_csv_batches.return_value = batches_of(mock_data[:1], mock_data[1:])
 
     mock_repo = MagicMock()
-    mock_repo.upsert_data.return_value = 2
+    mock_repo.upsert_data.return_value = (1, 0, 0)
 
     service = CompanyService(company_repository=mock_repo)
-    service._CompanyService__pre_generate_service.generate = MagicMock(return_value=mock_data)
+    service._CompanyService__processing.prepare_import = MagicMock(side_effect=lambda batch: batch)
 
     file_mock = MagicMock()
 
     result = await service.import_file(file_mock)
 
     assert result == ImportSummary(rows_inserted=2, rows_read=2)
-    mock_repo.upsert_data.assert_called_once_with(mock_data)
+    assert [call.args[0] for call in mock_repo.upsert_data.call_args_list] == [mock_data[:1], mock_data[1:]]
 
 
 def test_import_data_should_return_summary():
     mock_repo = MagicMock()
-    mock_repo.upsert_data.return_value = 2
+    mock_repo.upsert_data.return_value = (1, 0, 1)
 
     service = CompanyService(company_repository=mock_repo)
-    service._CompanyService__pre_generate_service.generate = MagicMock(return_value=mock_data)
+    service._CompanyService__processing.prepare_import = MagicMock(return_value=mock_data)
 
     result = service.import_data(mock_data)
 
-    assert result == ImportSummary(rows_inserted=2, rows_read=2)
+    assert result == ImportSummary(rows_inserted=1, rows_read=2, rows_unchanged=1)
     mock_repo.upsert_data.assert_called_once_with(mock_data)
 
 
+def test_import_data_should_store_typed_values():
+    mock_repo = MagicMock()
+    mock_repo.upsert_data.return_value = (1, 0, 0)
+    service = CompanyService(company_repository=mock_repo)
+
+    service.import_data([{"url": "https://a.com", "total_employees": "38", "employee_growth_1Y": "N/A",
+                          "employee_locations": '{"USA": 32}'}])
+
+    [company] = mock_repo.upsert_data.call_args.args[0]
+    assert (company["total_employees"], company["employee_growth_1Y"], company["employee_locations"]) == (
+        38, None, {"USA": 32})
+
 def test_process_company_should_process_rules_and_save():
     mock_urls = ["https://www.cloudlogiclabs.com"]
     mock_company = ('https://www.cloudlogiclabs.com', 'CloudLogic Labs',
@@ -64,22 +92,17 @@ def test_process_company_should_process_rules_and_save():
                      'founded_year': '2021', 'headquarters_city': 'Boston (USA)', 'industry': 'Software',
                      'is_saas': False, 'is_usa_based': True, 'total_employees': '38',
                      'url': 'https://www.cloudlogiclabs.com'},
-                    {'age_feature': 1, 'company': 'CloudLogic Labs', 'head_count_feature': 1, 'is_saas_feature': 0,
-                     'usa_based_feature': 1}, datetime(2025, 5, 22, 8, 55, 43, 944135),
-                    datetime(2025, 5, 22, 9, 13, 43))
+                    None, "content-hash")
 
     mock_repo = MagicMock()
-    mock_repo.fetch_by_url.return_value = mock_company
+    mock_repo.fetch_for_processing.return_value = {mock_company[0]: mock_company}
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
 
-    mock_rule_processor = MagicMock()
-    mock_rule_processor.process_rules.return_value = {'age_feature': 1, 'company': 'CloudLogic Labs',
-                                                      'head_count_feature': 1, 'is_saas_feature': 0,
-                                                      'usa_based_feature': 1}
-
-    service = CompanyService(company_repository=mock_repo)
-    service._CompanyService__rules_processor_service = mock_rule_processor
-
-    service._CompanyService__save_processed_data = MagicMock()
+    with patch("src.services.company_processing.RulesProcessorService") as rules_processor_service:
+        mock_rule_processor = rules_processor_service.return_value
+        mock_rule_processor.process_batch.return_value = [{'age_feature': 1, 'head_count_feature': 1,
+                                                           'is_saas_feature': 0, 'usa_based_feature': 1}]
+        service = CompanyService(company_repository=mock_repo)
 
     rules = [Rule(input='total_employees', feature_name='head_count_feature',
                   operation=Operation(greater_than=80, less_than=None, equal=None), match=0, default=1),
@@ -90,13 +113,163 @@ def test_process_company_should_process_rules_and_save():
              Rule(input='is_saas', feature_name='is_saas_feature',
                   operation=Operation(greater_than=None, less_than=None, equal=True), match=1, default=0)]
 
-    result = service.process_company(mock_urls, rules)
+    result = service.process_company(mock_urls, rules, as_of=date(2025, 5, 22))
+
+    assert result.companies == [{'age_feature': 1, 'company': 'CloudLogic Labs', 'head_count_feature': 1,
+                                 'is_saas_feature': 0, 'usa_based_feature': 1}]
+    assert result.failures == []
+    assert result.recomputed == mock_urls
+    rules_fingerprint = RulesProcessorService.fingerprint_rules(rules, date(2025, 5, 22))
+    mock_repo.fetch_for_processing.assert_called_once_with(mock_urls, rules_fingerprint)
+    mock_rule_processor.process_batch.assert_called_once_with([mock_company[2]], rules, None)
+    assert mock_repo.upsert_processed_data_in_batch.call_args.args[3:] == (
+        rules_fingerprint, {mock_company[0]: "content-hash"})
+
+
+def test_process_company_should_serve_current_results_without_evaluating_them():
+    stored = {'feature': 1, 'company': 'A'}
+    mock_repo = MagicMock()
+    mock_repo.fetch_for_processing.return_value = {
+        "https://a.com": ("https://a.com", "A", None, stored, "hash-a"),
+        "https://b.com": ("https://b.com", "B", {'founded_year': '2005'}, None, "hash-b")}
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
+    rules = [Rule(input='company_age', feature_name='feature', operation=Operation(less_than=10), match=1, default=0)]
+
+    service = CompanyService(company_repository=mock_repo)
+    result = service.process_company(["https://a.com", "https://b.com"], rules, run_id=7, as_of=date(2025, 5, 22))
+
+    assert result.companies == [stored, {'feature': 0, 'company': 'B'}]
+    assert result.recomputed == ["https://b.com"]
+    saved, _, run_id, rules_fingerprint, content_hashes = mock_repo.upsert_processed_data_in_batch.call_args.args
+    assert list(saved) == ["https://b.com"] and run_id == 7 and content_hashes == {"https://b.com": "hash-b"}
+    assert rules_fingerprint == RulesProcessorService.fingerprint_rules(rules, date(2025, 5, 22))
+    assert mock_repo.assign_run.call_args.args[::2] == (["https://a.com"], 7)
+
+
+def test_process_company_should_register_the_run_and_save_in_one_transaction():
+    stored = {'feature': 1, 'company': 'A'}
+    mock_repo = MagicMock()
+    mock_repo.fetch_for_processing.return_value = {"https://a.com": ("https://a.com", "A", None, stored, "hash-a")}
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
+    rules = [Rule(input='company_age', feature_name='feature', operation=Operation(less_than=10), match=1, default=0)]
+
+    CompanyService(company_repository=mock_repo).process_company(["https://a.com"], rules)
+
+    calls = [name for name, *_ in mock_repo.mock_calls if "." not in name or name.startswith("transaction")]
+    assert calls == ["transaction", "transaction().__enter__", "create_run", "fetch_for_processing",
+                     "upsert_processed_data_in_batch", "assign_run", "transaction().__exit__"]
+
+
+def test_process_company_should_read_company_contents_from_the_cache_when_repeated():
+    contents = {"https://a.com": ("https://a.com", "A", {'founded_year': '2021'}, "hash-a"),
+                "https://b.com": ("https://b.com", "B", {'founded_year': '2005'}, "hash-b")}
+    queries = {SELECT_PROCESSING_STATE: lambda _, urls: [(url, None, contents[url][3]) for url in urls],
+               SELECT_COMPANY_CONTENTS_BY_URLS: lambda urls: [contents[url] for url in urls],
+               UPDATE_PROCESSED_DATA_IN_BATCH: lambda *params: [(url,) for url in params[3]]}
+    mock_db = MagicMock()
+    mock_db.fetch_all.side_effect = lambda query, params: queries[query](*params)
+    cache = CompanyCache(max_entries=10, max_bytes=1_000_000, ttl=60)
+    service = CompanyService(company_repository=CompanyRepository(mock_db, cache))
+    rules = [Rule(input='company_age', feature_name='feature', operation=Operation(less_than=10), match=1, default=0)]
+
+    for _ in range(3):
+        result = service.process_company(list(contents), rules, as_of=date(2025, 5, 22))
+        assert result.companies == [{'feature': 1, 'company': 'A'}, {'feature': 0, 'company': 'B'}]
+
+    queried = [call.args[0] for call in mock_db.fetch_all.call_args_list]
+    assert queried.count(SELECT_COMPANY_CONTENTS_BY_URLS) == 1
+    assert cache.metrics()["hits"] == 4 and cache.metrics()["invalidations"] == 0
+
+
+def test_process_company_should_report_companies_not_saved():
+    mock_company = ('https://www.cloudlogiclabs.com', 'CloudLogic Labs', {'company_age': 4}, None, None)
+    mock_repo = MagicMock()
+    mock_repo.fetch_for_processing.return_value = {mock_company[0]: mock_company}
+    mock_repo.upsert_processed_data_in_batch.return_value = {mock_company[0]: "Company not found"}
+
+    service = CompanyService(company_repository=mock_repo)
+    rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1,
+                  default=0)]
+
+    result = service.process_company([mock_company[0]], rules)
+
+    assert result.companies == []
+    assert result.failures[0].url == mock_company[0]
+    assert result.failures[0].error == "Company not found"
+    assert result.recomputed == []
+
+
+@patch("src.services.company_processing.PROCESS_POOL_CHUNK_SIZE", 2)
+@patch("src.services.company_processing.PROCESS_POOL_MIN_BATCH", 3)
+def test_process_company_should_evaluate_large_batches_on_process_pool_in_order():
+    companies = {f"https://{index}.com": (f"https://{index}.com", f"C{index}", {'founded_year': 2025 - index}, None,
+                                          None) for index in range(5)}
+    mock_repo = MagicMock()
+    mock_repo.fetch_for_processing.return_value = companies
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
+    rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=2), match=1,
+                  default=0)]
 
-    assert result == [{'age_feature': 1, 'company': 'CloudLogic Labs', 'head_count_feature': 1, 'is_saas_feature': 0,
-                       'usa_based_feature': 1}]
-    mock_repo.fetch_by_url.assert_called_once_with("https://www.cloudlogiclabs.com")
-    mock_rule_processor.process_rules.assert_called_once()
-    service._CompanyService__save_processed_data.assert_called_once()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        service = CompanyService(company_repository=mock_repo, process_pool=pool)
+        with patch.object(pool, "map", wraps=pool.map) as pool_map:
+            result = service.process_company(list(companies), rules, as_of=date(2025, 5, 22))
+
+    assert result.companies == [{'age_feature': 1 if index < 2 else 0, 'company': f"C{index}"} for index in range(5)]
+    assert [len(chunk) for chunk in pool_map.call_args.args[3]] == [2, 2, 1]
+
+
+def test_process_company_in_database_should_return_companies_in_url_order():
+    mock_repo = MagicMock()
+    mock_repo.process_in_database.return_value = ({"https://b.com": {"feature": 0, "company": "B"},
+                                                   "https://a.com": {"feature": 1, "company": "A"}}, {"https://b.com"})
+    rules = [Rule(input='company_age', feature_name='feature', operation=Operation(less_than=10), match=1, default=0)]
+
+    service = CompanyService(company_repository=mock_repo)
+    result = service.process_company(["https://a.com", "https://b.com"], rules, ExecutionMode.DATABASE,
+                                     as_of=date(2025, 5, 22))
+
+    assert result.companies == [{"feature": 1, "company": "A"}, {"feature": 0, "company": "B"}]
+    assert result.recomputed == ["https://b.com"]
+    assert mock_repo.process_in_database.call_args.args[5] == RulesProcessorService.fingerprint_rules(
+        rules, date(2025, 5, 22))
+    assert mock_repo.process_in_database.call_args.args[2][-1] == date(2025, 5, 22)
+    mock_repo.fetch_for_processing.assert_not_called()
+
+
+def test_process_company_should_compute_process_time_features_used_by_rules():
+    content = {"industry": "Payments"}
+    mock_repo = MagicMock()
+    mock_repo.fetch_for_processing.return_value = {"https://a.com": ("https://a.com", "A", content, None, "hash")}
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
+    registry = build_feature_registry([KeywordSet(feature_name="is_fintech", fields=["industry"],
+                                                  keywords=["payments"], on_import=False)])
+    rules = [Rule(input='is_fintech', feature_name='fintech', operation=Operation(equal=True), match=1, default=0)]
+
+    service = CompanyService(company_repository=mock_repo)
+    service._CompanyService__processing = CompanyProcessing(pre_generate_service=PreGenerateService(registry))
+    result = service.process_company(["https://a.com"], rules)
+
+    assert result.companies == [{"fintech": 1, "company": "A"}]
+    assert content == {"industry": "Payments"}
+
+    with pytest.raises(ValueError, match="is_fintech"):
+        service.process_company(["https://a.com"], rules, ExecutionMode.DATABASE)
+    mock_repo.process_in_database.assert_not_called()
+
+
+def test_process_company_should_save_under_given_run():
+    mock_repo = MagicMock()
+    mock_repo.fetch_for_processing.return_value = {"https://a.com": ("https://a.com", "A", {'company_age': 1}, None,
+                                                                     None)}
+    mock_repo.upsert_processed_data_in_batch.return_value = {}
+    rules = [Rule(input='company_age', feature_name='feature', operation=Operation(less_than=10), match=1, default=0)]
+
+    service = CompanyService(company_repository=mock_repo)
+    service.process_company(["https://a.com"], rules, run_id=7)
+
+    mock_repo.create_run.assert_not_called()
+    assert mock_repo.upsert_processed_data_in_batch.call_args.args[2] == 7
 
 
 def test_get_companies_previously_processed_should_return_response():
@@ -134,3 +307,37 @@ def test_get_companies_previously_processed_should_return_response():
     assert result.companies[0].processed_variables == processed_variables
     assert result.companies[0].imported_date == "2025-05-22 08:55:43"
     assert result.companies[0].last_processed_date == "2025-05-22 09:13:43"
+
+
+def test_stream_companies_previously_processed_should_yield_ndjson_per_batch():
+    row = ('https://a.com', 'A', {'company_age': 5}, {'age_feature': 1}, datetime(2025, 5, 22, 8, 55, 43),
+           datetime(2025, 5, 22, 9, 13, 43))
+    mock_repo = MagicMock()
+    mock_repo.iter_companies_previously_processed.return_value = iter([[row, row], [row]])
+    service = CompanyService(company_repository=mock_repo)
+
+    chunks = list(service.stream_companies_previously_processed())
+
+    assert [chunk.count("\n") for chunk in chunks] == [2, 1]
+    assert chunks[1] == CompanyProcessed.from_row(row).model_dump_json() + "\n"
+
+
+def test_stream_companies_response_should_match_the_unpaginated_response():
+    row = ('https://a.com', 'A', {'company_age': 5}, {'age_feature': 1}, datetime(2025, 5, 22, 8, 55, 43),
+           datetime(2025, 5, 22, 9, 13, 43))
+    mock_repo = MagicMock()
+    mock_repo.iter_companies_previously_processed.return_value = iter([[row, row], [], [row]])
+    mock_repo.get_companies_previously_processed.return_value = [row, row, row]
+    service = CompanyService(company_repository=mock_repo)
+
+    body = "".join(service.stream_companies_response())
+
+    assert json.loads(body) == service.get_companies_previously_processed().model_dump()
+
+
+def test_stream_companies_response_should_render_an_empty_run():
+    mock_repo = MagicMock()
+    mock_repo.iter_companies_previously_processed.return_value = iter([])
+    service = CompanyService(company_repository=mock_repo)
+
+    assert json.loads("".join(service.stream_companies_response())) == {"companies": [], "next_cursor": None}
@@ -0,0 +1,114 @@
+import pytest
+from datetime import date
+
+from src.models.keyword_set import KeywordSet
+from src.services.feature_registry import Feature, FeatureRegistry
+from src.services.pre_generate_service import COMPANY_AGE_SQL, PreGenerateService, build_feature_registry
+
+
+def make_registry(calls):
+    def record(name, function):
+        def compute(companies):
+            calls.append((name, len(companies)))
+            return [function(company) for company in companies]
+
+        return compute
+
+    return FeatureRegistry([
+        Feature("size", ["total_employees"], record("size", lambda company: int(company["total_employees"]))),
+        Feature("is_large", ["size"], record("is_large", lambda company: company["size"] > 100), on_import=False),
+        Feature("is_old", ["founded_year"], record("is_old", lambda company: company["founded_year"] < "2000"))])
+
+
+def test_resolve_should_order_dependencies_first_and_ignore_columns():
+    registry = make_registry([])
+
+    assert [feature.name for feature in registry.resolve(["is_large", "total_employees", "size"])] == [
+        "size", "is_large"]
+
+
+def test_resolve_should_reject_cyclic_dependencies():
+    registry = FeatureRegistry([Feature.per_company("a", ["b"], lambda company: 1),
+                                Feature.per_company("b", ["a"], lambda company: 1)])
+
+    with pytest.raises(ValueError):
+        registry.resolve(["a"])
+
+
+def test_register_should_reject_duplicate_names():
+    registry = make_registry([])
+
+    with pytest.raises(ValueError):
+        registry.register(Feature.per_company("size", [], lambda company: 0))
+
+
+def test_compute_should_only_compute_requested_features_once_per_batch():
+    calls = []
+    companies = [{"total_employees": "150", "founded_year": "1990"}, {"total_employees": "20", "founded_year": "2010"}]
+
+    make_registry(calls).compute(companies, ["is_large"])
+
+    assert calls == [("size", 2), ("is_large", 2)]
+    assert [company["is_large"] for company in companies] == [True, False]
+    assert "is_old" not in companies[0]
+
+
+def test_generate_should_compute_import_features_only():
+    calls = []
+    service = PreGenerateService(make_registry(calls))
+
+    [company] = service.generate([{"total_employees": "150", "founded_year": "1990"}])
+
+    assert company == {"total_employees": "150", "founded_year": "1990", "size": 150, "is_old": True}
+    assert calls == [("size", 1), ("is_old", 1)]
+
+
+def test_complete_should_add_missing_features_on_copies():
+    calls = []
+    stored = [{"total_employees": "150", "size": 150}, {"total_employees": "20"}]
+    service = PreGenerateService(make_registry(calls))
+
+    completed = service.complete(stored, ["is_large", "total_employees"])
+
+    assert [company["is_large"] for company in completed] == [True, False]
+    assert calls == [("size", 1), ("is_large", 2)]
+    assert stored == [{"total_employees": "150", "size": 150}, {"total_employees": "20"}]
+    assert service.complete(completed, ["is_large"]) is completed
+
+
+def test_complete_should_recompute_clock_features_and_dependents_for_as_of_date():
+    registry = FeatureRegistry([
+        Feature.per_company("age", ["founded_year"], lambda company, as_of: as_of.year - company["founded_year"],
+                            on_import=False, uses_clock=True),
+        Feature.per_company("is_young", ["age"], lambda company: company["age"] < 5, on_import=False)])
+    stored = [{"founded_year": 2020, "age": 1, "is_young": True}]
+    service = PreGenerateService(registry)
+
+    [company] = service.complete(stored, ["is_young"], date(2026, 1, 1))
+
+    assert company == {"founded_year": 2020, "age": 6, "is_young": False}
+    assert stored == [{"founded_year": 2020, "age": 1, "is_young": True}]
+    assert service.uses_clock(["is_young"]) and not service.uses_clock(["founded_year"])
+
+
+def test_feature_using_clock_should_not_be_computed_on_import():
+    with pytest.raises(ValueError):
+        Feature.per_company("age", ["founded_year"], lambda company, as_of: 0, uses_clock=True)
+
+
+def test_company_age_should_be_computed_for_as_of_date_and_never_on_import():
+    service = PreGenerateService(build_feature_registry([]))
+
+    assert "company_age" not in service.generate([{"founded_year": "2019"}])[0]
+    assert service.complete([{"founded_year": "2019"}], ["company_age"], date(2025, 5, 22))[0]["company_age"] == 6
+
+
+def test_database_features_should_return_sql_of_process_time_features():
+    service = PreGenerateService(build_feature_registry([
+        KeywordSet(feature_name="is_fintech", fields=["industry"], keywords=["payments"], on_import=False)]))
+
+    assert service.database_features(["company_age", "is_saas", "total_employees"], date(2025, 5, 22)) == {
+        "company_age": (COMPANY_AGE_SQL, [date(2025, 5, 22)])}
+    with pytest.raises(ValueError, match="is_fintech"):
+        service.database_features(["is_fintech", "company_age"], date(2025, 5, 22))
+    assert "is_fintech" not in service.generate([{"industry": "Payments"}])[0]
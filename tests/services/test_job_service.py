@@ -0,0 +1,236 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+
+from src.commons.file_utils import iter_csv_batches
+from src.models.import_response import ImportSummary
+from src.models.job import Job, JobStatus
+from src.models.process_response import ProcessResponse, ProcessFailure
+from src.models.rules import Rule, ExecutionMode
+from src.services.job_service import JobService, JobQueueFullError, JobNotFinishedError
+from src.services.rule_set_service import RuleSetPlan
+
+rules = [{"input": "company_age", "feature_name": "age_feature",
+          "operation": {"greater_than": None, "less_than": 10, "equal": None}, "match": 1, "default": 0}]
+
+
+def job_row(kind, payload, status="queued", result=None, rows_total=None, rows_done=0):
+    return ("job-1", kind, status, payload, result, None, rows_total, rows_done, 0,
+            datetime(2025, 5, 22), None, None, None)
+
+
+@pytest.fixture
+def mock_db():
+    return MagicMock()
+
+
+@pytest.fixture
+def service(mock_db):
+    @contextmanager
+    def session():
+        yield mock_db
+
+    return JobService(session_factory=session)
+
+
+@pytest.fixture
+def mock_jobs():
+    with patch("src.services.job_service.JobRepository") as repository:
+        yield repository.return_value
+
+
+@pytest.fixture
+def mock_company_service():
+    with patch("src.services.job_service.CompanyService") as company_service:
+        yield company_service.return_value
+
+
+def test_import_job_should_resume_after_last_committed_batch(service, mock_jobs, mock_company_service, tmp_path,
+                                                             monkeypatch):
+    monkeypatch.setattr("src.services.job_service.IMPORT_BATCH_SIZE", 2)
+    path = tmp_path / "upload.ndjson"
+    path.write_text("\n".join(f'{{"url": "https://{index}.com"}}' for index in range(5)))
+    mock_jobs.claim.return_value = job_row("import", {"path": str(path), "format": "ndjson"}, status="running",
+                                           result={"rows_read": 3, "rows_inserted": 3, "rows_updated": 0,
+                                                   "rows_unchanged": 0}, rows_total=5, rows_done=3)
+    mock_company_service.import_data.side_effect = lambda batch: ImportSummary(rows_read=len(batch),
+                                                                               rows_inserted=len(batch) - 1,
+                                                                               rows_unchanged=1)
+
+    service._JobService__run("job-1")
+
+    imported = [call.args[0] for call in mock_company_service.import_data.call_args_list]
+    assert imported == [[{"url": "https://3.com"}], [{"url": "https://4.com"}]]
+    mock_jobs.start.assert_called_once_with("job-1", ANY)
+    assert mock_jobs.update_progress.call_args.args == ("job-1", ANY, 5, {"rows_read": 5, "rows_inserted": 3,
+                                                                         "rows_updated": 0, "rows_unchanged": 2})
+    mock_jobs.update_status.assert_called_once_with("job-1", ANY, JobStatus.COMPLETED)
+    assert not path.exists()
+
+
+def test_import_job_should_parse_the_upload_once_and_record_rows_total_at_the_end(service, mock_jobs,
+                                                                                 mock_company_service, tmp_path,
+                                                                                 monkeypatch):
+    monkeypatch.setattr("src.services.job_service.IMPORT_BATCH_SIZE", 1)
+    path = tmp_path / "upload.csv"
+    path.write_text("url,company_name\nhttps://a.com,A\nhttps://b.com,B\n")
+    mock_jobs.claim.return_value = job_row("import", {"path": str(path), "format": "csv"})
+    mock_company_service.import_data.return_value = ImportSummary(rows_read=1, rows_inserted=1)
+
+    with patch("src.services.job_service.iter_csv_batches", wraps=iter_csv_batches) as parse:
+        service._JobService__run("job-1")
+
+    parse.assert_called_once()
+    mock_jobs.start.assert_called_once_with("job-1", ANY)
+    assert [call.kwargs.get("rows_total") for call in mock_jobs.update_progress.call_args_list] == [None, None, 2]
+    mock_jobs.update_status.assert_called_once_with("job-1", ANY, JobStatus.COMPLETED)
+
+
+def test_job_held_by_another_worker_should_be_skipped(service, mock_jobs, mock_company_service, tmp_path):
+    path = tmp_path / "upload.csv"
+    path.write_text("url,company_name\nhttps://a.com,A\n")
+    mock_jobs.claim.return_value = None
+
+    service._JobService__run("job-1")
+
+    mock_company_service.import_data.assert_not_called()
+    mock_jobs.update_status.assert_not_called()
+    assert path.exists()
+
+
+def test_job_taken_over_should_stop_without_finishing_it(service, mock_jobs, mock_company_service, tmp_path,
+                                                         monkeypatch):
+    monkeypatch.setattr("src.services.job_service.IMPORT_BATCH_SIZE", 1)
+    path = tmp_path / "upload.csv"
+    path.write_text("url,company_name\nhttps://a.com,A\nhttps://b.com,B\n")
+    mock_jobs.claim.return_value = job_row("import", {"path": str(path), "format": "csv"}, status="running")
+    mock_jobs.update_progress.return_value = False
+    mock_company_service.import_data.return_value = ImportSummary(rows_read=1, rows_inserted=1)
+
+    service._JobService__run("job-1")
+
+    assert mock_company_service.import_data.call_count == 1
+    mock_jobs.update_status.assert_not_called()
+    assert path.exists()
+
+
+def test_start_should_enqueue_claimable_jobs(service, mock_jobs, monkeypatch):
+    monkeypatch.setattr("src.services.job_service.JOB_WORKERS", 0)
+    monkeypatch.setattr("src.services.job_service.JOB_LEASE_TIMEOUT", 60)
+    mock_jobs.fetch_claimable.return_value = [job_row("import", {})]
+
+    service.start()
+
+    expired_before = mock_jobs.fetch_claimable.call_args.args[0]
+    assert timedelta(seconds=59) < datetime.now() - expired_before < timedelta(seconds=61)
+    assert service._JobService__queue.get_nowait() == "job-1"
+
+
+def test_process_job_should_run_remaining_batches_and_keep_failures(service, mock_jobs, mock_company_service,
+                                                                    monkeypatch):
+    monkeypatch.setattr("src.services.job_service.JOB_PROCESS_BATCH_SIZE", 2)
+    urls = ["https://a.com", "https://b.com", "https://c.com", "https://d.com", "https://e.com"]
+    mock_jobs.claim.return_value = job_row("process", {"urls": urls, "rules": rules, "execution": "python",
+                                                       "as_of": "2025-05-22"}, status="running",
+                                           result={"failures": {"https://a.com": "boom"}, "run_id": 7}, rows_done=2)
+    mock_company_service.process_company.return_value = ProcessResponse(
+        companies=[], failures=[ProcessFailure(url="https://d.com", error="Company not found")])
+
+    service._JobService__run("job-1")
+
+    calls = [call.args for call in mock_company_service.process_company.call_args_list]
+    assert [(call[0], call[2:]) for call in calls] == [(urls[2:4], (ExecutionMode.PYTHON, 7, date(2025, 5, 22))),
+                                                       (urls[4:], (ExecutionMode.PYTHON, 7, date(2025, 5, 22)))]
+    assert calls[0][1] is calls[1][1] and calls[0][1].rules == [Rule.model_validate(rules[0])]
+    assert mock_jobs.update_progress.call_args.args == (
+        "job-1", ANY, 5, {"failures": {"https://a.com": "boom", "https://d.com": "Company not found"}, "run_id": 7})
+    mock_jobs.update_status.assert_called_once_with("job-1", ANY, JobStatus.COMPLETED)
+
+
+def test_process_job_should_save_every_batch_under_one_new_run(service, mock_db, mock_jobs, mock_company_service,
+                                                               monkeypatch):
+    monkeypatch.setattr("src.services.job_service.JOB_PROCESS_BATCH_SIZE", 1)
+    mock_jobs.claim.return_value = job_row("process", {"urls": ["https://a.com", "https://b.com"], "rules": rules,
+                                                       "execution": "python"})
+    mock_db.fetch_one.return_value = (9,)
+    mock_company_service.process_company.return_value = ProcessResponse(companies=[])
+
+    service._JobService__run("job-1")
+
+    mock_db.fetch_one.assert_called_once()
+    assert [call.args[3] for call in mock_company_service.process_company.call_args_list] == [9, 9]
+    assert mock_jobs.update_progress.call_args.args == ("job-1", ANY, 2, {"failures": {}, "run_id": 9})
+
+
+def test_process_job_should_run_registered_rule_set(service, mock_jobs, mock_company_service):
+    plan = RuleSetPlan([Rule.model_validate(rules[0])], rule_set_id=3)
+    mock_jobs.create.return_value = job_row("process", {})
+    service.submit_process(["https://a.com"], plan)
+    payload = mock_jobs.create.call_args.args[2]
+    mock_jobs.claim.return_value = job_row("process", payload)
+    mock_company_service.process_company.return_value = ProcessResponse(companies=[])
+
+    with patch("src.services.job_service.RuleSetService") as rule_set_service:
+        rule_set_service.return_value.get_plan.return_value = plan
+        service._JobService__run("job-1")
+
+    assert payload["rule_set_id"] == 3 and "rules" not in payload
+    rule_set_service.return_value.get_plan.assert_called_once_with(3)
+    assert mock_company_service.process_company.call_args.args[1] is plan
+
+def test_job_should_fail_with_error_message(service, mock_jobs, mock_company_service):
+    mock_jobs.claim.return_value = job_row("process", {"urls": ["https://a.com"], "rules": rules,
+                                                       "execution": "python"})
+    mock_company_service.process_company.side_effect = RuntimeError("database is gone\nCONTEXT: details")
+
+    service._JobService__run("job-1")
+
+    mock_jobs.update_status.assert_called_once_with("job-1", ANY, JobStatus.FAILED, "database is gone")
+
+
+def test_stopping_should_leave_job_queued(service, mock_jobs, mock_company_service):
+    mock_jobs.claim.return_value = job_row("process", {"urls": ["https://a.com"], "rules": rules,
+                                                       "execution": "python"})
+    service._JobService__stopping.set()
+
+    service._JobService__run("job-1")
+
+    mock_company_service.process_company.assert_not_called()
+    mock_jobs.update_status.assert_called_once_with("job-1", ANY, JobStatus.QUEUED)
+
+
+def test_submit_should_reject_when_queue_is_full(service, mock_jobs, monkeypatch):
+    monkeypatch.setattr("src.services.job_service.JOB_QUEUE_SIZE", 1)
+    mock_jobs.create.return_value = job_row("process", {})
+
+    job = service.submit_process(["https://a.com", "https://a.com"], [])
+
+    assert job.status == JobStatus.QUEUED
+    assert mock_jobs.create.call_args.args[2]["urls"] == ["https://a.com"]
+    assert mock_jobs.create.call_args.args[2]["as_of"] == date.today().isoformat()
+    with pytest.raises(JobQueueFullError):
+        service.submit_process(["https://a.com"], [])
+
+
+def test_get_result_should_require_completed_job(service, mock_jobs):
+    mock_jobs.fetch.return_value = job_row("import", {}, status="running")
+
+    with pytest.raises(JobNotFinishedError):
+        service.get_result("job-1")
+
+    mock_jobs.fetch.return_value = job_row("import", {}, status="completed", result={"rows_read": 2,
+                                                                                     "rows_inserted": 1})
+    assert service.get_result("job-1") == ImportSummary(rows_read=2, rows_inserted=1)
+
+
+def test_job_from_row_should_compute_throughput_and_eta():
+    started = datetime(2025, 5, 22, 10, 0, 0)
+    row = ("job-1", "import", "running", {}, None, None, 1000, 300, 100, started - timedelta(minutes=1), started,
+           started + timedelta(seconds=10), None)
+
+    job = Job.from_row(row)
+
+    assert job.throughput == 20
+    assert job.eta_seconds == 35
@@ -0,0 +1,70 @@
+import json
+import re
+
+import pytest
+from pydantic import ValidationError
+
+from src.models.keyword_set import KeywordSet
+from src.services.keyword_classifier import KeywordClassifier, build_keyword_pattern, load_keyword_sets
+from src.services.pre_generate_service import PreGenerateService, build_feature_registry
+
+
+@pytest.mark.parametrize("keywords, text, matched", [
+    (["saas", "software as a service"], "a software as a service company", True),
+    (["saas", "sa"], "visa", True),
+    (["cloud management", "cloud"], "clou", False),
+    (["c++", "a.b"], "we write c++", True),
+    (["c++", "a.b"], "axb", False),
+    ([], "anything", False),
+])
+def test_build_keyword_pattern_should_match_like_substring_search(keywords, text, matched):
+    assert (re.search(build_keyword_pattern(keywords), text) is not None) is matched
+    assert matched is any(keyword in text for keyword in keywords)
+
+
+def test_build_keyword_pattern_should_drop_keywords_extending_shorter_ones():
+    assert build_keyword_pattern(["data", "database", "big data", "dat"]) == "(?:dat|big\\ data)"
+
+
+def test_classify_should_emit_one_feature_per_keyword_set():
+    classifier = KeywordClassifier([
+        KeywordSet(feature_name="is_saas", fields=["description", "industry"], keywords=["SaaS"]),
+        KeywordSet(feature_name="is_fintech", fields=["industry"], keywords=["payments", "banking"]),
+        KeywordSet(feature_name="is_remote", fields=["headquarters_city"], keywords=["remote"])])
+
+    features = classifier.classify({"description": "Subscription SAAS", "industry": "Payments", "headquarters_city": None})
+
+    assert features == {"is_saas": True, "is_fintech": True, "is_remote": False}
+    assert classifier.feature_names == ["is_saas", "is_fintech", "is_remote"]
+
+
+def test_keyword_set_should_reject_empty_keywords():
+    with pytest.raises(ValidationError):
+        KeywordSet(feature_name="empty", fields=["industry"], keywords=["saas", ""])
+
+
+def test_load_keyword_sets_should_read_json_file(tmp_path):
+    path = tmp_path / "keyword-sets.json"
+    path.write_text(json.dumps([{"feature_name": "is_fintech", "fields": ["industry"], "keywords": ["payments"]}]))
+
+    assert load_keyword_sets(str(path)) == [KeywordSet(feature_name="is_fintech", fields=["industry"],
+                                                       keywords=["payments"])]
+
+
+def test_pre_generate_service_should_add_keyword_features():
+    service = PreGenerateService(build_feature_registry([
+        KeywordSet(feature_name="is_saas", fields=["description"], keywords=["saas"]),
+        KeywordSet(feature_name="is_ai", fields=["industry"], keywords=["artificial intelligence"])]))
+
+    [company] = service.generate([{"description": "B2B SaaS", "industry": "Artificial Intelligence",
+                                   "headquarters_city": "Austin (USA)", "founded_year": "2020"}])
+
+    assert company["is_saas"] is True
+    assert company["is_ai"] is True
+    assert company["is_usa_based"] is True
+
+
+def test_pre_generate_service_should_detect_saas_by_default():
+    [company] = PreGenerateService().generate([{"description": "Big Data analytics", "industry": None}])
+
+    assert company["is_saas"] is True
@@ -0,0 +1,98 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.commons.hash_utils import canonical_json
+from src.models.rules import Rule, Operation
+from src.services.async_rule_set_service import AsyncRuleSetService
+from src.services.rule_set_service import RuleSetPlan, RuleSetPlanCache, RuleSetService
+from src.services.rules_processor_service import RulesProcessorService
+
+rules = [Rule(input="company_age", feature_name="age_feature", operation=Operation(less_than=10), match=1, default=0),
+         Rule(input="total_employees", feature_name="big", operation=Operation(greater_than=80), match=1, default=0)]
+
+
+def rule_set_row(rule_set_id=3):
+    return rule_set_id, RulesProcessorService.fingerprint_rules(rules), [rule.model_dump() for rule in rules], \
+        datetime(2025, 5, 22)
+
+
+def test_plan_should_match_fingerprints_payload_and_sql_of_rules():
+    plan = RuleSetPlan(rules, precompile=True)
+
+    assert plan.inputs == ["company_age", "total_employees"]
+    assert plan.fingerprint_for(None) == RulesProcessorService.fingerprint_rules(rules)
+    assert plan.fingerprint_for(date(2025, 5, 22)) == RulesProcessorService.fingerprint_rules(rules, date(2025, 5, 22))
+    assert plan.serialize() == (plan.fingerprint, canonical_json([rule.model_dump() for rule in rules]))
+    assert plan.compile_sql() == RulesProcessorService.compile_rules_to_sql(rules)
+    assert plan.compile_sql() is plan.compile_sql()
+    assert plan.evaluate({"company_age": 4, "total_employees": 100}) == {"age_feature": 1, "big": 1}
+    assert RuleSetPlan(rules).evaluate is None
+
+
+def test_plan_serialize_should_be_stable():
+    rules_fingerprint, rules_payload = RuleSetPlan(rules).serialize()
+
+    assert RuleSetPlan([rule.model_copy() for rule in rules]).serialize() == (rules_fingerprint, rules_payload)
+    assert RuleSetPlan(rules[::-1]).serialize()[0] != rules_fingerprint
+
+
+def test_plan_cache_should_find_plans_by_id_or_fingerprint_and_evict_least_recently_used():
+    cache = RuleSetPlanCache(max_entries=2)
+    first, second, third = (RuleSetPlan(rules[:count], rule_set_id=count) for count in (1, 2, 0))
+
+    cache.put(first)
+    assert cache.put(second) is second
+    assert cache.put(RuleSetPlan(rules[:2], rule_set_id=2)) is second
+    assert cache.get("1") is first and cache.get(first.fingerprint) is first
+    cache.put(third)
+
+    assert cache.get(2) is None and cache.get(second.fingerprint) is None
+    assert cache.get(1) is first and cache.get(0) is third
+    assert cache.metrics() == {"hits": 4, "misses": 2, "evictions": 1, "entries": 2}
+
+
+def test_get_plan_should_fetch_and_compile_rule_set_once():
+    mock_repo = MagicMock()
+    mock_repo.fetch.return_value = rule_set_row()
+    service = RuleSetService(mock_repo, RuleSetPlanCache(max_entries=4))
+
+    plan = service.get_plan(3)
+
+    assert plan.id == 3 and plan.rules == rules and plan.evaluate is not None
+    assert service.get_plan("3") is plan and service.get_plan(plan.fingerprint) is plan
+    mock_repo.fetch.assert_called_once_with(3)
+
+
+def test_get_plan_should_return_none_for_unknown_rule_set():
+    mock_repo = MagicMock()
+    mock_repo.fetch.return_value = None
+
+    assert RuleSetService(mock_repo, RuleSetPlanCache(max_entries=4)).get_plan(3) is None
+
+
+def test_register_should_store_fingerprint_and_dumped_rules():
+    mock_repo = MagicMock()
+    mock_repo.register.return_value = (3, "abc", datetime(2025, 5, 22))
+
+    rule_set = RuleSetService(mock_repo).register(rules)
+
+    mock_repo.register.assert_called_once_with(RulesProcessorService.fingerprint_rules(rules),
+                                               [rule.model_dump() for rule in rules])
+    assert (rule_set.id, rule_set.fingerprint, rule_set.rule_count, rule_set.rules) == (3, "abc", 2, None)
+
+
+@pytest.mark.asyncio
+async def test_async_service_should_register_and_cache_plans():
+    mock_repo = MagicMock()
+    mock_repo.register = AsyncMock(return_value=(3, "abc", datetime(2025, 5, 22)))
+    mock_repo.fetch = AsyncMock(return_value=rule_set_row())
+    service = AsyncRuleSetService(mock_repo, RuleSetPlanCache(max_entries=4))
+
+    assert (await service.register(rules)).id == 3
+    assert (await service.get(3)).rules == rules
+    plan = await service.get_plan(3)
+
+    assert await service.get_plan(3) is plan
+    assert mock_repo.fetch.await_count == 2
@@ -1,4 +1,6 @@
 import pytest
+from datetime import date
+
 from src.services.rules_processor_service import RulesProcessorService
 from src.models.rules import Rule, Operation
 
@@ -52,3 +54,168 @@ def test_evaluate_condition_unsupported_operation_should_raise(service):
     operation = Operation()
     with pytest.raises(ValueError):
         service._RulesProcessorService__evaluate_condition("unknown", 10, operation)
+
+
+def test_compile_rules_should_match_process_rules(service):
+    rules = [
+        Rule(input='total_employees', feature_name='head_count_feature', operation=Operation(greater_than=80),
+             match=0, default=1),
+        Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1, default=0),
+        Rule(input='is_usa_based', feature_name='usa_based_feature', operation=Operation(equal=True), match=1,
+             default=0),
+        Rule(input='is_saas', feature_name='is_saas_feature', operation=Operation(equal=False), match=1, default=0),
+        Rule(input='total_employees', feature_name='head_count_feature', operation=Operation(less_than=-5),
+             match=7, default=8),
+        Rule(input='company_age', feature_name='both_set_feature', operation=Operation(greater_than=3, less_than=1),
+             match=1, default=0),
+    ]
+    values = [None, 0, 1, 4, 10, 80, 81, 95.5, -10, True, False, "38", "N/A", {"USA": 1}, [1]]
+    evaluate = service.compile_rules(rules)
+
+    for value in values:
+        for company_data in ({}, {'total_employees': value, 'company_age': value, 'is_usa_based': value,
+                                  'is_saas': value}):
+            expected = service.process_rules(company_data, rules)
+            result = evaluate(company_data)
+            assert result == expected
+            assert list(result) == list(expected)
+
+
+def test_compile_rules_should_raise_for_rule_without_operation_only_when_input_present(service):
+    rules = [Rule(input='total_employees', feature_name='head_count_feature', operation=Operation(), match=1,
+                  default=0)]
+    evaluate = service.compile_rules(rules)
+
+    assert evaluate({}) == {'head_count_feature': 0}
+    with pytest.raises(ValueError):
+        evaluate({'total_employees': 10})
+
+
+def test_compile_rules_should_not_evaluate_feature_names_as_code(service):
+    rules = [Rule(input="x'), __import__('os').exit(1), ('", feature_name="f' + str(1) + '", operation=Operation(equal=True),
+                  match=1, default=0)]
+
+    assert service.compile_rules(rules)({"x'), __import__('os').exit(1), ('": True}) == {"f' + str(1) + '": 1}
+
+
+def test_evaluate_vectorized_should_match_process_rules(service):
+    rules = [
+        Rule(input='total_employees', feature_name='head_count_feature', operation=Operation(greater_than=80),
+             match=0, default=1),
+        Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1, default=0),
+        Rule(input='is_usa_based', feature_name='usa_based_feature', operation=Operation(equal=True), match=1,
+             default=0),
+        Rule(input='is_saas', feature_name='is_saas_feature', operation=Operation(equal=False), match=1, default=0),
+        Rule(input='total_employees', feature_name='head_count_feature', operation=Operation(less_than=-5),
+             match=7, default=8),
+    ]
+    values = [None, 0, 1, 4, 10, 80, 81, 95.5, -10, True, False, "38", "N/A", {"USA": 1}, [1], 2 ** 60 + 1]
+    companies_data = [{}] + [{'total_employees': value, 'company_age': value, 'is_usa_based': value,
+                              'is_saas': value} for value in values]
+
+    results = service.evaluate_vectorized(companies_data, rules)
+
+    assert results == [service.process_rules(company_data, rules) for company_data in companies_data]
+    assert all(list(result) == ['head_count_feature', 'age_feature', 'usa_based_feature', 'is_saas_feature']
+               for result in results)
+
+
+def test_evaluate_vectorized_should_compare_large_integers_exactly(service):
+    rules = [Rule(input='value', feature_name='feature', operation=Operation(greater_than=2 ** 53), match=1,
+                  default=0)]
+
+    results = service.evaluate_vectorized([{'value': 2 ** 53 + 1}, {'value': 2 ** 53}], rules)
+
+    assert results == [{'feature': 1}, {'feature': 0}]
+
+
+@pytest.mark.parametrize("threshold", [2 ** 64, -2 ** 64])
+def test_evaluate_vectorized_should_match_process_rules_beyond_int64_thresholds(service, threshold):
+    rules = [Rule(input='value', feature_name='greater', operation=Operation(greater_than=threshold), match=1, default=0),
+             Rule(input='value', feature_name='less', operation=Operation(less_than=threshold), match=1, default=0)]
+    companies_data = [{'value': value} for value in (True, False, 5, 2 ** 70, -2 ** 70, "38")]
+
+    results = service.evaluate_vectorized(companies_data, rules)
+
+    assert results == [service.process_rules(company_data, rules) for company_data in companies_data]
+
+
+def test_evaluate_vectorized_should_raise_for_rule_without_operation_only_when_input_present(service):
+    rules = [Rule(input='total_employees', feature_name='head_count_feature', operation=Operation(), match=1,
+                  default=0)]
+
+    assert service.evaluate_vectorized([{}, {}], rules) == [{'head_count_feature': 0}, {'head_count_feature': 0}]
+    with pytest.raises(ValueError):
+        service.evaluate_vectorized([{}, {'total_employees': 10}], rules)
+
+
+def test_process_batch_should_vectorize_large_batches(service, monkeypatch):
+    monkeypatch.setattr("src.services.rules_processor_service.RULES_VECTORIZE_MIN_BATCH", 2)
+    monkeypatch.setattr("src.services.rules_processor_service.RULES_VECTORIZE_MIN_RULES", 1)
+    rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1,
+                  default=0)]
+    evaluate_vectorized = service.evaluate_vectorized
+    calls = []
+    monkeypatch.setattr(service, "evaluate_vectorized", lambda *args: calls.append(args) or evaluate_vectorized(*args))
+
+    assert service.process_batch([{'company_age': 4}], rules) == [{'age_feature': 1}]
+    assert calls == []
+    assert service.process_batch([{'company_age': 4}, {'company_age': 12}], rules) == [{'age_feature': 1},
+                                                                                          {'age_feature': 0}]
+    assert len(calls) == 1
+
+
+def test_compile_rules_to_sql_should_bind_every_value_as_parameter(service):
+    rules = [Rule(input='total_employees', feature_name='head_count_feature', operation=Operation(greater_than=80),
+                  match=0, default=1),
+             Rule(input='is_usa_based', feature_name='usa_based_feature', operation=Operation(equal=True), match=1,
+                  default=0),
+             Rule(input='total_employees', feature_name="x'); DROP TABLE company_data; --",
+                  operation=Operation(less_than=10), match=1, default=0)]
+
+    expression, params = service.compile_rules_to_sql(rules)
+
+    assert expression.count("%s") == len(params)
+    assert "DROP TABLE" not in expression
+    assert "value_0 > %s::numeric" in expression and "value_1 = %s::numeric" in expression
+    assert params == ['head_count_feature', 80, 0, 1, 'usa_based_feature', 1, 1, 0,
+                      "x'); DROP TABLE company_data; --", 10, 1, 0,
+                      'total_employees', 'total_employees', 'total_employees',
+                      'is_usa_based', 'is_usa_based', 'is_usa_based']
+
+
+def test_compile_rules_to_sql_should_compute_derived_inputs(service):
+    rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1,
+                  default=0)]
+
+    expression, params = service.compile_rules_to_sql(rules, {"company_age": ("extract(year FROM %s::date)",
+                                                                              [date(2025, 5, 22)])})
+
+    assert "(extract(year FROM %s::date)) AS value_0" in expression
+    assert params == ['age_feature', 10, 1, 0, date(2025, 5, 22)]
+
+
+def test_fingerprint_rules_should_depend_on_as_of_date_only_when_given(service):
+    rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1,
+                  default=0)]
+
+    assert service.fingerprint_rules(rules, date(2025, 5, 22)) == service.fingerprint_rules(rules, date(2025, 5, 22))
+    assert service.fingerprint_rules(rules, date(2025, 5, 22)) != service.fingerprint_rules(rules, date(2026, 5, 22))
+    assert service.fingerprint_rules(rules, date(2025, 5, 22)) != service.fingerprint_rules(rules)
+
+
+def test_compile_rules_to_sql_should_split_objects_over_argument_limit(service):
+    rules = [Rule(input='company_age', feature_name=f'feature_{index}', operation=Operation(less_than=index),
+                  match=1, default=0) for index in range(120)]
+
+    expression, _ = service.compile_rules_to_sql(rules)
+
+    assert expression.count("jsonb_build_object(") == 3
+
+
+def test_compile_rules_to_sql_should_reject_rule_without_operation(service):
+    rules = [Rule(input='total_employees', feature_name='head_count_feature', operation=Operation(), match=1,
+                  default=0)]
+
+    with pytest.raises(ValueError):
+        service.compile_rules_to_sql(rules)
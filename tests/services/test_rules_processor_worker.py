@@ -0,0 +1,20 @@
+from src.models.rules import Rule, Operation
+from src.services import rules_processor_worker
+from src.services.rule_set_service import RuleSetPlan
+from src.services.rules_processor_worker import evaluate_chunk
+
+rules = [Rule(input='company_age', feature_name='age_feature', operation=Operation(less_than=10), match=1, default=0),
+         Rule(input='is_usa_based', feature_name='usa_based_feature', operation=Operation(equal=True), match=1,
+              default=0)]
+
+
+def test_evaluate_chunk_should_compile_rule_set_once(monkeypatch):
+    rules_fingerprint, rules_payload = RuleSetPlan(rules).serialize()
+    monkeypatch.setattr(rules_processor_worker, "_rule_sets", type(rules_processor_worker._rule_sets)())
+
+    first = evaluate_chunk(rules_fingerprint, rules_payload, [{'company_age': 4, 'is_usa_based': True}])
+    second = evaluate_chunk(rules_fingerprint, "not parsed again", [{'company_age': 12}])
+
+    assert first == [{'age_feature': 1, 'usa_based_feature': 1}]
+    assert second == [{'age_feature': 0, 'usa_based_feature': 0}]
+    assert list(rules_processor_worker._rule_sets) == [rules_fingerprint]
@@ -0,0 +1,52 @@
+from src.models.company_record import CompanyRecord
+from src.models.company_schema import ColumnType
+from src.services.type_coercion_service import TypeCoercionService, parse_json, parse_number
+
+
+def test_parse_number_should_return_int_for_integers_and_float_for_decimals():
+    assert parse_number("38") == 38 and isinstance(parse_number(" +38 "), int)
+    assert parse_number("38.6") == 38.6
+    assert parse_number("-.5e1") == -5.0
+    assert parse_number("1e999") == "1e999"
+    assert parse_number("nan") == "nan"
+    assert parse_number("1_000") == "1_000"
+    assert parse_number("38 employees") == "38 employees"
+
+
+def test_parse_json_should_only_parse_objects_and_arrays():
+    assert parse_json('{"USA": 32, "Canada": 3}') == {"USA": 32, "Canada": 3}
+    assert parse_json('["USA"]') == ["USA"]
+    assert parse_json('"USA"') == '"USA"'
+    assert parse_json('{"USA": NaN}') == '{"USA": NaN}'
+    assert parse_json("{USA: 32}") == "{USA: 32}"
+
+
+def test_coerce_should_convert_typed_columns_and_null_markers():
+    data = [{"total_employees": "38", "employee_growth_1Y": "N/A", "employee_locations": '{"USA": 32}',
+             "description": "N/A", "founded_year": 2019},
+            {"total_employees": "", "employee_growth_1Y": " 19.8 ", "employee_locations": "unknown"},
+            {"url": "https://a.com"}]
+
+    coerced = TypeCoercionService().coerce(data)
+
+    assert coerced is data
+    assert data == [{"total_employees": 38, "employee_growth_1Y": None, "employee_locations": {"USA": 32},
+                     "description": "N/A", "founded_year": 2019},
+                    {"total_employees": None, "employee_growth_1Y": 19.8, "employee_locations": "unknown"},
+                    {"url": "https://a.com"}]
+
+
+def test_coerce_should_use_given_schema_and_null_markers():
+    service = TypeCoercionService({"revenue": ColumnType.NUMBER}, null_markers=["unknown"])
+
+    assert service.coerce([{"revenue": "Unknown", "total_employees": "38"}, {"revenue": "N/A"}]) == [
+        {"revenue": None, "total_employees": "38"}, {"revenue": "N/A"}]
+
+
+def test_coerce_should_store_typed_values_in_records():
+    record = CompanyRecord.from_row(["url", "total_employees", "employee_locations"],
+                                    ["https://a.com", "38", '{"USA": 32}'])
+
+    TypeCoercionService().coerce([record])
+
+    assert record.to_canonical_json() == '{"employee_locations":{"USA":32},"total_employees":38,"url":"https://a.com"}'